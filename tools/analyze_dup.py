@@ -1,30 +1,7 @@
 """Analyze DUP plot_codes to understand the root cause"""
-import pymysql
-from urllib.parse import urlparse
-import os
+from landmgmt import db
 
-ENV_PATH = r"c:\Users\Administrator\OneDrive\000_Ai Project\PHP_SQL\.env"
-def read_env(path):
-    env = {}
-    if not os.path.exists(path): return env
-    with open(path, encoding='utf-8') as f:
-        for line in f:
-            line = line.strip()
-            if not line or line.startswith('#'): continue
-            if '=' in line:
-                k, v = line.split('=', 1)
-                env[k.strip()] = v.strip()
-    return env
-
-env = read_env(ENV_PATH)
-mysql_url = env.get('MYSQL_URL', '')
-p = urlparse(mysql_url)
-conn = pymysql.connect(
-    host=p.hostname or '127.0.0.1', port=p.port or 3306,
-    user=p.username or 'root', password=p.password or '',
-    database=(p.path or '/land_management').lstrip('/'),
-    charset='utf8mb4', connect_timeout=10
-)
+conn = db.get_connection()
 cur = conn.cursor()
 
 print("=== 1. DUP plots: plot_code vs spar_code vs num_apar ===\n")
@@ -99,4 +76,4 @@ else:
     print("  No duplicates! APAR_CODE + NUM_APAR is unique!")
 
 cur.close()
-conn.close()
+db.close()
@@ -0,0 +1,288 @@
+"""
+Benchmark ทั้ง pipeline ของ tools/ กับ MariaDB ชั่วคราว (ไม่แตะ DB จริง) ที่หลายขนาดข้อมูล
+
+แต่ละขนาด: สร้างข้อมูลสังเคราะห์ (gen_synthetic.py — ใช้ซ้ำถ้ามีอยู่แล้ว) → สร้าง DB ใหม่จาก
+sql/schema.sql + sql/migration_*.sql → รันทีละขั้นเป็น process แยก:
+  upsert        upsert_xlsx.py
+  dup_report    dup_detail_report.py
+  dedupe_plan   fix_dup.py --dry-run
+  dedupe_apply  fix_dup.py --apply <plan>
+  audit         audit_report.py
+  audit_v2      gen_audit_v2.py
+
+บันทึกต่อขั้นลง JSON: เวลา, แถว/วินาที, จำนวน query (ตัวนับ Questions/Com_* ของ server),
+peak RSS ของ process ของ tool (ไม่รวม worker process ของ upsert), จำนวนแถวใน villagers/land_plots
+รายงาน/plan ของแต่ละ tool เขียนลง work dir (LANDMGMT_OUT_DIR) ไม่ทับไฟล์ใน tools/
+
+DB ที่ใช้:
+  default     เปิด mariadbd ชั่วคราว (mariadb-install-db + datadir ใหม่, port ว่าง) แล้วลบทิ้งตอนจบ
+  --server    ใช้ MariaDB ที่รันอยู่แล้วในเครื่อง (เช่น XAMPP) — สร้าง/ลบ database --database เท่านั้น
+              (ตัวนับ query เป็นของทั้ง server: client อื่นที่ใช้อยู่จะปนมาด้วย)
+
+วิธีใช้:
+  python bench_pipeline.py                                   # 1k 10k
+  python bench_pipeline.py 1k 10k 100k --out bench_new.json
+  python bench_pipeline.py 10k --server mysql://root@127.0.0.1:3306
+  python bench_pipeline.py 10k --upsert-args "--mode row"
+  python bench_pipeline.py 10k --baseline bench_results.json  # exit 1 ถ้าแถว/วินาทีลดเกิน 20%
+"""
+import argparse
+import json
+import os
+import platform
+import shlex
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from urllib.parse import urlparse
+
+from landmgmt import benchdb, config, synthetic
+
+STAGES = (
+    ('upsert', ['upsert_xlsx.py']),
+    ('dup_report', ['dup_detail_report.py']),
+    ('dedupe_plan', ['fix_dup.py', '--dry-run']),
+    ('dedupe_apply', ['fix_dup.py', '--apply', '{plan}']),
+    ('audit', ['audit_report.py']),
+    ('audit_v2', ['gen_audit_v2.py']),
+)
+STAGE_NAMES = [name for name, _ in STAGES]
+
+parser = argparse.ArgumentParser(description="Benchmark upsert/dedupe/audit กับ MariaDB ชั่วคราว")
+parser.add_argument('sizes', nargs='*', default=['1k', '10k'], help="จำนวนแถว เช่น 1k 10k 100k (default 1k 10k)")
+parser.add_argument('--stages', default=','.join(STAGE_NAMES),
+                    help=f"ขั้นที่รัน คั่นด้วย , (default: ทั้งหมด — {','.join(STAGE_NAMES)})")
+parser.add_argument('--out', default=config.tool_path('bench_results.json'), help="ไฟล์ผล JSON")
+parser.add_argument('--baseline', help="ผล JSON รอบก่อน — เทียบแถว/วินาทีของขั้นและขนาดเดียวกัน")
+parser.add_argument('--max-regression', type=float, default=0.2,
+                    help="แถว/วินาทีลดลงเกินสัดส่วนนี้จาก baseline = regression (default 0.2)")
+parser.add_argument('--server', metavar='URL', help="ใช้ MariaDB ที่รันอยู่แล้ว เช่น mysql://root@127.0.0.1:3306")
+parser.add_argument('--mysqld', help="path ของ mariadbd/mysqld (default: หาใน PATH / XAMPP)")
+parser.add_argument('--database', default='landmgmt_bench', help="ชื่อ database ของ benchmark")
+parser.add_argument('--data-dir', default=config.tool_path('synthetic'), help="ที่เก็บข้อมูลสังเคราะห์ (ใช้ซ้ำ)")
+parser.add_argument('--seed', type=int, default=0)
+parser.add_argument('--upsert-args', default='', help="option เพิ่มให้ upsert_xlsx.py เช่น \"--mode row\"")
+parser.add_argument('--work-dir', help="ที่เก็บรายงาน/log/datadir ระหว่างรัน (default: temp)")
+parser.add_argument('--keep', action='store_true', help="ไม่ลบ work dir และ datadir ตอนจบ")
+args = parser.parse_args()
+
+stages = [s.strip() for s in args.stages.split(',') if s.strip()]
+unknown = sorted(set(stages) - set(STAGE_NAMES))
+if unknown:
+    parser.error(f"ไม่รู้จักขั้น: {', '.join(unknown)}")
+try:
+    sizes = [synthetic.parse_count(s) for s in args.sizes]
+except ValueError:
+    parser.error(f"ขนาดไม่ถูกต้อง: {args.sizes}")
+
+if args.server:
+    u = urlparse(args.server)
+    if u.hostname not in benchdb.LOCAL_HOSTS:
+        parser.error(f"--server ต้องเป็น server ในเครื่อง ({', '.join(benchdb.LOCAL_HOSTS)}) — ไม่ใช่ {u.hostname}")
+    if args.database in ('land_management', config.db_config()['database']):
+        parser.error(f"--database {args.database} เป็นชื่อ DB ที่ใช้งานจริง — benchmark จะ DROP database นี้")
+else:
+    mysqld = args.mysqld or benchdb.find_binary(('mariadbd', 'mysqld'))
+    if not mysqld:
+        parser.error("ไม่พบ mariadbd/mysqld — ระบุ --mysqld หรือใช้ --server กับ MariaDB ที่รันอยู่แล้ว")
+
+TOOLS_DIR = config.TOOLS_DIR
+
+
+# ============================================================
+# รัน tool เป็น process แยก + วัด peak RSS
+# ============================================================
+def _windows_peak_rss(proc):
+    """PeakWorkingSetSize ของ process ที่จบแล้ว (handle ยังเปิดอยู่จนกว่า Popen ถูกทิ้ง)"""
+    import ctypes
+    from ctypes import wintypes
+
+    class Counters(ctypes.Structure):
+        _fields_ = [('cb', wintypes.DWORD), ('PageFaultCount', wintypes.DWORD)] + [
+            (name, ctypes.c_size_t) for name in (
+                'PeakWorkingSetSize', 'WorkingSetSize', 'QuotaPeakPagedPoolUsage', 'QuotaPagedPoolUsage',
+                'QuotaPeakNonPagedPoolUsage', 'QuotaNonPagedPoolUsage', 'PagefileUsage', 'PeakPagefileUsage')]
+
+    c = Counters()
+    c.cb = ctypes.sizeof(c)
+    if ctypes.windll.psapi.GetProcessMemoryInfo(wintypes.HANDLE(int(proc._handle)), ctypes.byref(c), c.cb):
+        return c.PeakWorkingSetSize
+    return None
+
+
+def run_tool(cmd, env, log_path):
+    """(returncode, วินาที, peak RSS byte หรือ None)"""
+    with open(log_path, 'w', encoding='utf-8') as log:
+        t0 = time.perf_counter()
+        proc = subprocess.Popen(cmd, cwd=TOOLS_DIR, env=env, stdout=log, stderr=subprocess.STDOUT)
+        if hasattr(os, 'wait4'):
+            _, status, usage = os.wait4(proc.pid, 0)
+            elapsed = time.perf_counter() - t0
+            proc.returncode = os.waitstatus_to_exitcode(status)
+            # ru_maxrss: Linux เป็น KB, macOS เป็น byte
+            rss = usage.ru_maxrss * (1 if sys.platform == 'darwin' else 1024)
+        else:
+            proc.wait()
+            elapsed = time.perf_counter() - t0
+            rss = _windows_peak_rss(proc) if sys.platform == 'win32' else None
+    return proc.returncode, elapsed, rss
+
+
+def tail(path, n=15):
+    with open(path, encoding='utf-8', errors='replace') as f:
+        return ''.join(f.readlines()[-n:])
+
+
+def ensure_dataset(n):
+    """synthetic_<ขนาด>.xlsx + shapefile ใน --data-dir — สร้างใหม่ถ้ายังไม่มีหรือ seed ไม่ตรง"""
+    base = os.path.join(args.data_dir, f"synthetic_{synthetic.label_count(n)}")
+    try:
+        with open(base + '.json', encoding='utf-8') as f:
+            manifest = json.load(f)
+        if manifest['seed'] == args.seed and all(os.path.exists(base + e) for e in ('.xlsx', '.shp', '.dbf')):
+            return base, manifest
+    except (OSError, ValueError, KeyError):
+        pass
+    print(f"  สร้างข้อมูลสังเคราะห์ {n:,} แถว ...")
+    subprocess.run([sys.executable, 'gen_synthetic.py', str(n), '--seed', str(args.seed),
+                    '--out-dir', args.data_dir], cwd=TOOLS_DIR, check=True, stdout=subprocess.DEVNULL)
+    with open(base + '.json', encoding='utf-8') as f:
+        return base, json.load(f)
+
+
+# ============================================================
+# Benchmark หนึ่งขนาด
+# ============================================================
+def bench_size(n, host, port, user, password, admin, work_dir):
+    base, manifest = ensure_dataset(n)
+    out_dir = os.path.join(work_dir, f"out_{synthetic.label_count(n)}")
+    os.makedirs(out_dir, exist_ok=True)
+
+    t0 = time.perf_counter()
+    schema = benchdb.load_schema(admin, args.database)
+    print(f"  สร้าง DB ใหม่ ({len(schema)} ไฟล์ SQL) {time.perf_counter() - t0:.2f}s")
+
+    env = dict(os.environ,
+               MYSQL_URL=benchdb.url(host, port, args.database, user, password),
+               LANDMGMT_ENV=os.path.join(work_dir, 'no.env'),     # ไม่อ่าน .env (อาจชี้ไป DB จริง)
+               LANDMGMT_OUT_DIR=out_dir, LANDMGMT_XLSX=base + '.xlsx', LANDMGMT_SHP=base,
+               PYTHONIOENCODING='utf-8')
+    env.pop('LANDMGMT_CACHE', None)     # cache ของ xlsx อยู่ใน out_dir → เริ่มจาก cache ว่างทุกครั้ง
+    plan = os.path.join(out_dir, 'dedupe_plan.json')
+
+    results = []
+    for name, template in STAGES:
+        if name not in stages:
+            continue
+        cmd = [sys.executable] + [a.format(plan=plan) for a in template]
+        if name == 'upsert':
+            cmd += shlex.split(args.upsert_args)
+        log_path = os.path.join(out_dir, f"{name}.log")
+
+        before = benchdb.status(admin)
+        code, seconds, rss = run_tool(cmd, env, log_path)
+        delta = benchdb.status_delta(before, benchdb.status(admin))
+        # upsert/fix_dup จับ exception เองแล้วจบด้วย exit 0 — ดูจาก ❌ ใน output ด้วย
+        with open(log_path, encoding='utf-8', errors='replace') as f:
+            ok = code == 0 and '❌' not in f.read()
+
+        r = {'stage': name, 'command': ' '.join(os.path.basename(a) for a in cmd[1:]), 'ok': ok,
+             'returncode': code, 'seconds': round(seconds, 3), 'rows_per_sec': round(n / seconds, 1),
+             'queries': delta.get('Questions', 0), 'peak_rss_mb': round(rss / 1048576, 1) if rss else None,
+             'status': delta, 'tables': benchdb.table_counts(admin, args.database)}
+        results.append(r)
+        print(f"  {name:<13} {seconds:8.2f}s {r['rows_per_sec']:>11,.0f} แถว/s {r['queries']:>9,} query "
+              f"{r['peak_rss_mb'] or 0:>8,.1f} MB  villagers={r['tables']['villagers']:,} "
+              f"land_plots={r['tables']['land_plots']:,}" + ('' if ok else '  ❌'))
+        if not ok:
+            print(f"    --- {log_path} (ท้าย) ---\n" + tail(log_path))
+            print("    หยุดขั้นที่เหลือของขนาดนี้")
+            break
+    return {'rows': n, 'dataset': os.path.basename(base), 'injected': manifest['stats'], 'stages': results}
+
+
+# ============================================================
+# เทียบ baseline
+# ============================================================
+def compare(results, baseline_path):
+    """คืนรายการ (rows, stage, เดิม, ใหม่, สัดส่วน) ที่แถว/วินาทีลดเกิน --max-regression"""
+    with open(baseline_path, encoding='utf-8') as f:
+        old = {(s['rows'], r['stage']): r for s in json.load(f)['sizes'] for r in s['stages'] if r['ok']}
+    print(f"\n=== เทียบกับ {baseline_path} ===")
+    bad = []
+    for s in results:
+        for r in s['stages']:
+            o = old.get((s['rows'], r['stage']))
+            if not o or not r['ok']:
+                continue
+            ratio = r['rows_per_sec'] / o['rows_per_sec'] if o['rows_per_sec'] else float('inf')
+            flag = ratio < 1 - args.max_regression
+            print(f"  {s['rows']:>9,} {r['stage']:<13} {o['rows_per_sec']:>11,.0f} → {r['rows_per_sec']:>11,.0f} แถว/s "
+                  f"({(ratio - 1) * 100:+.0f}%)  query {o['queries']:,} → {r['queries']:,}"
+                  + ('  ⚠️ REGRESSION' if flag else ''))
+            if flag:
+                bad.append((s['rows'], r['stage'], o['rows_per_sec'], r['rows_per_sec'], ratio))
+    return bad
+
+
+# ============================================================
+# Main
+# ============================================================
+work_dir = args.work_dir or tempfile.mkdtemp(prefix='landmgmt_bench_')
+os.makedirs(work_dir, exist_ok=True)
+print(f"Work dir: {work_dir}")
+
+server = None
+if args.server:
+    host, port = u.hostname, u.port or 3306
+    user, password = u.username or 'root', u.password or ''
+    print(f"Server: {host}:{port} (มีอยู่แล้ว) → database {args.database}")
+else:
+    server = benchdb.TempServer(work_dir, mysqld, keep=args.keep).start()
+    host, port, user, password = server.host, server.port, 'root', ''
+    print(f"Server: {os.path.basename(server.mysqld)} ชั่วคราว {host}:{port}")
+
+results = []
+failed = False
+try:
+    admin = benchdb.connect_admin(host, port, user, password)
+    with admin.cursor() as cur:
+        cur.execute("SELECT VERSION()")
+        version = cur.fetchone()[0]
+    print(f"Version: {version}")
+    for n in sizes:
+        print(f"\n=== {n:,} แถว ===")
+        res = bench_size(n, host, port, user, password, admin, work_dir)
+        results.append(res)
+        failed |= not all(r['ok'] for r in res['stages'])
+    if not args.keep:
+        with admin.cursor() as cur:
+            cur.execute(f"DROP DATABASE IF EXISTS `{args.database}`")
+    admin.close()
+finally:
+    if server is not None:
+        server.stop()
+
+output = {
+    'created': datetime.now().isoformat(timespec='seconds'),
+    'machine': {'platform': platform.platform(), 'python': platform.python_version(),
+                'cpus': os.cpu_count(), 'server': version, 'server_mode': 'existing' if args.server else 'temp'},
+    'args': {'stages': stages, 'seed': args.seed, 'upsert_args': args.upsert_args},
+    'sizes': results,
+}
+with open(args.out, 'w', encoding='utf-8') as f:
+    json.dump(output, f, ensure_ascii=False, indent=2)
+print(f"\nผล: {args.out}")
+
+regressions = compare(results, args.baseline) if args.baseline else []
+
+if args.keep or failed:
+    print(f"log/รายงานของแต่ละขั้น: {work_dir}")
+elif not args.work_dir:
+    shutil.rmtree(work_dir, ignore_errors=True)
+
+if failed or regressions:
+    sys.exit(1)
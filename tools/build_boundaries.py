@@ -0,0 +1,176 @@
+"""
+สร้างขอบเขตแปลงแบบย่อสำหรับแผนที่ จาก shapefile (ทางเลือกแทน data/plots_boundaries.geojson ขนาดเต็ม)
+
+- ย่อ geometry ด้วย Douglas–Peucker แบบรักษา topology (landmgmt/topology.py)
+  ขอบที่แปลงข้างเคียงใช้ร่วมกันถูกย่อครั้งเดียว จึงไม่เกิดช่องว่าง/ทับกันระหว่างแปลง
+- data/plots_boundaries.min.geojson : GeoJSON เดิม (properties เดียวกับ shp_to_geojson.php)
+  พิกัดปัดเหลือ --precision ตำแหน่ง, ไม่มีช่องว่าง — views/map ใช้ไฟล์นี้ถ้ามี
+- data/plots_boundaries.topojson    : TopoJSON — arc ใช้ร่วมกัน, พิกัดเป็นจำนวนเต็ม (--quantize) แบบ delta
+- รายงานขนาด (ดิบ / gzip) และระยะคลาดเคลื่อนสูงสุดจากขอบเดิม (เมตร)
+
+วิธีใช้:
+  python build_boundaries.py                    # tolerance 0.5 ม.
+  python build_boundaries.py --tolerance 1.0    # ย่อมากขึ้น
+"""
+import argparse
+import gzip
+import json
+import os
+import time
+
+from landmgmt import config, polygons, topology
+from landmgmt.geo import np, utm_to_latlng_array
+
+DATA_DIR = os.path.join(config.ROOT_DIR, 'data')
+M_PER_DEG = 111320.0
+
+parser = argparse.ArgumentParser(description="สร้าง plots_boundaries แบบย่อ (GeoJSON + TopoJSON)")
+parser.add_argument('--shp', default=config.SHP_PATH, help="shapefile (ไม่ต้องใส่นามสกุล)")
+parser.add_argument('--tolerance', type=float, default=0.5,
+                    help="ระยะ Douglas–Peucker (เมตร, default 0.5)")
+parser.add_argument('--snap', type=float, default=0.01,
+                    help="grid ที่ snap จุดก่อนหาขอบร่วม (เมตร, default 0.01)")
+parser.add_argument('--precision', type=int, default=6,
+                    help="ทศนิยมของ lat/lng ใน GeoJSON (default 6 ≈ 0.1 ม.)")
+parser.add_argument('--quantize', type=float, default=1e6,
+                    help="จำนวนช่อง grid ต่อแกนของ TopoJSON (default 1e6)")
+parser.add_argument('--source', default=os.path.join(DATA_DIR, 'plots_boundaries.geojson'),
+                    help="GeoJSON ขนาดเต็มที่ใช้เทียบขนาด")
+parser.add_argument('--out-dir', default=DATA_DIR)
+args = parser.parse_args()
+
+
+def compact(obj):
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def size_line(label, data):
+    return f"  {label:<34}{len(data) / 1024:>9,.0f} KB   gzip {len(gzip.compress(data, 6)) / 1024:>7,.0f} KB"
+
+
+def quantize_error_m(exact, rounded):
+    """ระยะ (เมตร โดยประมาณ) ระหว่างพิกัด [lng, lat] ก่อน/หลังปัด"""
+    dlng = (rounded[:, 0] - exact[:, 0]) * M_PER_DEG * np.cos(np.radians(exact[:, 1]))
+    dlat = (rounded[:, 1] - exact[:, 1]) * M_PER_DEG
+    return float(np.hypot(dlng, dlat).max()) if len(exact) else 0.0
+
+
+def arcs_lnglat(arcs):
+    """arc (UTM เมตร) → [lng, lat] แปลงทุกจุดในครั้งเดียว — คืน (พิกัดทุกจุดต่อกัน, list ต่อ arc)"""
+    lengths = [len(a) for a in arcs]
+    allpts = np.concatenate(arcs) if lengths else np.empty((0, 2))
+    lat, lng = utm_to_latlng_array(allpts[:, 0], allpts[:, 1], 47, True)
+    lnglat = np.column_stack((lng, lat))
+    return lnglat, (np.split(lnglat, np.cumsum(lengths)[:-1]) if lengths else [])
+
+
+print("=== Build plots_boundaries (simplified) ===")
+
+# ============================================================
+# อ่าน shapefile
+# ============================================================
+t0 = time.perf_counter()
+props, polys = polygons.read_plot_polygons(args.shp)
+print(f"อ่าน shapefile: {len(polys)} polygons, {sum(len(r) for p in polys for r in p):,} จุด "
+      f"({time.perf_counter() - t0:.2f}s)")
+
+# ============================================================
+# Topology + simplify (UTM เมตร)
+# ============================================================
+t0 = time.perf_counter()
+topo = topology.build(polys, args.snap)
+shared = sum(1 for p in topo.polygons for ring in p for a in ring if a < 0)
+print(f"Topology: {len(topo.arcs)} arcs, {topo.num_points:,} จุด, ใช้ขอบร่วม {shared} ครั้ง "
+      f"(snap {args.snap} ม., ตัด ring ที่เหลือไม่ถึง 3 จุด {topo.dropped_rings})")
+
+refined = topo.simplify(args.tolerance)
+simp_points = sum(len(a) for a in topo.simplified)
+dev_simplify, worst_arc = topo.max_deviation()
+print(f"Simplify: {topo.num_points:,} → {simp_points:,} จุด (tolerance {args.tolerance} ม.; "
+      f"ลด tolerance {refined} arc กัน ring ยุบ) — {time.perf_counter() - t0:.2f}s")
+
+# ============================================================
+# UTM → [lng, lat] ทุก arc ในครั้งเดียว
+# ============================================================
+lnglat, arcs_ll = arcs_lnglat(topo.simplified)
+
+# ============================================================
+# GeoJSON (ปัดทศนิยม)
+# ============================================================
+rounded_arcs = [np.round(a, args.precision) for a in arcs_ll]
+features = []
+for prop, poly in zip(props, topo.polygons):
+    if not poly:
+        continue
+    rings = [topo.ring_coords(ring, rounded_arcs).tolist() for ring in poly]
+    features.append({'type': 'Feature', 'properties': prop,
+                     'geometry': {'type': 'Polygon', 'coordinates': rings}})
+geojson_bytes = compact({'type': 'FeatureCollection', 'features': features})
+dev_geojson = quantize_error_m(lnglat, np.round(lnglat, args.precision))
+
+# ============================================================
+# TopoJSON (quantized + delta-encoded arcs)
+# ============================================================
+q = int(args.quantize)
+x0, y0 = lnglat.min(axis=0) if len(lnglat) else (0.0, 0.0)
+x1, y1 = lnglat.max(axis=0) if len(lnglat) else (1.0, 1.0)
+kx = (x1 - x0) / (q - 1) or 1.0
+ky = (y1 - y0) / (q - 1) or 1.0
+topo_arcs = []
+for a in arcs_ll:
+    g = np.round((a - (x0, y0)) / (kx, ky)).astype(np.int64)
+    d = np.diff(g, axis=0)
+    nz = np.any(d != 0, axis=1)
+    closed = len(g) > 1 and (g[0] == g[-1]).all()
+    if nz.sum() + 1 >= (4 if closed else 2):
+        d = d[nz]
+    topo_arcs.append([g[0].tolist()] + d.tolist())
+geometries = []
+for prop, poly in zip(props, topo.polygons):
+    if poly:
+        geometries.append({'type': 'Polygon', 'arcs': poly, 'properties': prop})
+topojson_bytes = compact({
+    'type': 'Topology',
+    'transform': {'scale': [kx, ky], 'translate': [float(x0), float(y0)]},
+    'objects': {'plots': {'type': 'GeometryCollection', 'geometries': geometries}},
+    'arcs': topo_arcs,
+})
+q_grid = np.round((lnglat - (x0, y0)) / (kx, ky)) * (kx, ky) + (x0, y0)
+dev_topojson = quantize_error_m(lnglat, q_grid)
+
+# ============================================================
+# เขียนไฟล์ + รายงาน
+# ============================================================
+os.makedirs(args.out_dir, exist_ok=True)
+out_geojson = os.path.join(args.out_dir, 'plots_boundaries.min.geojson')
+out_topojson = os.path.join(args.out_dir, 'plots_boundaries.topojson')
+for path, data in ((out_geojson, geojson_bytes), (out_topojson, topojson_bytes)):
+    with open(path + '.tmp', 'wb') as f:
+        f.write(data)
+    os.replace(path + '.tmp', path)
+
+print(f"\nขนาดไฟล์ ({len(features)} features):")
+if os.path.exists(args.source):
+    with open(args.source, 'rb') as f:
+        source_bytes = f.read()
+    print(size_line(os.path.basename(args.source), source_bytes))
+else:
+    source_bytes = None
+# เทียบกับขอบก่อนย่อ — [lng, lat] ปัด --precision ตำแหน่งเท่ากัน
+full_arcs = [np.round(a, args.precision) for a in arcs_lnglat(topo.arcs)[1]]
+full = [{'type': 'Feature', 'properties': prop,
+         'geometry': {'type': 'Polygon', 'coordinates': [topo.ring_coords(r, full_arcs).tolist() for r in poly]}}
+        for prop, poly in zip(props, topo.polygons) if poly]
+print(size_line("(ไม่ย่อ, ไม่มีช่องว่าง — เทียบ)", compact({'type': 'FeatureCollection', 'features': full})))
+print(size_line(os.path.basename(out_geojson), geojson_bytes))
+print(size_line(os.path.basename(out_topojson), topojson_bytes))
+if source_bytes:
+    print(f"  ลดลง: GeoJSON {100 * (1 - len(geojson_bytes) / len(source_bytes)):.1f}%, "
+          f"TopoJSON {100 * (1 - len(topojson_bytes) / len(source_bytes)):.1f}%")
+
+print(f"\nคลาดเคลื่อนสูงสุดจากขอบเดิม:")
+print(f"  simplify + snap:          {dev_simplify:.3f} ม. (arc {worst_arc})")
+print(f"  ปัด {args.precision} ตำแหน่ง (GeoJSON):   {dev_geojson:.3f} ม. → รวมไม่เกิน {dev_simplify + dev_geojson:.3f} ม.")
+print(f"  quantize {q:,} (TopoJSON): {dev_topojson:.3f} ม. → รวมไม่เกิน {dev_simplify + dev_topojson:.3f} ม.")
+print(f"\nบันทึก: {out_geojson}")
+print(f"        {out_topojson}")
@@ -0,0 +1,288 @@
+"""
+สร้าง vector tile แบบ static (MVT/PBF) z/x/y สำหรับขอบเขตแปลง + ขอบเขตอุทยาน
+ทางเลือกแทนการส่ง plots_boundaries.geojson + erawan_boundary.geojson ทั้งไฟล์ให้ browser —
+แผนที่โหลดเฉพาะ tile ที่อยู่ในจอ
+
+- layer "plots" จาก shapefile (หรือ GeoJSON ถ้าให้ --plots เป็น .geojson), layer "park" จาก erawan_boundary.geojson
+- ย่อ geometry แยกทุก zoom แบบรักษา topology (landmgmt/topology.py) ในพิกัด Web Mercator
+  tolerance = --simplify หน่วย tile (1 หน่วย = 1/4096 ของความกว้าง tile) — zoom ต่ำย่อมาก, zoom สูงแทบไม่ย่อ
+- ตัด geometry ตามขอบ tile (เผื่อขอบ 64 หน่วย) แล้ว encode เป็น MVT v2 (landmgmt/mvt.py)
+- เขียน data/tiles/{z}/{x}/{y}.pbf (เฉพาะ tile ที่มีข้อมูล) + data/tiles/metadata.json (TileJSON)
+- --bench: จำลองการเลื่อนแผนที่ (viewport 1280×800) แล้วเทียบจำนวน byte ที่ต้องโหลดกับ GeoJSON ทั้งไฟล์
+
+วิธีใช้:
+  python build_tiles.py                        # zoom 10–16
+  python build_tiles.py --minzoom 12 --maxzoom 17
+  python build_tiles.py --bench                # สร้าง + benchmark
+"""
+import argparse
+import gzip
+import json
+import os
+import shutil
+import time
+
+from landmgmt import config, mvt, polygons, topology
+from landmgmt.geo import np, utm_to_latlng_array
+
+DATA_DIR = os.path.join(config.ROOT_DIR, 'data')
+PLOT_TILE_PROPS = ('plot_code', 'owner', 'area_rai', 'area_ngan', 'ban_type', 'ptype')
+
+parser = argparse.ArgumentParser(description="สร้าง vector tile (MVT) ของขอบเขตแปลง + อุทยาน")
+parser.add_argument('--plots', default=config.SHP_PATH,
+                    help="shapefile (ไม่ต้องใส่นามสกุล) หรือไฟล์ .geojson ของแปลง")
+parser.add_argument('--park', default=os.path.join(DATA_DIR, 'erawan_boundary.geojson'),
+                    help="GeoJSON ขอบเขตอุทยาน")
+parser.add_argument('--minzoom', type=int, default=10)
+parser.add_argument('--maxzoom', type=int, default=16)
+parser.add_argument('--simplify', type=float, default=1.0,
+                    help="tolerance ของ Douglas–Peucker หน่วย tile (default 1 = 1/4096 ของ tile)")
+parser.add_argument('--out-dir', default=os.path.join(DATA_DIR, 'tiles'))
+parser.add_argument('--bench', action='store_true', help="benchmark byte ที่โหลดเมื่อเลื่อนแผนที่")
+parser.add_argument('--bench-zooms', default='13,14,15,16', help="zoom ที่ใช้ benchmark (default 13,14,15,16)")
+args = parser.parse_args()
+
+if not 0 <= args.minzoom <= args.maxzoom <= 22:
+    parser.error("ต้องเป็น 0 <= --minzoom <= --maxzoom <= 22")
+
+
+def read_geojson_polygons(path):
+    """(properties, polygons [lng, lat]) — MultiPolygon แยกเป็นหลาย polygon ที่ใช้ properties เดียวกัน"""
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+    props, polys = [], []
+    for feat in data.get('features', []):
+        geom = feat.get('geometry') or {}
+        if geom.get('type') == 'Polygon':
+            parts = [geom['coordinates']]
+        elif geom.get('type') == 'MultiPolygon':
+            parts = geom['coordinates']
+        else:
+            continue
+        for rings in parts:
+            rings = [np.asarray(r, dtype=np.float64)[:, :2] for r in rings if len(r)]
+            if rings:
+                props.append(feat.get('properties') or {})
+                polys.append(rings)
+    return props, polys
+
+
+def to_mercator(polys, utm=False):
+    """แปลงทุก ring ในครั้งเดียว — utm=True: input เป็น UTM 47N, ไม่งั้น [lng, lat]"""
+    lengths = [len(r) for p in polys for r in p]
+    if not lengths:
+        return polys
+    pts = np.concatenate([r for p in polys for r in p])
+    if utm:
+        lat, lng = utm_to_latlng_array(pts[:, 0], pts[:, 1], 47, True)
+        pts = np.column_stack((lng, lat))
+    merc = iter(np.split(mvt.lnglat_to_mercator(pts), np.cumsum(lengths)[:-1]))
+    return [[next(merc) for _ in p] for p in polys]
+
+
+def fmt_kb(n):
+    return f"{n / 1024:,.1f} KB"
+
+
+print("=== Build vector tiles (MVT) ===")
+
+# ============================================================
+# อ่านข้อมูล + Topology (Web Mercator เมตร)
+# ============================================================
+t0 = time.perf_counter()
+if args.plots.lower().endswith('.geojson'):
+    plot_props, plot_polys = read_geojson_polygons(args.plots)
+    plot_polys = to_mercator(plot_polys)
+else:
+    plot_props, plot_polys = polygons.read_plot_polygons(args.plots)
+    plot_polys = to_mercator(plot_polys, utm=True)
+plot_props = [{k: p.get(k) for k in PLOT_TILE_PROPS} for p in plot_props]
+
+sources = [('plots', plot_props, plot_polys)]
+if os.path.exists(args.park):
+    park_props, park_polys = read_geojson_polygons(args.park)
+    sources.append(('park', park_props, to_mercator(park_polys)))
+else:
+    print(f"⚠️  ไม่พบ {args.park} — ข้าม layer park")
+
+# ขอบเขต + จุดกึ่งกลาง (median ของกึ่งกลางแต่ละแปลง) ของแปลง — ใช้ใน metadata และ benchmark
+plot_centers = np.array([(r.min(axis=0) + r.max(axis=0)) / 2 for p in plot_polys for r in p[:1]])
+all_pts = np.concatenate([r for p in plot_polys for r in p]) if plot_polys else None
+all_bounds = (*all_pts.min(axis=0), *all_pts.max(axis=0)) if all_pts is not None else None
+
+layers = []     # [(ชื่อ layer, properties, Topology)]
+for name, props, polys in sources:
+    topo = topology.build(polys, snap=0.01)
+    layers.append((name, props, topo))
+    print(f"  {name:<6} {len(polys):>5} polygons, {topo.num_points:>8,} จุด, {len(topo.arcs):,} arcs")
+print(f"อ่าน + topology: {time.perf_counter() - t0:.2f}s")
+
+# ============================================================
+# สร้าง tile ทีละ zoom
+# ============================================================
+tmp_dir = args.out_dir.rstrip('/\\') + '.tmp'
+if os.path.exists(tmp_dir):
+    shutil.rmtree(tmp_dir)
+
+lo, hi = -mvt.BUFFER, mvt.EXTENT + mvt.BUFFER
+zoom_stats = []
+print(f"\n{'zoom':>4} {'tol (ม.)':>9} {'จุด':>9} {'tiles':>7} {'ขนาดรวม':>12} {'ใหญ่สุด':>10}  เวลา")
+for z in range(args.minzoom, args.maxzoom + 1):
+    tz = time.perf_counter()
+    tolerance = mvt.tile_size(z) / mvt.EXTENT * args.simplify
+    tiles = {}      # (x, y) -> {ชื่อ layer: mvt.Layer}
+    points = 0
+    for name, props, topo in layers:
+        topo.simplify(tolerance)
+        points += sum(len(a) for a in topo.simplified)
+        for fid, (prop, poly) in enumerate(zip(props, topo.polygons), start=1):
+            if not poly:
+                continue
+            rings = [topo.ring_coords(ring)[:-1] for ring in poly]
+            mn, mx = rings[0].min(axis=0), rings[0].max(axis=0)
+            bbox = (mn[0], mn[1], mx[0], mx[1])
+            pad = mvt.tile_size(z) * mvt.BUFFER / mvt.EXTENT
+            for x, y in mvt.tiles_covering((bbox[0] - pad, bbox[1] - pad, bbox[2] + pad, bbox[3] + pad), z):
+                out = []
+                for i, ring in enumerate(rings):
+                    t = mvt.to_tile_coords(ring, z, x, y)
+                    if t.min() < lo or t.max() > hi:
+                        t = mvt.clip_ring(t, lo, hi)
+                    q = mvt.quantize_ring(t, exterior=(i == 0))
+                    if q is None and i == 0:
+                        break       # ring นอกหายไป (อยู่นอก tile หรือเล็กกว่า 1 หน่วย) — ข้ามทั้ง feature
+                    if q is not None:
+                        out.append(q)
+                if out:
+                    layer = tiles.setdefault((x, y), {}).setdefault(name, mvt.Layer(name))
+                    layer.add_polygon(fid, out, prop)
+
+    sizes = []
+    for (x, y), tile_layers in tiles.items():
+        data = mvt.encode_tile([tile_layers[n] for n, _, _ in layers if n in tile_layers])
+        if not data:
+            continue
+        path = os.path.join(tmp_dir, str(z), str(x))
+        os.makedirs(path, exist_ok=True)
+        with open(os.path.join(path, f"{y}.pbf"), 'wb') as f:
+            f.write(data)
+        sizes.append(len(data))
+    zoom_stats.append({'zoom': z, 'tiles': len(sizes), 'bytes': sum(sizes), 'max_tile': max(sizes, default=0)})
+    print(f"{z:>4} {tolerance:>9.2f} {points:>9,} {len(sizes):>7,} {fmt_kb(sum(sizes)):>12} "
+          f"{fmt_kb(max(sizes, default=0)):>10}  {time.perf_counter() - tz:.2f}s")
+
+# ============================================================
+# metadata (TileJSON) + สลับ directory
+# ============================================================
+def mercator_to_lnglat(x, y):
+    lng = np.degrees(x / mvt.EARTH_RADIUS)
+    lat = np.degrees(2 * np.arctan(np.exp(y / mvt.EARTH_RADIUS)) - np.pi / 2)
+    return float(lng), float(lat)
+
+
+bounds = None
+if all_bounds is not None:
+    bounds = [round(v, 6) for v in mercator_to_lnglat(all_bounds[0], all_bounds[1])
+              + mercator_to_lnglat(all_bounds[2], all_bounds[3])]
+metadata = {
+    'tilejson': '2.2.0',
+    'name': 'land plots',
+    'format': 'pbf',
+    'scheme': 'xyz',
+    'tiles': ['data/tiles/{z}/{x}/{y}.pbf'],
+    'minzoom': args.minzoom,
+    'maxzoom': args.maxzoom,
+    'bounds': bounds,
+    'center': [round((bounds[0] + bounds[2]) / 2, 6), round((bounds[1] + bounds[3]) / 2, 6),
+               args.minzoom + 3] if bounds else None,
+    'vector_layers': [
+        {'id': 'plots', 'fields': {k: 'String' if k in ('plot_code', 'owner', 'ptype') else 'Number'
+                                   for k in PLOT_TILE_PROPS}},
+        {'id': 'park', 'fields': {}},
+    ],
+    'extent': mvt.EXTENT,
+    'simplify': args.simplify,
+}
+os.makedirs(tmp_dir, exist_ok=True)
+with open(os.path.join(tmp_dir, 'metadata.json'), 'w', encoding='utf-8') as f:
+    json.dump(metadata, f, ensure_ascii=False, indent=2)
+
+if os.path.exists(args.out_dir):
+    if not os.path.exists(os.path.join(args.out_dir, 'metadata.json')):
+        raise SystemExit(f"❌ {args.out_dir} มีอยู่แล้วแต่ไม่ใช่ directory ของ build_tiles.py — ไม่ลบให้")
+    shutil.rmtree(args.out_dir)
+os.replace(tmp_dir, args.out_dir)
+
+total_tiles = sum(s['tiles'] for s in zoom_stats)
+total_bytes = sum(s['bytes'] for s in zoom_stats)
+print(f"\n✅ {total_tiles:,} tiles, {fmt_kb(total_bytes)} → {args.out_dir}")
+
+# ============================================================
+# Benchmark: byte ที่โหลดเมื่อเลื่อนแผนที่
+# ============================================================
+if not args.bench:
+    raise SystemExit(0)
+
+VIEW_W, VIEW_H, TILE_PX = 1280, 800, 256
+# เลื่อนทีละครึ่งจอ: ขวา 2, ลง 2, ซ้าย 3, ขึ้น 2, ขวา 1 (วนกลับใกล้จุดเริ่ม)
+PANS = [(1, 0), (1, 0), (0, 1), (0, 1), (-1, 0), (-1, 0), (-1, 0), (0, -1), (0, -1), (1, 0)]
+
+
+def view_tiles(cx, cy, z):
+    """tile ที่อยู่ในจอ — cx, cy เป็น pixel ของทั้งโลกที่ zoom z"""
+    n = 1 << z
+    x0, x1 = int((cx - VIEW_W / 2) // TILE_PX), int((cx + VIEW_W / 2) // TILE_PX)
+    y0, y1 = int((cy - VIEW_H / 2) // TILE_PX), int((cy + VIEW_H / 2) // TILE_PX)
+    return {(x, y) for x in range(max(0, x0), min(n - 1, x1) + 1) for y in range(max(0, y0), min(n - 1, y1) + 1)}
+
+
+def tile_bytes(z, x, y, cache={}):
+    """(ดิบ, gzip) ของ tile — tile ที่ไม่มีไฟล์ = 404 (0 byte)"""
+    key = (z, x, y)
+    if key not in cache:
+        path = os.path.join(args.out_dir, str(z), str(x), f"{y}.pbf")
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                data = f.read()
+            cache[key] = (len(data), len(gzip.compress(data, 6)))
+        else:
+            cache[key] = None
+    return cache[key]
+
+
+geojson_files = [os.path.join(DATA_DIR, 'plots_boundaries.min.geojson'), args.park]
+if not os.path.exists(geojson_files[0]):
+    geojson_files[0] = os.path.join(DATA_DIR, 'plots_boundaries.geojson')
+gj_raw = gj_gz = 0
+for path in geojson_files:
+    if os.path.exists(path):
+        with open(path, 'rb') as f:
+            data = f.read()
+        gj_raw += len(data)
+        gj_gz += len(gzip.compress(data, 6))
+
+print(f"\n=== Benchmark: viewport {VIEW_W}×{VIEW_H}, เลื่อนครึ่งจอ {len(PANS)} ครั้ง จากกึ่งกลางกลุ่มแปลง ===")
+print(f"GeoJSON ทั้งไฟล์ ({', '.join(os.path.basename(p) for p in geojson_files if os.path.exists(p))}): "
+      f"{fmt_kb(gj_raw)}, gzip {fmt_kb(gj_gz)} — โหลดครั้งเดียวตอนเปิดหน้า")
+print(f"\n{'zoom':>4} {'เปิดหน้า: req':>14} {'ดิบ':>11} {'gzip':>11}   "
+      f"{'หลังเลื่อน: req':>16} {'ดิบ':>11} {'gzip':>11}  {'gzip เทียบ GeoJSON':>18}")
+mx, my = np.median(plot_centers, axis=0)
+for z in [int(v) for v in args.bench_zooms.split(',') if v.strip()]:
+    if not args.minzoom <= z <= args.maxzoom:
+        print(f"{z:>4}  (อยู่นอกช่วง zoom ที่สร้าง — ข้าม)")
+        continue
+    scale = TILE_PX * (1 << z) / (2 * mvt.ORIGIN_SHIFT)
+    cx, cy = (mx + mvt.ORIGIN_SHIFT) * scale, (mvt.ORIGIN_SHIFT - my) * scale
+    fetched = set()
+    rows = []
+    for dx, dy in [(0, 0)] + PANS:
+        cx += dx * VIEW_W / 2
+        cy += dy * VIEW_H / 2
+        fetched |= view_tiles(cx, cy, z)
+        sizes = [tile_bytes(z, x, y) for x, y in fetched]
+        sizes = [s for s in sizes if s]
+        rows.append((len(fetched), sum(s[0] for s in sizes), sum(s[1] for s in sizes)))
+    (r0, b0, g0), (r1, b1, g1) = rows[0], rows[-1]
+    print(f"{z:>4} {r0:>14} {fmt_kb(b0):>11} {fmt_kb(g0):>11}   {r1:>16} {fmt_kb(b1):>11} {fmt_kb(g1):>11}  "
+          f"{100 * g1 / gj_gz if gj_gz else 0:>17.1f}%")
+print("\n(req = จำนวน request รวม tile ว่างที่ได้ 404; browser cache tile ที่โหลดแล้ว — นับครั้งเดียว)")
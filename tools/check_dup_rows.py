@@ -1,30 +1,7 @@
 """Check for duplicate rows in land_plots (same villager + same data, different plot_code)"""
-import pymysql
-from urllib.parse import urlparse
-import os
+from landmgmt import db
 
-ENV_PATH = r"c:\Users\Administrator\OneDrive\000_Ai Project\PHP_SQL\.env"
-def read_env(path):
-    env = {}
-    if not os.path.exists(path): return env
-    with open(path, encoding='utf-8') as f:
-        for line in f:
-            line = line.strip()
-            if not line or line.startswith('#'): continue
-            if '=' in line:
-                k, v = line.split('=', 1)
-                env[k.strip()] = v.strip()
-    return env
-
-env = read_env(ENV_PATH)
-mysql_url = env.get('MYSQL_URL', '')
-p = urlparse(mysql_url)
-conn = pymysql.connect(
-    host=p.hostname or '127.0.0.1', port=p.port or 3306,
-    user=p.username or 'root', password=p.password or '',
-    database=(p.path or '/land_management').lstrip('/'),
-    charset='utf8mb4', connect_timeout=10
-)
+conn = db.get_connection()
 cur = conn.cursor()
 
 # 1. Check specific IDs from screenshot
@@ -78,4 +55,4 @@ if len(dup_groups) > 20:
     print(f"... and {len(dup_groups) - 20} more groups")
 
 cur.close()
-conn.close()
+db.close()
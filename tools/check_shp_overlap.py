@@ -0,0 +1,233 @@
+"""
+ตรวจ geometry ของแปลงใน shapefile เชิงพื้นที่ (เสริม check_shp_dup.py ที่ดูแค่ SPAR_CODE + NUM_APAR)
+
+- แปลงซ้อนทับกัน: หาคู่ที่ bbox ทับกันด้วย R-tree แบบ STR (landmgmt/rtree.py) แทนการเทียบทุกคู่
+  แล้วคำนวณพื้นที่ส่วนที่ทับแบบตรงตัว (landmgmt/planar.py) — แปลงข้างเคียงที่แค่ใช้ขอบร่วมกันได้ 0
+    ซ้ำ      ทับ >= --dup-ratio ของแปลงที่เล็กกว่า (digitize ซ้ำ)
+    ทับกัน   ทับ >= --sliver-ratio ของแปลงที่เล็กกว่า
+    เศษขอบ   ทับน้อยกว่านั้น แต่มากกว่า --min-overlap ตร.ม. (ขอบของแปลงข้างเคียงไม่ตรงกัน)
+- แปลงรูปร่างผิดปกติ: พื้นที่ < --min-area ตร.ม. หรือแถบยาวบาง (4πA/P² < --thinness)
+- แปลงที่อยู่นอกเขตอุทยาน (erawan_boundary.geojson) ทั้งแปลงหรือบางส่วน
+  เฉพาะแปลงที่ bbox ทับขอบอุทยาน (R-tree ของขอบ) ที่ต้องคำนวณพื้นที่ — ที่เหลือเช็คจุดเดียวพอ
+
+วิธีใช้:
+  python check_shp_overlap.py
+  python check_shp_overlap.py --min-overlap 5 --limit 100
+"""
+import argparse
+import os
+import time
+
+from landmgmt import config, planar, polygons, rtree, shp
+from landmgmt.geo import np, utm_to_latlng_array
+
+RAI_M2 = 1600.0
+
+parser = argparse.ArgumentParser(description="ตรวจแปลงซ้อนทับ / เศษขอบ / อยู่นอกเขตอุทยาน จาก shapefile")
+parser.add_argument('--shp', default=config.SHP_PATH, help="shapefile (ไม่ต้องใส่นามสกุล)")
+parser.add_argument('--park', default=os.path.join(config.ROOT_DIR, 'data', 'erawan_boundary.geojson'),
+                    help="GeoJSON ขอบเขตอุทยาน")
+parser.add_argument('--min-overlap', type=float, default=1.0,
+                    help="พื้นที่ทับขั้นต่ำที่รายงาน (ตร.ม., default 1)")
+parser.add_argument('--sliver-ratio', type=float, default=0.05,
+                    help="ทับน้อยกว่าสัดส่วนนี้ของแปลงที่เล็กกว่า = เศษขอบ (default 0.05)")
+parser.add_argument('--dup-ratio', type=float, default=0.95,
+                    help="ทับตั้งแต่สัดส่วนนี้ของแปลงที่เล็กกว่า = digitize ซ้ำ (default 0.95)")
+parser.add_argument('--min-area', type=float, default=10.0,
+                    help="แปลงเล็กกว่านี้ (ตร.ม.) ถือว่าผิดปกติ (default 10)")
+parser.add_argument('--thinness', type=float, default=0.05,
+                    help="4πA/P² ต่ำกว่านี้ = แถบยาวบาง (default 0.05)")
+parser.add_argument('--limit', type=int, default=30, help="จำนวนรายการที่แสดงต่อหัวข้อ (default 30)")
+args = parser.parse_args()
+
+
+def label(p):
+    return f"FID={p['fid']}  SPAR={p['spar'] or '-'}  NUM_APAR={p['numapar'] or '-'}  shp_row={p['idx']}"
+
+
+def fmt_area(m2):
+    return f"{m2:,.1f} ตร.ม. ({m2 / RAI_M2:,.2f} ไร่)"
+
+
+def show(items, fmt):
+    for item in items[:args.limit]:
+        print(fmt(item))
+    if len(items) > args.limit:
+        print(f"  ... อีก {len(items) - args.limit} รายการ (--limit)")
+
+
+# ============================================================
+# อ่าน shapefile
+# ============================================================
+print("Loading shapefile...")
+t0 = time.perf_counter()
+_, records = shp.iter_layer(args.shp, ('SPAR_CODE', 'NUM_APAR', 'FID'))
+plots = []
+no_geom = 0
+for i, rec, shape in records:
+    if shape.shapeType not in polygons.POLYGON_TYPES or not shape.points:
+        no_geom += 1
+        continue
+    pts = np.asarray(shape.points, dtype=np.float64)
+    bounds = list(shape.parts) + [len(pts)]
+    rings = planar.orient([pts[a:b] for a, b in zip(bounds, bounds[1:])])
+    if not rings:
+        no_geom += 1
+        continue
+    allpts = np.concatenate(rings)
+    plots.append({'idx': i, 'fid': rec.get('FID', str(i)), 'spar': rec.get('SPAR_CODE', ''),
+                  'numapar': rec.get('NUM_APAR', ''), 'rings': rings,
+                  'bbox': (*allpts.min(axis=0), *allpts.max(axis=0)),
+                  'area': planar.area(rings), 'thinness': planar.thinness(rings)})
+n = len(plots)
+print(f"Polygons: {n} (ข้าม {no_geom} record ที่ไม่มี geometry) — {time.perf_counter() - t0:.2f}s")
+
+# ============================================================
+# แปลงซ้อนทับ (R-tree → พื้นที่ทับจริง)
+# ============================================================
+t0 = time.perf_counter()
+tree = rtree.STRTree([p['bbox'] for p in plots])
+t_tree = time.perf_counter() - t0
+
+t0 = time.perf_counter()
+candidates = 0
+touching = 0
+dups, overlaps, slivers = [], [], []
+for i, j in tree.pairs():
+    candidates += 1
+    a, b = plots[i], plots[j]
+    inter = planar.intersection_area(a['rings'], b['rings'])
+    if inter < args.min_overlap:
+        touching += 1
+        continue
+    ratio = inter / max(min(a['area'], b['area']), 1e-9)
+    item = (a, b, inter, ratio)
+    if ratio >= args.dup_ratio:
+        dups.append(item)
+    elif ratio >= args.sliver_ratio:
+        overlaps.append(item)
+    else:
+        slivers.append(item)
+t_pairs = time.perf_counter() - t0
+for group in (dups, overlaps, slivers):
+    group.sort(key=lambda it: -it[2])
+
+# ============================================================
+# รูปร่างผิดปกติ
+# ============================================================
+tiny = sorted((p for p in plots if p['area'] < args.min_area), key=lambda p: p['area'])
+thin = sorted((p for p in plots if p['area'] >= args.min_area and p['thinness'] < args.thinness),
+              key=lambda p: p['thinness'])
+
+# ============================================================
+# นอกเขตอุทยาน (lng/lat)
+# ============================================================
+outside, partial = [], []
+park_note = None
+t_park = 0.0
+if os.path.exists(args.park):
+    import json
+    t0 = time.perf_counter()
+    with open(args.park, encoding='utf-8') as f:
+        park_geojson = json.load(f)
+    park = []       # [[ring [lng, lat], ...] ต่อ polygon]
+    for feat in park_geojson.get('features', []):
+        geom = feat.get('geometry') or {}
+        parts = [geom['coordinates']] if geom.get('type') == 'Polygon' else \
+            geom['coordinates'] if geom.get('type') == 'MultiPolygon' else []
+        park += [planar.orient([np.asarray(r, dtype=np.float64)[:, :2] for r in rings]) for rings in parts]
+    park_rings = [r for poly in park for r in poly]
+
+    # ขอบอุทยานทุกเส้นเป็นกล่องใน R-tree
+    ea = np.concatenate(park_rings)
+    eb = np.concatenate([np.roll(r, -1, axis=0) for r in park_rings])
+    edge_tree = rtree.STRTree(np.column_stack((np.minimum(ea, eb), np.maximum(ea, eb))))
+
+    # UTM → lng/lat ทุกจุดในครั้งเดียว
+    lengths = [len(r) for p in plots for r in p['rings']]
+    allpts = np.concatenate([r for p in plots for r in p['rings']])
+    lat, lng = utm_to_latlng_array(allpts[:, 0], allpts[:, 1], 47, True)
+    ll_rings = iter(np.split(np.column_stack((lng, lat)), np.cumsum(lengths)[:-1]))
+
+    crossing = 0
+    for p in plots:
+        rings_ll = [next(ll_rings) for _ in p['rings']]
+        pts = np.concatenate(rings_ll)
+        box = (*pts.min(axis=0), *pts.max(axis=0))
+        if not edge_tree.query(box):
+            # ไม่แตะขอบอุทยาน → ทั้งแปลงอยู่ข้างเดียวกัน เช็คจุดเดียวพอ
+            if not any(planar.points_in_rings(pts[:1], poly)[0] for poly in park):
+                outside.append((p, 0.0))
+            continue
+        crossing += 1
+        inside = sum(planar.intersection_area(rings_ll, poly) for poly in park)
+        frac = inside / planar.area(rings_ll)
+        if frac <= 1e-6:
+            outside.append((p, 0.0))
+        elif frac < 1 - 1e-6:
+            partial.append((p, frac))
+    partial.sort(key=lambda it: it[1])
+    t_park = time.perf_counter() - t0
+    park_note = (f"ขอบอุทยาน {len(ea):,} เส้น, แปลงที่ bbox แตะขอบ {crossing} แปลง "
+                 f"(คำนวณพื้นที่เฉพาะแปลงเหล่านี้) — {t_park:.2f}s")
+
+# ============================================================
+# Report
+# ============================================================
+all_pairs = n * (n - 1) // 2
+print(f"R-tree: {n} กล่อง, สูง {tree.height} ชั้น, node ละ {tree.capacity} — สร้าง {t_tree * 1000:.1f} ms")
+print(f"คู่ที่ bbox ทับกัน: {candidates:,} จากทั้งหมด {all_pairs:,} คู่ "
+      f"({100 * candidates / all_pairs if all_pairs else 0:.2f}%) — คำนวณพื้นที่ทับ {t_pairs:.2f}s")
+if park_note:
+    print(park_note)
+
+print(f"\n{'='*70}")
+print(f"  ผลตรวจ geometry เชิงพื้นที่ของแปลงใน Shapefile")
+print(f"{'='*70}")
+print(f"\n  แปลงซ้ำ (ทับ >= {args.dup_ratio:.0%}):           {len(dups)} คู่")
+print(f"  แปลงทับกัน (>= {args.sliver_ratio:.0%}):              {len(overlaps)} คู่")
+print(f"  เศษขอบทับกัน (< {args.sliver_ratio:.0%}, >= {args.min_overlap:g} ตร.ม.): {len(slivers)} คู่")
+print(f"  แปลงที่ bbox ทับแต่ไม่ทับจริง / แค่แตะขอบ:  {touching} คู่")
+print(f"  แปลงเล็กผิดปกติ (< {args.min_area:g} ตร.ม.):       {len(tiny)} แปลง")
+print(f"  แปลงแถบยาวบาง (4πA/P² < {args.thinness:g}):     {len(thin)} แปลง")
+if park_note:
+    print(f"  นอกเขตอุทยานทั้งแปลง:                  {len(outside)} แปลง")
+    print(f"  คร่อมขอบเขตอุทยาน:                      {len(partial)} แปลง")
+else:
+    print(f"  (ไม่พบ {args.park} — ข้ามการตรวจขอบเขตอุทยาน)")
+
+
+def pair_line(it):
+    a, b, inter, ratio = it
+    same = "  [SPAR_CODE เดียวกัน]" if a['spar'] and a['spar'] == b['spar'] else ""
+    return (f"\n  ทับ {fmt_area(inter)} = {ratio:.1%} ของแปลงที่เล็กกว่า{same}\n"
+            f"    {label(a)}  area={fmt_area(a['area'])}\n"
+            f"    {label(b)}  area={fmt_area(b['area'])}")
+
+
+sections = [
+    (dups, f"🔁 แปลงซ้ำ — geometry ทับกันเกือบทั้งแปลง ({len(dups)} คู่)", pair_line),
+    (overlaps, f"⚠️ แปลงทับกัน ({len(overlaps)} คู่)", pair_line),
+    (slivers, f"✂️ เศษขอบทับกัน — ขอบแปลงข้างเคียงไม่ตรงกัน ({len(slivers)} คู่)", pair_line),
+    (tiny, f"🔍 แปลงเล็กผิดปกติ ({len(tiny)} แปลง)",
+     lambda p: f"  {label(p)}  area={fmt_area(p['area'])}"),
+    (thin, f"📏 แปลงแถบยาวบาง ({len(thin)} แปลง)",
+     lambda p: f"  {label(p)}  area={fmt_area(p['area'])}  4πA/P²={p['thinness']:.3f}"),
+    (outside, f"🚫 นอกเขตอุทยานทั้งแปลง ({len(outside)} แปลง)",
+     lambda it: f"  {label(it[0])}  area={fmt_area(it[0]['area'])}"),
+    (partial, f"↔️ คร่อมขอบเขตอุทยาน ({len(partial)} แปลง)",
+     lambda it: f"  {label(it[0])}  อยู่ในเขต {it[1]:.1%}  area={fmt_area(it[0]['area'])}"),
+]
+for items, title, fmt in sections:
+    if not items:
+        continue
+    print(f"\n{'─'*70}")
+    print(f"  {title}")
+    print(f"{'─'*70}")
+    show(items, fmt)
+
+if not any(items for items, _, _ in sections):
+    print(f"\n  ✅ ไม่พบปัญหาเชิงพื้นที่")
+
+print(f"\n{'='*70}")
+print("Done!")
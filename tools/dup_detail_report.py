@@ -4,69 +4,19 @@
   A) ซ้ำจริง (SPAR_CODE + NUM_APAR เหมือนกัน) → ควรลบ DUP ทิ้ง
   B) แปลงต่างกัน (SPAR_CODE เดียวกัน แต่ NUM_APAR ต่างกัน) → ควรเปลี่ยน plot_code
 """
-import pymysql
-import os
-from urllib.parse import urlparse
-
-ENV_PATH = r"c:\Users\Administrator\OneDrive\000_Ai Project\PHP_SQL\.env"
-REPORT = r"c:\Users\Administrator\OneDrive\000_Ai Project\PHP_SQL\tools\dup_detail_report.txt"
-
-def read_env(path):
-    env = {}
-    if not os.path.exists(path): return env
-    with open(path, encoding='utf-8') as f:
-        for line in f:
-            line = line.strip()
-            if not line or line.startswith('#'): continue
-            if '=' in line:
-                k, v = line.split('=', 1)
-                env[k.strip()] = v.strip()
-    return env
-
-env = read_env(ENV_PATH)
-mysql_url = env.get('MYSQL_URL', '')
-p = urlparse(mysql_url)
-conn = pymysql.connect(
-    host=p.hostname or '127.0.0.1', port=p.port or 3306,
-    user=p.username or 'root', password=p.password or '',
-    database=(p.path or '/land_management').lstrip('/'),
-    charset='utf8mb4', connect_timeout=10
-)
-cur = conn.cursor(pymysql.cursors.DictCursor)
-
-# Get all DUP plots
-cur.execute("""
-    SELECT lp.plot_id, lp.plot_code, lp.spar_code, lp.num_apar, lp.apar_no,
-           lp.area_rai, lp.area_ngan, lp.area_sqwa, lp.ptype,
-           v.id_card_number, v.prefix, v.first_name, v.last_name
-    FROM land_plots lp
-    LEFT JOIN villagers v ON lp.villager_id = v.villager_id
-    WHERE lp.plot_code LIKE '%%_DUP%%'
-    ORDER BY lp.spar_code, lp.num_apar
-""")
-dup_plots = cur.fetchall()
-
-# For each DUP, find its original (same spar_code, no _DUP)
+from landmgmt import config, db, dedupe
+
+REPORT = config.tool_path('dup_detail_report.txt')
+
+
+# DUP ทั้งหมด + original ของแต่ละ SPAR_CODE (2 query, จับคู่ใน memory — ดู landmgmt/dedupe.py)
+pairs = dedupe.fetch_dup_pairs()
+
 group_a = []  # true duplicates
 group_b = []  # different plots
 
-for dp in dup_plots:
-    spar = dp['spar_code']
-    num = dp['num_apar']
-
-    # Find original
-    cur.execute("""
-        SELECT lp.plot_id, lp.plot_code, lp.num_apar, lp.apar_no,
-               lp.area_rai, lp.area_ngan, lp.area_sqwa, lp.ptype,
-               v.id_card_number, v.first_name, v.last_name
-        FROM land_plots lp
-        LEFT JOIN villagers v ON lp.villager_id = v.villager_id
-        WHERE lp.spar_code = %s AND lp.plot_code NOT LIKE '%%_DUP%%'
-        LIMIT 1
-    """, (spar,))
-    orig = cur.fetchone()
-
-    if orig and orig['num_apar'] == num:
+for dp, orig in pairs:
+    if orig and orig['num_apar'] == dp['num_apar']:
         # Same NUM_APAR = true duplicate
         group_a.append({'dup': dp, 'orig': orig})
     else:
@@ -82,7 +32,7 @@ rpt("=" * 72)
 rpt("  รายงานรายละเอียด DUP plots")
 rpt(f"  วันที่: {__import__('datetime').datetime.now().strftime('%Y-%m-%d %H:%M')}")
 rpt("=" * 72)
-rpt(f"\n  DUP plots ทั้งหมด: {len(dup_plots)}")
+rpt(f"\n  DUP plots ทั้งหมด: {len(pairs)}")
 rpt(f"  กลุ่ม A (ซ้ำจริง → ลบ DUP):         {len(group_a)}")
 rpt(f"  กลุ่ม B (แปลงต่างกัน → แก้ plot_code): {len(group_b)}")
 
@@ -143,8 +93,7 @@ for item in group_b:
 
 rpt(f"\n{'='*72}")
 
-cur.close()
-conn.close()
+db.close()
 
 with open(REPORT, 'w', encoding='utf-8') as f:
     f.write('\n'.join(lines))
@@ -2,35 +2,51 @@
 แก้ไข DUP plots ใน DB:
 - ลบ records ที่ซ้ำจริง (SPAR_CODE + NUM_APAR เหมือน original)
 - เปลี่ยน plot_code ของ records ที่เป็นแปลงต่างกันจริง
+- SPAR+NUM เดียวกันแต่ polygon ใน .shp ต่างกัน (geo-diff) → เปลี่ยนเป็น _B (คำนวณจาก shapefile)
+
+ขั้นตอน: คำนวณ plan ทั้งหมด → เขียน dedupe_plan.json → รันใน transaction เดียว
+
+วิธีใช้:
+  python fix_dup.py --dry-run               # เขียน plan อย่างเดียว ไม่แก้ DB
+  python fix_dup.py                         # เขียน plan แล้วรัน
+  python fix_dup.py --apply dedupe_plan.json   # รัน plan ที่ตรวจแล้ว
+      # plan ผูกกับ DB ที่สร้าง — ถ้า DB ปัจจุบันไม่ตรงจะไม่รัน (ยกเว้น --allow-other-db)
+  python fix_dup.py --apply dedupe_plan.json --connections 4
+      # หลาย connection (aiomysql) ชุดละ transaction — ถ้าพลาดกลางทาง รันซ้ำจะข้ามที่ทำไปแล้ว
 """
-import pymysql
-import os
-from urllib.parse import urlparse
-
-ENV_PATH = r"c:\Users\Administrator\OneDrive\000_Ai Project\PHP_SQL\.env"
-
-def read_env(path):
-    env = {}
-    if not os.path.exists(path): return env
-    with open(path, encoding='utf-8') as f:
-        for line in f:
-            line = line.strip()
-            if not line or line.startswith('#'): continue
-            if '=' in line:
-                k, v = line.split('=', 1)
-                env[k.strip()] = v.strip()
-    return env
-
-env = read_env(ENV_PATH)
-mysql_url = env.get('MYSQL_URL', '')
-p = urlparse(mysql_url)
-conn = pymysql.connect(
-    host=p.hostname or '127.0.0.1', port=p.port or 3306,
-    user=p.username or 'root', password=p.password or '',
-    database=(p.path or '/land_management').lstrip('/'),
-    charset='utf8mb4', autocommit=False, connect_timeout=10
-)
-cur = conn.cursor(pymysql.cursors.DictCursor)
+import argparse
+import sys
+
+from landmgmt import config, db, dedupe, shp
+
+parser = argparse.ArgumentParser(description="แก้ไข DUP plots ใน DB")
+parser.add_argument('--dry-run', action='store_true',
+                    help="คำนวณและเขียน plan อย่างเดียว ไม่แก้ DB")
+parser.add_argument('--plan', default=config.tool_path('dedupe_plan.json'),
+                    help="path ของ plan ที่จะเขียน (default: tools/dedupe_plan.json)")
+parser.add_argument('--apply', metavar='PLAN',
+                    help="รัน plan ที่มีอยู่แล้ว (ไม่คำนวณใหม่)")
+parser.add_argument('--allow-other-db', action='store_true',
+                    help="ยอมรัน --apply กับ DB ที่ไม่ใช่ DB ที่สร้าง plan")
+parser.add_argument('--shp', default=config.SHP_PATH,
+                    help="shapefile สำหรับหา SPAR+NUM ที่ polygon ต่างกัน")
+parser.add_argument('--tolerance', type=float, default=None,
+                    help="snap พิกัดเข้า grid ขนาดนี้ (เมตร) ก่อนเทียบ polygon (default: ตรงทุก bit)")
+parser.add_argument('--batch-size', type=int, default=500,
+                    help="จำนวน plot_id ต่อ DELETE/UPDATE หนึ่งคำสั่ง (default: 500)")
+parser.add_argument('--connections', type=int, default=1,
+                    help="จำนวน connection ที่รันพร้อมกัน (>1 = asyncio/aiomysql, ไม่ใช่ transaction เดียว)")
+args = parser.parse_args()
+
+plan = None
+if args.apply:
+    plan = dedupe.load_plan(args.apply)
+    if plan['database'] != db.describe() and not args.allow_other_db:
+        raise SystemExit(f"❌ plan สร้างจาก DB {plan['database']} แต่ตอนนี้ต่อ {db.describe()} — ไม่รัน "
+                         f"(ใช้ --allow-other-db ถ้าตั้งใจ)")
+
+conn = db.get_connection()
+cur = db.dict_cursor(conn)
 
 print("=== Fix DUP plots ===\n")
 
@@ -41,58 +57,44 @@ cur.execute("SELECT COUNT(*) as c FROM land_plots WHERE plot_code LIKE '%%_DUP%%
 before_dup = cur.fetchone()['c']
 print(f"Before: {before_plots} plots, {before_dup} DUP records")
 
-# Get all DUP plots
-cur.execute("""
-    SELECT plot_id, plot_code, spar_code, num_apar
-    FROM land_plots WHERE plot_code LIKE '%%_DUP%%'
-    ORDER BY spar_code, num_apar
-""")
-dup_plots = cur.fetchall()
+# ============================================================
+# Plan
+# ============================================================
+if args.apply:
+    print(f"Plan: {args.apply} (สร้างเมื่อ {plan['created']}, DB {plan['database']})")
+else:
+    # SPAR+NUM ที่ซ้ำกันแต่ polygon ต่างกัน → ห้ามลบ
+    geo_diff = shp.geo_diff_keys(args.shp, args.tolerance)
+    print(f"Geo-diff (จาก shapefile): {len(geo_diff)} กลุ่ม")
 
-deleted = 0
-renamed = 0
+    # DUP ทั้งหมด + original ของแต่ละ SPAR_CODE (2 query, จับคู่ใน memory)
+    pairs = dedupe.fetch_dup_pairs(cur)
+    plan = dedupe.build_plan(pairs, geo_diff)
+    dedupe.write_plan(plan, args.plan)
+    print(f"Plan saved: {args.plan}")
 
-# 3 geo-different pairs (same SPAR+NUM but different polygon in .shp)
-geo_diff_spars = {
-    ('BKR10120000700002', '10002'),
-    ('BKR10120000700003', '10003'),
-    ('BKR10120000700004', '10004'),
-}
+for a in plan['actions']:
+    if a['action'] == 'delete':
+        print(f"  DELETE: {a['plot_code']} (dup of original)")
+    else:
+        print(f"  RENAME ({a['reason']}): {a['plot_code']} -> {a['new_code']}")
+print(f"\n  Plan: delete {plan['summary']['delete']}, rename {plan['summary']['rename']}")
+
+if args.dry_run:
+    print("\n(dry-run — ไม่ได้แก้ไข DB)")
+    cur.close()
+    db.close()
+    sys.exit(0)
 
+# ============================================================
+# Apply — transaction เดียว (หรือหลาย connection ถ้า --connections > 1)
+# ============================================================
 try:
-    for dp in dup_plots:
-        spar = dp['spar_code']
-        num = dp['num_apar']
-        pid = dp['plot_id']
-        pc = dp['plot_code']
-
-        # Find original (same spar_code, no _DUP)
-        cur.execute("""
-            SELECT plot_id, num_apar FROM land_plots
-            WHERE spar_code = %s AND plot_code NOT LIKE '%%_DUP%%'
-            LIMIT 1
-        """, (spar,))
-        orig = cur.fetchone()
-
-        if (spar, num) in geo_diff_spars:
-            # Group A2: same SPAR+NUM but different geometry -> rename with _B suffix
-            new_code = f"{spar}_{num}_B"
-            cur.execute("UPDATE land_plots SET plot_code = %s, data_issues = NULL WHERE plot_id = %s", (new_code, pid))
-            print(f"  RENAME (geo-diff): {pc} -> {new_code}")
-            renamed += 1
-        elif orig and orig['num_apar'] == num:
-            # Group A1: true duplicate -> delete
-            cur.execute("DELETE FROM land_plots WHERE plot_id = %s", (pid,))
-            print(f"  DELETE: {pc} (dup of original)")
-            deleted += 1
-        else:
-            # Group B: different NUM_APAR -> rename with NUM_APAR suffix
-            new_code = f"{spar}_{num}"
-            cur.execute("UPDATE land_plots SET plot_code = %s, data_issues = NULL WHERE plot_id = %s", (new_code, pid))
-            print(f"  RENAME (diff-num): {pc} -> {new_code}")
-            renamed += 1
-
-    conn.commit()
+    already = 0
+    if args.connections > 1:
+        deleted, renamed, already = dedupe.apply_plan_async(plan, args.connections, args.batch_size)
+    else:
+        deleted, renamed = dedupe.apply_plan(conn, plan, args.batch_size)
 
     # Count after
     cur.execute("SELECT COUNT(*) as c FROM land_plots")
@@ -106,16 +108,17 @@ try:
     print(f"✅ Done!")
     print(f"  Deleted:  {deleted}")
     print(f"  Renamed:  {renamed}")
+    if already:
+        print(f"  ข้าม (ทำไปแล้วจากรอบก่อน): {already}")
     print(f"  Before:   {before_plots} plots ({before_dup} DUP)")
     print(f"  After:    {after_plots} plots ({after_dup} DUP remaining)")
     print(f"  data_issues remaining: {after_issues}")
     print(f"{'='*50}")
 
 except Exception as ex:
-    conn.rollback()
     print(f"\n❌ Error: {ex}")
     import traceback
     traceback.print_exc()
 finally:
     cur.close()
-    conn.close()
+    db.close()
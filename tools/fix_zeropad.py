@@ -1,30 +1,7 @@
 """Fix spar_no and num_spar: zero-pad to 5 digits"""
-import pymysql
-from urllib.parse import urlparse
-import os
-
-ENV_PATH = r"c:\Users\Administrator\OneDrive\000_Ai Project\PHP_SQL\.env"
-def read_env(path):
-    env = {}
-    if not os.path.exists(path): return env
-    with open(path, encoding='utf-8') as f:
-        for line in f:
-            line = line.strip()
-            if not line or line.startswith('#'): continue
-            if '=' in line:
-                k, v = line.split('=', 1)
-                env[k.strip()] = v.strip()
-    return env
-
-env = read_env(ENV_PATH)
-mysql_url = env.get('MYSQL_URL', '')
-p = urlparse(mysql_url)
-conn = pymysql.connect(
-    host=p.hostname or '127.0.0.1', port=p.port or 3306,
-    user=p.username or 'root', password=p.password or '',
-    database=(p.path or '/land_management').lstrip('/'),
-    charset='utf8mb4', autocommit=False, connect_timeout=10
-)
+from landmgmt import db
+
+conn = db.get_connection()
 cur = conn.cursor()
 
 print("=== Fix zero-padding: spar_no, num_spar ===\n")
@@ -60,4 +37,4 @@ for r in cur.fetchall():
 
 print("\n✅ Done!")
 cur.close()
-conn.close()
+db.close()
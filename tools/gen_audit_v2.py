@@ -3,37 +3,15 @@
 - ข้อมูลเป็นปัจจุบันหลังลบ DUP แล้ว
 - เพิ่มหมวด SPAR_CODE ที่เคยซ้ำ (แก้ไขแล้ว) ให้เจ้าหน้าที่ทราบ
 """
-import pymysql
-import os
-import re
-from urllib.parse import urlparse
 from datetime import datetime
 
-ENV_PATH = r"c:\Users\Administrator\OneDrive\000_Ai Project\PHP_SQL\.env"
-REPORT = r"c:\Users\Administrator\OneDrive\000_Ai Project\PHP_SQL\tools\audit_hardpaper.txt"
-
-def read_env(path):
-    env = {}
-    if not os.path.exists(path): return env
-    with open(path, encoding='utf-8') as f:
-        for line in f:
-            line = line.strip()
-            if not line or line.startswith('#'): continue
-            if '=' in line:
-                k, v = line.split('=', 1)
-                env[k.strip()] = v.strip()
-    return env
-
-env = read_env(ENV_PATH)
-mysql_url = env.get('MYSQL_URL', '')
-p = urlparse(mysql_url)
-conn = pymysql.connect(
-    host=p.hostname or '127.0.0.1', port=p.port or 3306,
-    user=p.username or 'root', password=p.password or '',
-    database=(p.path or '/land_management').lstrip('/'),
-    charset='utf8mb4', connect_timeout=10
-)
-cur = conn.cursor(pymysql.cursors.DictCursor)
+from landmgmt import config, db
+from landmgmt.audit import default_engine
+
+REPORT = config.tool_path('audit_hardpaper.txt')
+
+# อ่าน land_plots / villagers รอบเดียว แล้วรันทุก check (ดู landmgmt/audit.py)
+result = default_engine().run_with_retry()
 
 rpt = []
 def w(msg=''):
@@ -49,10 +27,8 @@ w(f"  (ปรับปรุงล่าสุดหลังแก้ไข DUP
 w("=" * 72)
 
 # Get totals
-cur.execute("SELECT COUNT(*) as c FROM villagers")
-total_v = cur.fetchone()['c']
-cur.execute("SELECT COUNT(*) as c FROM land_plots")
-total_p = cur.fetchone()['c']
+total_v = result.counts['villagers']
+total_p = result.counts['plots']
 
 w(f"\n  ข้อมูลใน DB ปัจจุบัน:")
 w(f"    ราษฎร (villagers):    {total_v} คน")
@@ -61,46 +37,7 @@ w(f"    แปลงที่ดิน (plots):   {total_p} แปลง")
 # ============================================================
 # 1. เลขบัตรประชาชนที่ไม่ถูกต้อง
 # ============================================================
-def validate_idcard(idc):
-    issues = []
-    if not idc:
-        issues.append('ไม่มีเลขบัตร')
-        return issues
-    if idc.startswith('TEMP_'):
-        issues.append(f'เลขบัตรชั่วคราว: {idc}')
-        return issues
-    if ' ' in idc:
-        issues.append(f'มีช่องว่างในเลขบัตร')
-    clean = idc.replace(' ', '')
-    if len(clean) != 13:
-        issues.append(f'ไม่ครบ 13 หลัก ({len(clean)} หลัก)')
-    if not clean.isdigit():
-        issues.append('มีตัวอักษรปน')
-    elif len(clean) == 13:
-        s = sum(int(clean[i]) * (13 - i) for i in range(12))
-        check = (11 - (s % 11)) % 10
-        if check != int(clean[12]):
-            issues.append(f'checksum ผิด (หลักสุดท้ายควรเป็น {check} แต่เป็น {clean[12]})')
-        if clean.startswith('0'):
-            issues.append('ขึ้นต้นด้วย 0 (น่าสงสัย)')
-    return issues
-
-cur.execute("""
-    SELECT v.villager_id, v.id_card_number, v.prefix, v.first_name, v.last_name,
-           GROUP_CONCAT(lp.plot_code SEPARATOR ', ') as plots,
-           GROUP_CONCAT(lp.num_apar SEPARATOR ', ') as num_apars
-    FROM villagers v
-    LEFT JOIN land_plots lp ON v.villager_id = lp.villager_id
-    GROUP BY v.villager_id
-    ORDER BY v.villager_id
-""")
-all_villagers = cur.fetchall()
-
-bad_id_rows = []
-for v in all_villagers:
-    id_issues = validate_idcard(v['id_card_number'])
-    if id_issues:
-        bad_id_rows.append((v, id_issues))
+bad_id_rows = result['bad_id']
 
 w(f"\n{'─'*72}")
 w(f"  1. ราษฎรที่เลขบัตรประชาชนไม่ถูกต้อง ({len(bad_id_rows)} คน)")
@@ -118,15 +55,7 @@ for i, (v, issues) in enumerate(bad_id_rows, 1):
 # ============================================================
 # 2. แปลงที่มี data_issues ที่เหลืออยู่
 # ============================================================
-cur.execute("""
-    SELECT lp.plot_code, lp.num_apar, lp.spar_code, lp.data_issues,
-           v.id_card_number, v.prefix, v.first_name, v.last_name
-    FROM land_plots lp
-    LEFT JOIN villagers v ON lp.villager_id = v.villager_id
-    WHERE lp.data_issues IS NOT NULL
-    ORDER BY lp.plot_code
-""")
-di_rows = cur.fetchall()
+di_rows = [r for r, _ in result['data_issues']]
 
 w(f"\n{'─'*72}")
 w(f"  2. แปลงที่มีปัญหาอื่นๆ ({len(di_rows)} แปลง)")
@@ -141,29 +70,10 @@ for i, r in enumerate(di_rows, 1):
 # 3. SPAR_CODE ที่เคยซ้ำ — แก้ไขแล้ว (เพื่อทราบ)
 # ============================================================
 # Records ที่ถูก rename (มี _ ตามด้วย NUM_APAR หรือ _B)
-cur.execute("""
-    SELECT lp.plot_id, lp.plot_code, lp.spar_code, lp.num_apar, lp.apar_no,
-           lp.area_rai, lp.area_ngan, lp.area_sqwa,
-           v.id_card_number, v.prefix, v.first_name, v.last_name
-    FROM land_plots lp
-    LEFT JOIN villagers v ON lp.villager_id = v.villager_id
-    WHERE lp.plot_code LIKE '%%_B'
-       OR (lp.spar_code IS NOT NULL AND lp.plot_code != lp.spar_code
-           AND lp.plot_code NOT LIKE 'IMP-%%'
-           AND lp.plot_code REGEXP '_[0-9]+$')
-    ORDER BY lp.spar_code
-""")
-renamed_rows = cur.fetchall()
+renamed_rows = [r for r, _ in result['renamed']]
 
 # Also find SPAR_CODEs with multiple plots
-cur.execute("""
-    SELECT spar_code, COUNT(*) as cnt
-    FROM land_plots
-    WHERE spar_code IS NOT NULL AND spar_code != ''
-    GROUP BY spar_code HAVING cnt > 1
-    ORDER BY spar_code
-""")
-multi_spar = cur.fetchall()
+multi_spar = result['multi_spar']
 
 w(f"\n{'─'*72}")
 w(f"  3. SPAR_CODE ที่มีหลายแปลง ({len(multi_spar)} รหัส, แก้ไข plot_code แล้ว)")
@@ -171,20 +81,8 @@ w(f"     *** เพื่อทราบ: แปลงเหล่านี้ S
 w(f"     *** ตรวจสอบแล้ว ถูกต้อง — ไม่ต้องดำเนินการเพิ่ม ***")
 w(f"{'─'*72}")
 
-for ms in multi_spar:
-    sc = ms['spar_code']
-    cnt = ms['cnt']
-    cur.execute("""
-        SELECT lp.plot_code, lp.num_apar, lp.apar_no,
-               lp.area_rai, lp.area_ngan, lp.area_sqwa,
-               v.id_card_number, v.prefix, v.first_name, v.last_name
-        FROM land_plots lp
-        LEFT JOIN villagers v ON lp.villager_id = v.villager_id
-        WHERE lp.spar_code = %s
-        ORDER BY lp.num_apar
-    """, (sc,))
-    plots = cur.fetchall()
-    
+for sc, plots in multi_spar:
+    cnt = len(plots)
     w(f"\n  SPAR_CODE: {sc}  ({cnt} แปลง)")
     for pl in plots:
         w(f"    plot_code={pl['plot_code']}  NUM_APAR={pl['num_apar']}  APAR_NO={pl['apar_no']}")
@@ -223,11 +121,11 @@ w(f"  เมื่อเจ้าหน้าที่ตรวจสอบเ
 w(f"  เพื่อปรับปรุงฐานข้อมูลต่อไป")
 w(f"{'='*72}")
 
-cur.close()
-conn.close()
+db.close()
 
 with open(REPORT, 'w', encoding='utf-8') as f:
     f.write('\n'.join(rpt))
 
 print(f"Report saved: {REPORT}")
 print(f"Total lines: {len(rpt)}")
+print(result.format_timings())
@@ -0,0 +1,109 @@
+"""
+สร้างชุดข้อมูลสังเคราะห์ (xlsx + shapefile) สำหรับทดสอบ/benchmark tools โดยไม่ต้องใช้ไฟล์จริงที่มีข้อมูลบุคคล
+(landmgmt/synthetic.py) — header/ลำดับคอลัมน์/field ของ .dbf เหมือนไฟล์จริง, polygon UTM 47N
+
+แต่ละขนาดได้:
+  synthetic_<ขนาด>.xlsx            เหมือน ตารางแปลงสอบทาน2.xlsx
+  synthetic_<ขนาด>.shp/.shx/.dbf   เหมือน Merge_แปลงสอบทาน (แถว k ของ xlsx = record k)
+  synthetic_<ขนาด>.json            จำนวนปัญหาที่ใส่ไว้ (เลขบัตรผิด, _x000D_, HOME_NO วันที่, SPAR_CODE ซ้ำ ...)
+
+ใช้กับ tools อื่นผ่าน environment variable:
+  LANDMGMT_XLSX=tools/synthetic/synthetic_10k.xlsx LANDMGMT_SHP=tools/synthetic/synthetic_10k python tools/audit_report.py
+
+วิธีใช้:
+  python gen_synthetic.py                      # 1k
+  python gen_synthetic.py 1k 10k 100k 1m       # หลายขนาด
+  python gen_synthetic.py 10k --dup-rate 0.2 --seed 7
+"""
+import argparse
+import json
+import os
+import time
+
+from landmgmt import config, synthetic
+
+XLSX_MAX_ROWS = 1048575     # ไม่รวม header
+
+parser = argparse.ArgumentParser(description="สร้าง xlsx + shapefile สังเคราะห์สำหรับ benchmark")
+parser.add_argument('sizes', nargs='*', default=['1k'], help="จำนวนแถว เช่น 1k 10k 100k 1m (default 1k)")
+parser.add_argument('--out-dir', default=config.tool_path('synthetic'))
+parser.add_argument('--seed', type=int, default=0)
+parser.add_argument('--no-xlsx', action='store_true', help="สร้างเฉพาะ shapefile")
+parser.add_argument('--no-shp', action='store_true', help="สร้างเฉพาะ xlsx")
+parser.add_argument('--invalid-id-rate', type=float, default=synthetic.DEFAULTS['invalid_id_rate'],
+                    help="สัดส่วนคนที่เลขบัตรผิด")
+parser.add_argument('--artifact-rate', type=float, default=synthetic.DEFAULTS['artifact_rate'],
+                    help="สัดส่วนแถวที่ NAME/SURNAME มี _x000D_")
+parser.add_argument('--date-rate', type=float, default=synthetic.DEFAULTS['date_home_rate'],
+                    help="สัดส่วนคนที่ HOME_NO เป็นวันที่")
+parser.add_argument('--dup-rate', type=float, default=synthetic.DEFAULTS['dup_rate'],
+                    help="แถว SPAR_CODE ซ้ำต่อแปลง")
+args = parser.parse_args()
+
+try:
+    sizes = [synthetic.parse_count(s) for s in args.sizes]
+except ValueError:
+    parser.error(f"ขนาดไม่ถูกต้อง: {args.sizes}")
+if any(n < 1 for n in sizes):
+    parser.error("จำนวนแถวต้องมากกว่า 0")
+if not args.no_xlsx and any(n > XLSX_MAX_ROWS for n in sizes):
+    parser.error(f"xlsx รับได้ไม่เกิน {XLSX_MAX_ROWS:,} แถว — ใช้ --no-xlsx สำหรับ shapefile อย่างเดียว")
+
+os.makedirs(args.out_dir, exist_ok=True)
+options = {'invalid_id_rate': args.invalid_id_rate, 'artifact_rate': args.artifact_rate,
+           'date_home_rate': args.date_rate, 'dup_rate': args.dup_rate}
+
+for n in sizes:
+    name = f"synthetic_{synthetic.label_count(n)}"
+    base = os.path.join(args.out_dir, name)
+    print(f"\n=== {name}: {n:,} แถว ===")
+    t0 = time.perf_counter()
+    gen = synthetic.Generator(n, seed=args.seed, **options)
+
+    wb = ws = w = None
+    if not args.no_xlsx:
+        wb, ws = synthetic.xlsx_writer()
+    if not args.no_shp:
+        w = synthetic.shp_writer(base)
+
+    done = 0
+    for rows, rings in gen.blocks():
+        for row, ring in zip(rows, rings):
+            if ws is not None:
+                ws.append(synthetic.xlsx_row(row))
+            if w is not None:
+                synthetic.add_shape(w, row, ring)
+        done += len(rows)
+        elapsed = time.perf_counter() - t0
+        print(f"  {done:,}/{n:,} แถว ({done / elapsed:,.0f} แถว/วินาที)")
+
+    files = []
+    if w is not None:
+        synthetic.close_shp(w, base)
+        files += [base + ext for ext in ('.shp', '.shx', '.dbf', '.prj', '.cpg')]
+    if wb is not None:
+        t_save = time.perf_counter()
+        wb.save(base + '.xlsx.tmp')
+        os.replace(base + '.xlsx.tmp', base + '.xlsx')
+        files.append(base + '.xlsx')
+        print(f"  บันทึก xlsx {time.perf_counter() - t_save:.1f}s")
+    elapsed = time.perf_counter() - t0
+
+    manifest = {'rows': n, 'seed': args.seed, 'options': dict(synthetic.DEFAULTS, **options),
+                'stats': gen.stats, 'seconds': round(elapsed, 2),
+                'files': {os.path.basename(f): os.path.getsize(f) for f in files}}
+    with open(base + '.json', 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+    s = gen.stats
+    print(f"  แปลง {s['plots']:,}, คน {s['people']:,}, "
+          f"SPAR_CODE ซ้ำ {s['dup_co_owner'] + s['dup_same_geo'] + s['dup_diff_geo']:,} แถว "
+          f"(ผู้ร่วมครอบครอง {s['dup_co_owner']:,} / DUP geometry เดียวกัน {s['dup_same_geo']:,} / "
+          f"DUP geometry ต่าง {s['dup_diff_geo']:,})")
+    print(f"  เลขบัตรผิด {s['invalid_id_people']:,} คน ({s['invalid_id_rows']:,} แถว), "
+          f"_x000D_ {s['artifact_rows']:,} แถว, HOME_NO วันที่ {s['date_home_rows']:,} แถว")
+    for f in files:
+        print(f"  {f}  ({os.path.getsize(f) / 1048576:,.1f} MB)")
+    print(f"  เวลา {elapsed:.1f}s")
+
+print(f"\nใช้กับ tools: LANDMGMT_XLSX=<ไฟล์ .xlsx> LANDMGMT_SHP=<ไฟล์ไม่ใส่นามสกุล> python <tool>.py")
@@ -1,85 +1,19 @@
-import openpyxl
-import re
 import sys
 import io
 
+from landmgmt import config, rules, xlsxcache
+
 # Redirect stdout to file with UTF-8
-OUTPUT_FILE = r"c:\Users\Administrator\OneDrive\000_Ai Project\PHP_SQL\tools\inspect_result.txt"
+OUTPUT_FILE = config.tool_path('inspect_result.txt')
 sys.stdout = io.open(OUTPUT_FILE, "w", encoding="utf-8")
 
-def check_thai_id(id_str):
-    """ตรวจสอบเลขบัตรประชาชนไทย 13 หลัก"""
-    issues = []
-    if not id_str:
-        issues.append("ไม่มีเลขบัตร")
-        return issues
-    
-    # Clean up - remove spaces, dashes
-    clean = str(id_str).strip().replace(" ", "").replace("-", "").replace("\t", "")
-    
-    # Check if numeric
-    if not clean.isdigit():
-        issues.append(f"มีอักขระที่ไม่ใช่ตัวเลข: '{id_str}'")
-        return issues
-    
-    # Check length
-    if len(clean) != 13:
-        issues.append(f"ไม่ครบ 13 หลัก (มี {len(clean)} หลัก): '{clean}'")
-        return issues
-    
-    # Check digit validation (Thai national ID checksum)
-    total = 0
-    for i in range(12):
-        total += int(clean[i]) * (13 - i)
-    remainder = total % 11
-    check_digit = (11 - remainder) % 10
-    
-    if int(clean[12]) != check_digit:
-        issues.append(f"Check digit ไม่ถูกต้อง (คาดหวัง {check_digit}, ได้ {clean[12]}): '{clean}'")
-    
-    # Check starts with 0 or unusual prefix
-    if clean[0] == '0':
-        issues.append(f"ขึ้นต้นด้วย 0 (ผิดปกติ): '{clean}'")
-    
-    return issues
-
-def check_name(name_str, col_label):
-    """ตรวจสอบชื่อ-สกุล"""
-    issues = []
-    if not name_str or str(name_str).strip() == "":
-        issues.append(f"{col_label}: ว่างเปล่า")
-        return issues
-    
-    name = str(name_str).strip()
-    
-    # Check for numbers in name
-    if re.search(r'\d', name):
-        issues.append(f"{col_label}: มีตัวเลขปนในชื่อ '{name}'")
-    
-    # Check for _x000D_ or carriage return artifacts
-    if '_x000D_' in name or '\r' in name or '\n' in name:
-        issues.append(f"{col_label}: มี carriage return/newline artifact '{repr(name)}'")
-    
-    # Check for unusual characters
-    if re.search(r'[!@#$%^&*()=+\[\]{}<>|\\/:;]', name):
-        issues.append(f"{col_label}: มีอักขระพิเศษ '{name}'")
-    
-    # Check very short name (less than 2 chars)
-    if len(name) < 2:
-        issues.append(f"{col_label}: สั้นเกินไป '{name}'")
-    
-    # Check if name has only spaces or dots
-    if re.match(r'^[\s.]+$', name):
-        issues.append(f"{col_label}: มีแต่จุดหรือช่องว่าง '{name}'")
-    
-    return issues
-
 def main():
-    filepath = r"c:\Users\Administrator\OneDrive\000_Ai Project\PHP_SQL\ตรวจสอบคุณสมบัติ\ตารางแปลงสอบทาน2.xlsx"
+    filepath = config.XLSX_PATH
     
     print(f"=== กำลังอ่านไฟล์: ตารางแปลงสอบทาน2.xlsx ===\n")
     
-    wb = openpyxl.load_workbook(filepath, data_only=True)
+    # อ่านจาก cache แบบคอลัมน์ (แปลง xlsx ใหม่เฉพาะเมื่อไฟล์เปลี่ยน — ดู landmgmt/xlsxcache.py)
+    wb = xlsxcache.load_workbook(filepath)
     
     for sheet_name in wb.sheetnames:
         print(f"\n{'='*60}")
@@ -148,49 +82,44 @@ def main():
         
         print(f"  Data start row: {data_start}")
         
-        # Collect all data and check
-        anomalies = []
-        all_ids = {}  # track duplicates
-        row_count = 0
-        
+        # Collect all data rows
+        rows = []  # [(row_idx, row_vals)]
         for row_idx in range(data_start, ws.max_row + 1):
-            # Skip empty rows
             row_vals = [ws.cell(row=row_idx, column=c).value for c in range(1, ws.max_column + 1)]
+            # Skip empty rows
             if all(v is None for v in row_vals):
                 continue
-            
-            row_count += 1
-            row_issues = []
-            
-            # Check ID
-            if id_col:
-                id_val = ws.cell(row=row_idx, column=id_col).value
-                if id_val is not None:
-                    id_str = str(id_val).strip()
-                    id_issues = check_thai_id(id_str)
-                    row_issues.extend(id_issues)
-                    
-                    # Track duplicates
-                    clean_id = id_str.replace(" ", "").replace("-", "")
-                    if clean_id in all_ids:
-                        row_issues.append(f"เลขบัตรซ้ำกับแถว {all_ids[clean_id]}")
-                    else:
-                        all_ids[clean_id] = row_idx
-            
-            # Check names
-            if fname_col:
-                fname = ws.cell(row=row_idx, column=fname_col).value
-                row_issues.extend(check_name(fname, "ชื่อ"))
-            
-            if lname_col:
-                lname = ws.cell(row=row_idx, column=lname_col).value
-                row_issues.extend(check_name(lname, "สกุล"))
-            
-            if name_col:
-                full_name = ws.cell(row=row_idx, column=name_col).value
-                row_issues.extend(check_name(full_name, "ชื่อ-สกุล"))
-            
-            if row_issues:
+            rows.append((row_idx, row_vals))
+        row_count = len(rows)
+        row_issues = [[] for _ in rows]
+
+        # ตรวจทีละคอลัมน์ด้วย rule กลาง (landmgmt/rules.py) — ค่าที่ซ้ำกันตรวจครั้งเดียว
+        if id_col:
+            id_rows = [(i, str(vals[id_col - 1]).strip())
+                       for i, (_, vals) in enumerate(rows) if vals[id_col - 1] is not None]
+            id_issues = rules.get('idcard_xlsx').check_column([id_str for _, id_str in id_rows])
+            all_ids = {}  # track duplicates
+            for (i, id_str), issues in zip(id_rows, id_issues):
+                row_issues[i].extend(issues)
+
+                # Track duplicates
+                row_idx = rows[i][0]
+                clean_id = id_str.replace(" ", "").replace("-", "")
+                if clean_id in all_ids:
+                    row_issues[i].append(f"เลขบัตรซ้ำกับแถว {all_ids[clean_id]}")
+                else:
+                    all_ids[clean_id] = row_idx
+
+        # Check names
+        name_spec = [('name_xlsx', col - 1, label)
+                     for col, label in ((fname_col, "ชื่อ"), (lname_col, "สกุล"), (name_col, "ชื่อ-สกุล"))
+                     if col]
+        for acc, issues in zip(row_issues, rules.check_rows([vals for _, vals in rows], name_spec)):
+            acc.extend(issues)
+
+        anomalies = []
+        for (row_idx, _), issues in zip(rows, row_issues):
+            if issues:
                 # Get display info
                 display_parts = [f"แถว {row_idx}"]
                 if id_col:
@@ -205,7 +134,7 @@ def main():
                 anomalies.append({
                     'row': row_idx,
                     'display': ' | '.join(display_parts),
-                    'issues': row_issues
+                    'issues': issues
                 })
         
         print(f"\n  จำนวนแถวข้อมูล: {row_count}")
@@ -246,5 +175,8 @@ def main():
     
     wb.close()
 
+    print(f"\n--- เวลาที่ใช้ต่อ rule ---")
+    print(rules.format_stats())
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,9 @@
+"""
+landmgmt — โค้ดที่ใช้ร่วมกันของ Python tools ใน tools/
+
+import ได้โดยไม่เชื่อมต่อ DB (connection เปิดเมื่อเรียก db.get_connection() ครั้งแรก)
+รัน script จาก tools/ ตามปกติ เช่น  python tools/audit_report.py
+"""
+from . import config, db, rules
+from .config import read_env, db_config, tool_path
+from .validators import check_idcard, validate_idcard, validate_name, validate_prefix
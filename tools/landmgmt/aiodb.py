@@ -0,0 +1,194 @@
+"""
+เขียน DB แบบ asyncio (aiomysql) หลาย connection พร้อมกัน — สำหรับ DB ระยะไกล (MYSQL_URL ของ Railway)
+ที่เวลาส่วนใหญ่หมดไปกับ round trip ไม่ใช่งานใน server
+
+- partition(): แบ่ง record เป็นสาย (lane) ตามกลุ่มที่เชื่อมกันด้วยเลขบัตรหรือ plot_code
+  แถวของราษฎรคนเดียวกัน / แปลงเดียวกันอยู่สายเดียวกันเสมอ และเรียงตามลำดับแถวเดิม
+  → INSERT แปลงไม่มีทางแซง INSERT เจ้าของแปลงที่อยู่อีก connection และแถวหลังยังทับแถวก่อนเหมือนเดิม
+- run_lanes(): สายละ 1 connection ทุกสายทำงานพร้อมกัน งานในสายรันตามลำดับ งานละ 1 transaction
+  deadlock / lock wait timeout / connection หลุด → rollback แล้วรันงานนั้นซ้ำ (backoff 0.5, 1, 2 วินาที)
+
+ต่างจากการเขียนด้วย connection เดียว: ไม่ใช่ transaction เดียวทั้งไฟล์ — ถ้าพลาดกลางทาง
+งานที่ commit แล้วจะค้างอยู่ (upsert รันซ้ำได้ผลเท่าเดิม, dedupe ข้าม action ที่ทำไปแล้ว)
+
+ต้องติดตั้ง aiomysql (pip install aiomysql)
+"""
+import asyncio
+from collections import Counter
+
+from . import config, db, staging
+from .importstate import norm_key
+
+try:
+    import aiomysql
+except ImportError:  # aiomysql เป็น optional — ใช้เฉพาะเมื่อสั่ง --connections > 1
+    aiomysql = None
+
+# 1205 lock wait timeout, 1213 deadlock — rollback แล้วรันใหม่ได้
+RETRY_ERRORS = (1205, 1213)
+
+
+def require_aiomysql():
+    if aiomysql is None:
+        raise RuntimeError("การเขียนหลาย connection ต้องใช้ aiomysql (pip install aiomysql)")
+
+
+async def connect(**overrides):
+    """เปิด connection ใหม่ — ค่าเดียวกับ db.connect()"""
+    require_aiomysql()
+    c = config.db_config()
+    params = dict(host=c['host'], port=c['port'], user=c['user'], password=c['password'],
+                  db=c['database'], charset='utf8mb4', autocommit=False, connect_timeout=10)
+    params.update(overrides)
+    return await aiomysql.connect(**params)
+
+
+def is_retryable(ex):
+    return db.is_disconnect(ex) or (bool(getattr(ex, 'args', None)) and ex.args[0] in RETRY_ERRORS)
+
+
+# ============================================================
+# แบ่งสาย
+# ============================================================
+def partition(recs, lanes):
+    """แบ่ง record เป็นไม่เกิน lanes สาย — กลุ่มที่ใช้เลขบัตรหรือ plot_code ร่วมกัน (union-find)
+    ลงสายเดียวกันทั้งกลุ่ม เลือกสายที่มีแถวน้อยที่สุด ณ ตอนเจอกลุ่มนั้นครั้งแรก"""
+    parent = {}
+
+    def find(x):
+        parent.setdefault(x, x)
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    keys = [(('v', norm_key(r['villager_key'])), ('p', norm_key(r['plot_code']))) for r in recs]
+    for v, p in keys:
+        rv, rp = find(v), find(p)
+        if rv != rp:
+            parent[rp] = rv
+
+    roots = [find(v) for v, _ in keys]
+    sizes = Counter(roots)
+    load = [0] * lanes
+    lane_of = {}
+    out = [[] for _ in range(lanes)]
+    for rec, root in zip(recs, roots):
+        lane = lane_of.get(root)
+        if lane is None:
+            lane = lane_of[root] = min(range(lanes), key=load.__getitem__)
+            load[lane] += sizes[root]
+        out[lane].append(rec)
+    return [lane for lane in out if lane]
+
+
+def spread(items, lanes):
+    """แบ่งงานที่ไม่ขึ้นต่อกันแบบวนรอบ"""
+    return [items[i::lanes] for i in range(lanes) if items[i::lanes]]
+
+
+def chunks(items, size):
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+# ============================================================
+# รันหลายสายพร้อมกัน
+# ============================================================
+async def _run_lane(works, job, setup, on_done, retries, backoff):
+    conn = None
+    try:
+        for work in works:
+            for attempt in range(retries + 1):
+                try:
+                    if conn is None:
+                        conn = await connect()
+                        async with conn.cursor() as cur:
+                            # ลด gap lock ระหว่างสาย (INSERT ... SELECT ไม่ต้องล็อกแถวที่อ่าน)
+                            await cur.execute("SET SESSION TRANSACTION ISOLATION LEVEL READ COMMITTED")
+                            if setup is not None:
+                                await setup(cur)
+                    async with conn.cursor() as cur:
+                        result = await job(cur, work)
+                    await conn.commit()
+                    break
+                except Exception as ex:
+                    if attempt == retries or not is_retryable(ex):
+                        raise
+                    if conn is None:
+                        pass            # เปิด connection ไม่สำเร็จ — ลองเปิดใหม่
+                    elif db.is_disconnect(ex):
+                        conn.close()
+                        conn = None     # เปิดใหม่ + setup ใหม่ (staging table หายไปกับ connection เดิม)
+                    else:
+                        await conn.rollback()
+                    await asyncio.sleep(backoff * 2 ** attempt)
+            if on_done is not None:
+                on_done(work, result)
+    finally:
+        if conn is not None:
+            conn.close()        # ปิดโดยไม่ commit = server rollback งานที่ค้าง
+
+
+async def run_lanes(lanes, job, setup=None, on_done=None, retries=3, backoff=0.5):
+    """lanes: [[งาน, ...], ...] — สายละ 1 connection
+    job(cur, งาน): coroutine ที่รันงาน 1 ชิ้น (ไม่ commit) คืนผลที่ส่งต่อให้ on_done(งาน, ผล) หลัง commit
+    setup(cur): coroutine ที่รันทุกครั้งที่เปิด connection ใหม่
+    สายใดพลาด → ยกเลิกสายอื่น (งานที่ยังไม่ commit ถูก rollback) แล้ว raise ต่อ"""
+    require_aiomysql()
+    tasks = [asyncio.ensure_future(_run_lane(works, job, setup, on_done, retries, backoff))
+             for works in lanes]
+    try:
+        await asyncio.gather(*tasks)
+    except BaseException:
+        for t in tasks:
+            t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+
+# ============================================================
+# Upsert (staging table ต่อ connection)
+# ============================================================
+def _staging_setup():
+    """setup ของ run_lanes ที่สร้าง staging table ด้วย staging.stage_ddl() —
+    อ่านชนิด/collation ของตารางจริงครั้งเดียว แล้วทุกสายใช้ DDL ชุดเดียวกัน"""
+    ddl = []
+
+    async def setup(cur):
+        if not ddl:
+            await cur.execute(*staging.target_columns_sql(staging.STAGE_TARGET.values()))
+            ddl[:] = staging.stage_ddl(await cur.fetchall())
+        for sql in ddl:
+            await cur.execute(sql)
+    return setup
+
+
+async def _upsert_batch(cur, recs):
+    steps, totals = staging.batch_steps(recs)
+    counts = []
+    for sql, params, many, counter, _ in steps:
+        if many:
+            await cur.executemany(sql, params)
+        else:
+            await cur.execute(sql, params)
+        if counter:
+            counts.append((counter, totals[counter], cur.rowcount))
+    return counts
+
+
+def upsert(recs, stats, connections=4, batch_size=1000, progress=None):
+    """upsert record (ผลจาก transform) ด้วยหลาย connection — คืนจำนวนสายที่ใช้
+    stats นับเฉพาะชุดที่ commit แล้ว, progress(จำนวนแถวที่เขียนแล้ว) เรียกหลังแต่ละชุด"""
+    lanes = [chunks(lane, batch_size) for lane in partition(recs, connections)]
+    written = 0
+
+    def on_done(batch, counts):
+        nonlocal written
+        for counter, total, inserted in counts:
+            staging.tally(stats, counter, total, inserted)
+        written += len(batch)
+        if progress is not None:
+            progress(written)
+
+    asyncio.run(run_lanes(lanes, _upsert_batch, setup=_staging_setup(), on_done=on_done))
+    return len(lanes)
@@ -0,0 +1,223 @@
+"""
+Audit engine — อ่าน land_plots และ villagers อย่างละครั้ง (server-side cursor)
+แล้วรันทุก check ที่ลงทะเบียนไว้ในรอบเดียว
+
+รายงาน (audit_report.py, gen_audit_v2.py) เอาผลจาก AuditResult ไปจัดหน้าเอง
+แทนการ query ทีละหมวด — งานเป็น O(แถว) ไม่ใช่ O(หมวด × แถว)
+"""
+import re
+import time
+from collections import defaultdict
+
+from . import db, rules
+
+PLOT_SQL = """
+    SELECT lp.plot_id, lp.plot_code, lp.villager_id, lp.spar_code, lp.num_apar, lp.apar_no,
+           lp.latitude, lp.longitude, lp.area_rai, lp.area_ngan, lp.area_sqwa,
+           lp.ptype, lp.occupation_since, lp.data_issues,
+           v.id_card_number, v.prefix, v.first_name, v.last_name
+    FROM land_plots lp
+    LEFT JOIN villagers v ON lp.villager_id = v.villager_id
+    ORDER BY lp.plot_code
+"""
+
+VILLAGER_SQL = """
+    SELECT villager_id, id_card_number, prefix, first_name, last_name
+    FROM villagers
+    ORDER BY villager_id
+"""
+
+
+# ============================================================
+# Checks
+# ============================================================
+class RowCheck:
+    """check ทีละแถว: fn(row) คืนรายการปัญหา — เก็บแถวที่มีปัญหาเป็น [(row, issues)]"""
+
+    def __init__(self, name, fn):
+        self.name = name
+        self.fn = fn
+        self.reset()
+
+    def reset(self):
+        self.rows = []
+        self.seconds = 0.0
+
+    def feed(self, row):
+        t0 = time.perf_counter()
+        issues = self.fn(row)
+        self.seconds += time.perf_counter() - t0
+        if issues:
+            self.rows.append((row, issues))
+
+    def result(self):
+        return self.rows
+
+
+class SparGroupCheck:
+    """SPAR_CODE ที่มีมากกว่า 1 แปลง — คืน [(spar_code, [plots เรียงตาม num_apar])]"""
+
+    def __init__(self, name):
+        self.name = name
+        self.reset()
+
+    def reset(self):
+        self.groups = defaultdict(list)
+        self.seconds = 0.0
+
+    def feed(self, row):
+        t0 = time.perf_counter()
+        if row['spar_code']:
+            self.groups[row['spar_code']].append(row)
+        self.seconds += time.perf_counter() - t0
+
+    def result(self):
+        return [(sc, sorted(plots, key=lambda p: p['num_apar'] or ''))
+                for sc, plots in sorted(self.groups.items()) if len(plots) > 1]
+
+
+# ============================================================
+# Default checks
+# ============================================================
+RENAMED_RE = re.compile(r'_[0-9]+$')
+
+
+def check_data_issues(p):
+    return [p['data_issues']] if p['data_issues'] is not None else []
+
+
+def check_missing_fields(p):
+    issues = []
+    if not p['latitude'] or not p['longitude']:
+        issues.append('ไม่มีพิกัด (lat/lng)')
+    if not p['ptype']:
+        issues.append('ไม่มีประเภทการใช้ประโยชน์ (PTYPE)')
+    if not p['occupation_since']:
+        issues.append('ไม่มีปีที่เข้าทำประโยชน์ (YEAR)')
+    if (p['area_rai'] or 0) == 0 and (p['area_ngan'] or 0) == 0 and (p['area_sqwa'] or 0) == 0:
+        issues.append('ไม่มีข้อมูลเนื้อที่ (ไร่/งาน/ตร.ว.)')
+    if not p['num_apar']:
+        issues.append('ไม่มี NUM_APAR')
+    return issues
+
+
+def check_renamed(p):
+    """plot_code ที่ถูก rename ตอนแก้ DUP (ลงท้าย _B หรือ _<NUM_APAR>)"""
+    code = p['plot_code']
+    if code.endswith('_B'):
+        return ['_B']
+    if (p['spar_code'] is not None and code != p['spar_code']
+            and not code.startswith('IMP-') and RENAMED_RE.search(code)):
+        return ['_NUM_APAR']
+    return []
+
+
+def check_idcard(v):
+    return rules.check_record(v, rules.VILLAGER_ID_SPEC)
+
+
+def check_names(v):
+    return rules.check_record(v, rules.VILLAGER_NAME_SPEC)
+
+
+# ============================================================
+# Engine
+# ============================================================
+class AuditResult:
+    def __init__(self, counts, sections, elapsed, timings):
+        self.counts = counts
+        self.sections = sections
+        self.elapsed = elapsed
+        self.timings = timings      # {ชื่อ check: วินาที}
+
+    def __getitem__(self, name):
+        return self.sections[name]
+
+    def format_timings(self):
+        """เวลาต่อ check และต่อ rule — ดูว่า check ไหนกินเวลา audit มากที่สุด"""
+        lines = [f"  audit {self.elapsed:.2f}s ({self.counts['plots']} แปลง, {self.counts['villagers']} ราษฎร)"]
+        for name, seconds in sorted(self.timings.items(), key=lambda t: -t[1]):
+            lines.append(f"  {name:<16} {seconds * 1000:>9.1f} ms")
+        lines.append(rules.format_stats())
+        return '\n'.join(lines)
+
+
+class AuditEngine:
+    def __init__(self):
+        self.plot_checks = []
+        self.villager_checks = []
+
+    def add_plot_check(self, check):
+        self.plot_checks.append(check)
+        return check
+
+    def add_villager_check(self, check):
+        self.villager_checks.append(check)
+        return check
+
+    def _stream(self, conn, sql):
+        import pymysql
+        cur = conn.cursor(pymysql.cursors.SSDictCursor)
+        try:
+            cur.execute(sql)
+            for row in cur:
+                yield row
+        finally:
+            cur.close()
+
+    def run(self, conn=None):
+        t0 = time.perf_counter()
+        conn = conn or db.get_connection()
+        for check in self.plot_checks + self.villager_checks:
+            check.reset()  # run_with_retry อาจเรียก run ซ้ำ
+        rules.reset_stats()
+
+        # --- land_plots (+ เจ้าของ) รอบเดียว — เก็บรายการแปลงต่อราษฎรไว้ใช้ตอนอ่าน villagers ---
+        owner_plots = defaultdict(list)
+        n_plots = 0
+        for p in self._stream(conn, PLOT_SQL):
+            n_plots += 1
+            owner_plots[p['villager_id']].append((p['plot_code'], p['num_apar']))
+            for check in self.plot_checks:
+                check.feed(p)
+
+        # --- villagers รอบเดียว ---
+        n_villagers = 0
+        for v in self._stream(conn, VILLAGER_SQL):
+            n_villagers += 1
+            plots = owner_plots.get(v['villager_id'], ())
+            v['plots'] = ', '.join(code for code, _ in plots) or None
+            v['num_apars'] = ', '.join(num for _, num in plots if num is not None) or None
+            for check in self.villager_checks:
+                check.feed(v)
+
+        checks = self.plot_checks + self.villager_checks
+        sections = {c.name: c.result() for c in checks}
+        timings = {c.name: c.seconds for c in checks}
+        counts = {'villagers': n_villagers, 'plots': n_plots}
+        return AuditResult(counts, sections, time.perf_counter() - t0, timings)
+
+    def run_with_retry(self, retries=3, backoff=0.5):
+        """อ่านซ้ำทั้งรอบถ้า connection หลุดระหว่าง stream (เป็นการอ่านอย่างเดียว จึงเริ่มใหม่ได้)"""
+        for attempt in range(retries + 1):
+            try:
+                return self.run()
+            except Exception as ex:
+                if attempt == retries or not db.is_disconnect(ex):
+                    raise
+                time.sleep(backoff * 2 ** attempt)
+                try:
+                    db.get_connection().ping(reconnect=True)
+                except Exception:
+                    pass  # รอบถัดไปจะลองใหม่
+
+
+def default_engine():
+    engine = AuditEngine()
+    engine.add_plot_check(RowCheck('data_issues', check_data_issues))
+    engine.add_plot_check(RowCheck('missing_fields', check_missing_fields))
+    engine.add_plot_check(RowCheck('renamed', check_renamed))
+    engine.add_plot_check(SparGroupCheck('multi_spar'))
+    engine.add_villager_check(RowCheck('bad_id', check_idcard))
+    engine.add_villager_check(RowCheck('bad_name', check_names))
+    return engine
@@ -0,0 +1,194 @@
+"""
+MariaDB ชั่วคราวสำหรับ benchmark (tools/bench_pipeline.py) — ไม่แตะ DB จริง
+
+- TempServer: สร้าง datadir ใหม่ด้วย mariadb-install-db แล้วเปิด mariadbd บน 127.0.0.1 port ว่าง
+  (--skip-grant-tables: root ไม่มีรหัสผ่าน) ปิดและลบ datadir เมื่อออกจาก with
+- load_schema(): สร้าง database ใหม่จาก sql/schema.sql + sql/migration_*.sql แบบเดียวกับ run_migration.php
+  (multi statement ทั้งไฟล์) แต่เปลี่ยนชื่อ land_management ในไฟล์เป็นชื่อ database ของ benchmark
+- status(): ตัวนับจาก SHOW GLOBAL STATUS — ต่างก่อน/หลังแต่ละขั้น = จำนวน query ที่ tool ส่งมา
+"""
+import glob
+import os
+import re
+import shutil
+import socket
+import subprocess
+import sys
+import time
+
+from . import config
+
+SQL_DIR = os.path.join(config.ROOT_DIR, 'sql')
+
+# ตัวนับที่บันทึก (ต่างก่อน/หลัง)
+STATUS_KEYS = (
+    'Questions', 'Com_select', 'Com_insert', 'Com_insert_select', 'Com_update', 'Com_update_multi',
+    'Com_delete', 'Com_delete_multi', 'Com_replace', 'Com_create_table', 'Com_drop_table',
+    'Com_commit', 'Com_rollback', 'Bytes_received', 'Bytes_sent',
+    'Innodb_rows_read', 'Innodb_rows_inserted', 'Innodb_rows_updated', 'Innodb_rows_deleted',
+)
+
+LOCAL_HOSTS = ('127.0.0.1', 'localhost', '::1')
+
+# XAMPP บน Windows ไม่อยู่ใน PATH
+XAMPP_BIN = r'C:\xampp\mysql\bin'
+
+
+def schema_files():
+    """schema.sql ก่อน แล้ว migration ตามชื่อ (forms → subdivision → verification_cols ตามที่ต้องพึ่งกัน)"""
+    return [os.path.join(SQL_DIR, 'schema.sql')] + sorted(glob.glob(os.path.join(SQL_DIR, 'migration_*.sql')))
+
+
+def url(host, port, database, user='root', password=''):
+    auth = user + (f':{password}' if password else '')
+    return f"mysql://{auth}@{host}:{port}/{database}"
+
+
+# ============================================================
+# Server ชั่วคราว
+# ============================================================
+def find_binary(names, hint=None):
+    dirs = [os.path.dirname(hint)] if hint else []
+    for name in names:
+        for d in dirs + [XAMPP_BIN]:
+            for exe in (name, name + '.exe'):
+                if os.path.isfile(os.path.join(d, exe)):
+                    return os.path.join(d, exe)
+        found = shutil.which(name)
+        if found:
+            return found
+    return None
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+class TempServer:
+    """mariadbd ชั่วคราวใน workdir/mysql-data — ใช้ใน with (ปิด server และลบ datadir ตอนออก)"""
+
+    def __init__(self, workdir, mysqld=None, keep=False, startup_timeout=60.0):
+        self.mysqld = mysqld or find_binary(('mariadbd', 'mysqld'))
+        if not self.mysqld:
+            raise RuntimeError("ไม่พบ mariadbd/mysqld — ระบุ --mysqld หรือใช้ --server กับ MariaDB ที่รันอยู่แล้ว")
+        self.datadir = os.path.join(workdir, 'mysql-data')
+        self.keep = keep
+        self.startup_timeout = startup_timeout
+        self.host, self.port = '127.0.0.1', free_port()
+        self.proc = None
+        self.log_path = os.path.join(workdir, 'mysqld.err')
+
+    def _install(self):
+        installer = find_binary(('mariadb-install-db', 'mysql_install_db'), self.mysqld)
+        if not installer:
+            raise RuntimeError(f"ไม่พบ mariadb-install-db ข้าง {self.mysqld}")
+        os.makedirs(self.datadir)
+        cmd = [installer, f'--datadir={self.datadir}']
+        if sys.platform != 'win32':
+            # Windows (mysql_install_db.exe) ไม่รู้จัก option เหล่านี้
+            cmd += ['--no-defaults', '--skip-test-db', '--auth-root-authentication-method=normal',
+                    f'--basedir={os.path.dirname(os.path.dirname(os.path.realpath(self.mysqld)))}']
+            if hasattr(os, 'geteuid') and os.geteuid() == 0:
+                cmd.append('--user=root')
+        out = subprocess.run(cmd, capture_output=True, text=True, errors='replace')
+        if out.returncode:
+            raise RuntimeError(f"{os.path.basename(installer)} ล้มเหลว:\n{out.stdout}{out.stderr}")
+
+    def start(self):
+        self._install()
+        cmd = [self.mysqld, '--no-defaults', f'--datadir={self.datadir}', f'--port={self.port}',
+               '--bind-address=127.0.0.1', '--skip-grant-tables', f'--log-error={self.log_path}',
+               f'--pid-file={os.path.join(self.datadir, "bench.pid")}',
+               '--character-set-server=utf8mb4', '--collation-server=utf8mb4_unicode_ci']
+        if sys.platform != 'win32':
+            cmd.append(f'--socket={os.path.join(self.datadir, "bench.sock")}')
+            if hasattr(os, 'geteuid') and os.geteuid() == 0:
+                cmd.append('--user=root')
+        self.proc = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+        import pymysql
+        deadline = time.monotonic() + self.startup_timeout
+        while True:
+            try:
+                pymysql.connect(host=self.host, port=self.port, user='root', connect_timeout=2).close()
+                return self
+            except pymysql.err.OperationalError:
+                if self.proc.poll() is not None or time.monotonic() > deadline:
+                    self.stop()
+                    raise RuntimeError(f"เปิด {os.path.basename(self.mysqld)} ไม่สำเร็จ — ดู {self.log_path}")
+                time.sleep(0.3)
+
+    def stop(self):
+        if self.proc is not None and self.proc.poll() is None:
+            import pymysql
+            try:
+                pymysql.connect(host=self.host, port=self.port, user='root', connect_timeout=2).query('SHUTDOWN')
+            except Exception:
+                self.proc.terminate()
+            try:
+                self.proc.wait(60)
+            except subprocess.TimeoutExpired:
+                self.proc.kill()
+                self.proc.wait()
+        self.proc = None
+        if not self.keep:
+            shutil.rmtree(self.datadir, ignore_errors=True)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+# ============================================================
+# Schema + ตัวนับ
+# ============================================================
+def connect_admin(host, port, user='root', password=''):
+    """connection ที่รัน SQL หลายคำสั่งในครั้งเดียวได้ (เหมือน mysqli multi_query)"""
+    import pymysql
+    from pymysql.constants import CLIENT
+    return pymysql.connect(host=host, port=port, user=user, password=password, charset='utf8mb4',
+                           autocommit=True, client_flag=CLIENT.MULTI_STATEMENTS)
+
+
+def load_schema(conn, database):
+    """DROP + สร้าง database ใหม่จาก schema/migration — คืนรายชื่อไฟล์ที่รัน"""
+    with conn.cursor() as cur:
+        cur.execute(f"DROP DATABASE IF EXISTS `{database}`")
+        files = schema_files()
+        for k, path in enumerate(files):
+            with open(path, encoding='utf-8') as f:
+                sql = re.sub(r'\bland_management\b', database, f.read())
+            if k:
+                # migration บางไฟล์ไม่มี USE (อ้าง DATABASE()) — schema.sql สร้าง database แล้ว
+                cur.execute(f"USE `{database}`")
+            cur.execute(sql)
+            while cur.nextset():
+                pass
+    return [os.path.relpath(p, config.ROOT_DIR) for p in files]
+
+
+def status(conn):
+    with conn.cursor() as cur:
+        cur.execute("SHOW GLOBAL STATUS")
+        values = dict(cur.fetchall())
+    return {k: int(values.get(k, 0)) for k in STATUS_KEYS}
+
+
+def status_delta(before, after):
+    """ตัวนับที่เพิ่มขึ้น — Questions หัก SHOW GLOBAL STATUS ของเราเอง 1 ครั้ง"""
+    delta = {k: after[k] - before[k] for k in STATUS_KEYS}
+    delta['Questions'] = max(0, delta['Questions'] - 1)
+    return {k: v for k, v in delta.items() if v}
+
+
+def table_counts(conn, database, tables=('villagers', 'land_plots')):
+    out = {}
+    with conn.cursor() as cur:
+        for t in tables:
+            cur.execute(f"SELECT COUNT(*) FROM `{database}`.`{t}`")
+            out[t] = cur.fetchone()[0]
+    return out
@@ -0,0 +1,68 @@
+"""
+Config กลางของ tools/
+- path ของไฟล์ในโปรเจกต์ (หาเทียบจากตำแหน่ง repo แทน path Windows ที่ hardcode)
+- อ่าน .env และ MYSQL_URL แบบเดียวกับ config/database.php
+"""
+import os
+from urllib.parse import urlparse
+
+# ============================================================
+# Paths
+# ============================================================
+TOOLS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ROOT_DIR = os.path.dirname(TOOLS_DIR)
+SURVEY_DIR = os.path.join(ROOT_DIR, 'ตรวจสอบคุณสมบัติ')
+
+# override ได้ด้วย environment variable (เช่นตอนรันกับไฟล์ทดสอบ)
+ENV_PATH = os.environ.get('LANDMGMT_ENV', os.path.join(ROOT_DIR, '.env'))
+XLSX_PATH = os.environ.get('LANDMGMT_XLSX', os.path.join(SURVEY_DIR, 'ตารางแปลงสอบทาน2.xlsx'))
+SHP_PATH = os.environ.get('LANDMGMT_SHP', os.path.join(SURVEY_DIR, 'Merge_แปลงสอบทาน'))
+OUT_DIR = os.environ.get('LANDMGMT_OUT_DIR', TOOLS_DIR)
+
+
+def tool_path(name):
+    """path ของไฟล์ผลลัพธ์ใน tools/ (รายงาน .txt ฯลฯ) — หรือ LANDMGMT_OUT_DIR (เช่นตอน benchmark)"""
+    return os.path.join(OUT_DIR, name)
+
+
+# ============================================================
+# .env
+# ============================================================
+def read_env(path=None):
+    env = {}
+    path = path or ENV_PATH
+    if not os.path.exists(path):
+        return env
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            if '=' in line:
+                k, v = line.split('=', 1)
+                env[k.strip()] = v.strip()
+    return env
+
+
+def db_config(env=None):
+    """ค่าเชื่อมต่อ DB — ตัวแปรใน environment มาก่อน .env (เหมือน PHP getenv)
+    และใช้ MYSQL_URL (Railway) ถ้ามี ไม่งั้นใช้ DB_HOST/DB_PORT/..."""
+    if env is None:
+        env = dict(read_env(), **os.environ)
+    mysql_url = env.get('MYSQL_URL', '') or env.get('MYSQLDATABASE_URL', '')
+    if mysql_url:
+        p = urlparse(mysql_url)
+        return {
+            'host': p.hostname or '127.0.0.1',
+            'port': p.port or 3306,
+            'user': p.username or 'root',
+            'password': p.password or '',
+            'database': (p.path or '/land_management').lstrip('/'),
+        }
+    return {
+        'host': env.get('DB_HOST', '127.0.0.1'),
+        'port': int(env.get('DB_PORT', '3306')),
+        'user': env.get('DB_USER', 'root'),
+        'password': env.get('DB_PASS', ''),
+        'database': env.get('DB_NAME', 'land_management'),
+    }
@@ -0,0 +1,195 @@
+"""
+Connection MySQL ที่ใช้ร่วมกันทุก tool
+
+ไม่เชื่อมต่อตอน import — pool และ connection ถูกสร้างครั้งแรกที่เรียกใช้
+- get_connection(): connection หลักของ process (tool หลายตัวที่รันจาก driver เดียวกันใช้ร่วมกัน)
+- get_pool().connection(): ยืม connection จาก pool สำหรับ worker หลาย thread
+- query()/query_one(): อ่านข้อมูลแบบ retry + reconnect เมื่อเจอ "MySQL server has gone away"
+  (ใช้กับ SELECT เท่านั้น — ห้ามใช้ระหว่าง transaction ที่ยังไม่ commit เพราะ reconnect แล้วงานที่ค้างจะหาย)
+"""
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from . import config
+
+# error code ที่แปลว่า connection หลุด: 2003 connect ไม่ได้, 2006 server has gone away,
+# 2013 lost connection during query, 2055 lost connection (SSL/socket)
+DISCONNECT_ERRORS = (2003, 2006, 2013, 2055)
+
+POOL_SIZE = int(os.environ.get('LANDMGMT_POOL_SIZE', '4'))
+
+
+def connect(**overrides):
+    """เปิด connection ใหม่ (ไม่ผ่าน pool)"""
+    import pymysql
+    params = dict(config.db_config(), charset='utf8mb4', autocommit=False, connect_timeout=10)
+    params.update(overrides)
+    return pymysql.connect(**params)
+
+
+def is_disconnect(ex):
+    import pymysql
+    if isinstance(ex, pymysql.err.InterfaceError):
+        return True
+    return (isinstance(ex, pymysql.err.OperationalError)
+            and bool(ex.args) and ex.args[0] in DISCONNECT_ERRORS)
+
+
+# ============================================================
+# Pool
+# ============================================================
+class ConnectionPool:
+    """pool ขนาดคงที่ — connection ที่ว่างนานเกิน ping_interval จะถูก ping ก่อนส่งออก
+    ถ้า ping ไม่ผ่านจะ reconnect หรือเปิดใหม่แทน"""
+
+    def __init__(self, size=POOL_SIZE, ping_interval=30.0, **overrides):
+        self.size = size
+        self.ping_interval = ping_interval
+        self.overrides = overrides
+        self._idle = []       # [(conn, last_used)]
+        self._in_use = 0
+        self._cond = threading.Condition()
+
+    def acquire(self, timeout=None):
+        with self._cond:
+            while not self._idle and self._in_use >= self.size:
+                if not self._cond.wait(timeout):
+                    raise TimeoutError(f"ไม่มี connection ว่างใน pool (size={self.size})")
+            conn, last_used = self._idle.pop() if self._idle else (None, 0.0)
+            self._in_use += 1
+        try:
+            if conn is None:
+                conn = connect(**self.overrides)
+            elif not conn.open or time.monotonic() - last_used > self.ping_interval:
+                conn = self._health_check(conn)
+        except BaseException:
+            with self._cond:
+                self._in_use -= 1
+                self._cond.notify()
+            raise
+        return conn
+
+    def _health_check(self, conn):
+        try:
+            conn.ping(reconnect=True)
+            return conn
+        except Exception:
+            try:
+                conn.close()
+            except Exception:
+                pass
+            return connect(**self.overrides)
+
+    def release(self, conn, discard=False):
+        with self._cond:
+            self._in_use -= 1
+            if not discard and conn.open:
+                self._idle.append((conn, time.monotonic()))
+            else:
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self):
+        """ยืม connection — commit/rollback เป็นหน้าที่ผู้ใช้, error ที่ทำให้หลุดจะทิ้ง connection นั้น"""
+        conn = self.acquire()
+        try:
+            yield conn
+        except BaseException as ex:
+            broken = is_disconnect(ex)
+            if not broken:
+                try:
+                    conn.rollback()
+                except Exception:
+                    broken = True
+            self.release(conn, discard=broken)
+            raise
+        else:
+            self.release(conn)
+
+    def close_all(self):
+        with self._cond:
+            for conn, _ in self._idle:
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+            self._idle = []
+
+
+_pool = None
+_conn = None
+_lock = threading.Lock()
+
+
+def get_pool():
+    global _pool
+    with _lock:
+        if _pool is None:
+            _pool = ConnectionPool()
+        return _pool
+
+
+def get_connection():
+    """connection หลักที่ใช้ร่วมกันใน process — ยืมจาก pool ครั้งแรกที่เรียก"""
+    global _conn
+    if _conn is None:
+        _conn = get_pool().acquire()
+    elif not _conn.open:
+        _conn.ping(reconnect=True)
+    return _conn
+
+
+def dict_cursor(conn=None):
+    import pymysql
+    return (conn or get_connection()).cursor(pymysql.cursors.DictCursor)
+
+
+def close():
+    """คืน connection หลักและปิด pool"""
+    global _conn, _pool
+    if _conn is not None:
+        get_pool().release(_conn, discard=True)
+        _conn = None
+    if _pool is not None:
+        _pool.close_all()
+        _pool = None
+
+
+def describe():
+    c = config.db_config()
+    return f"{c['host']}:{c['port']}/{c['database']}"
+
+
+# ============================================================
+# Read with retry
+# ============================================================
+def query(sql, args=None, as_dict=True, retries=3, backoff=0.5):
+    """SELECT แล้วคืนทุกแถว — ถ้า connection หลุดจะ reconnect แล้วลองใหม่ (รอ 0.5, 1, 2 วินาที)"""
+    import pymysql
+    for attempt in range(retries + 1):
+        conn = None
+        try:
+            conn = get_connection()
+            with conn.cursor(pymysql.cursors.DictCursor if as_dict else None) as cur:
+                cur.execute(sql, args)
+                return cur.fetchall()
+        except Exception as ex:
+            if attempt == retries or not is_disconnect(ex):
+                raise
+            time.sleep(backoff * 2 ** attempt)
+            if conn is not None:
+                try:
+                    conn.ping(reconnect=True)
+                except Exception:
+                    pass  # ping พลาด — รอบถัดไปจะลองใหม่
+
+
+def query_one(sql, args=None, as_dict=True, retries=3, backoff=0.5):
+    rows = query(sql, args, as_dict, retries, backoff)
+    return rows[0] if rows else None
@@ -0,0 +1,264 @@
+"""
+จับคู่ DUP plots กับ original (SPAR_CODE เดียวกัน, plot_code ไม่มี _DUP)
+
+ใช้ 2 query เสมอไม่ว่าจะมี DUP กี่แปลง:
+  1) DUP ทั้งหมด
+  2) original ทั้งหมดของ SPAR_CODE ที่มี DUP
+แล้วจับคู่ใน memory — แทนการ query หา original ทีละ DUP (N+1)
+
+fix_dup.py ใช้ build_plan() คำนวณ action ทั้งหมดก่อน เขียนเป็น plan (.json)
+แล้ว apply_plan() รันใน transaction เดียว
+หรือ apply_plan_async() กระจายชุด DELETE/UPDATE ไปหลาย connection (รันซ้ำได้ถ้าพลาดกลางทาง)
+"""
+import asyncio
+import json
+from datetime import datetime
+
+from . import db
+
+PLOT_COLS = """
+    lp.plot_id, lp.plot_code, lp.spar_code, lp.num_apar, lp.apar_no,
+    lp.area_rai, lp.area_ngan, lp.area_sqwa, lp.ptype,
+    v.id_card_number, v.prefix, v.first_name, v.last_name
+"""
+
+DUP_SQL = f"""
+    SELECT {PLOT_COLS}
+    FROM land_plots lp
+    LEFT JOIN villagers v ON lp.villager_id = v.villager_id
+    WHERE lp.plot_code LIKE '%%_DUP%%'
+    ORDER BY lp.spar_code, lp.num_apar
+"""
+
+ORIG_SQL = f"""
+    SELECT {PLOT_COLS}
+    FROM land_plots lp
+    LEFT JOIN villagers v ON lp.villager_id = v.villager_id
+    WHERE lp.plot_code NOT LIKE '%%_DUP%%'
+      AND lp.spar_code IN (SELECT spar_code FROM land_plots WHERE plot_code LIKE '%%_DUP%%')
+    ORDER BY lp.spar_code, lp.plot_id
+"""
+
+
+def pair_originals(dups, origs):
+    """[(dup, orig หรือ None)] — SPAR_CODE ที่มี original หลายแปลงใช้แปลงแรก (plot_id น้อยสุด)"""
+    first = {}
+    for o in origs:
+        first.setdefault(o['spar_code'], o)
+    return [(d, first.get(d['spar_code'])) for d in dups]
+
+
+def fetch_dup_pairs(cur=None):
+    """อ่าน DUP + original แล้วจับคู่
+    cur: DictCursor ของ transaction ที่กำลังทำอยู่ (fix_dup) — ไม่ส่งมาจะอ่านผ่าน db.query (retry ได้)"""
+    if cur is None:
+        dups = db.query(DUP_SQL)
+        origs = db.query(ORIG_SQL)
+    else:
+        cur.execute(DUP_SQL)
+        dups = cur.fetchall()
+        cur.execute(ORIG_SQL)
+        origs = cur.fetchall()
+    return pair_originals(dups, origs)
+
+
+# ============================================================
+# Plan
+# ============================================================
+def new_plot_code(dp, geo_diff):
+    """plot_code ใหม่ของ DUP ที่ต้องเก็บไว้"""
+    if (dp['spar_code'], dp['num_apar']) in geo_diff:
+        return f"{dp['spar_code']}_{dp['num_apar']}_B"
+    return f"{dp['spar_code']}_{dp['num_apar']}"
+
+
+def build_plan(pairs, geo_diff):
+    """คำนวณ action ทั้งหมดก่อนแตะ DB
+    - geo-diff: SPAR+NUM เดียวกันแต่ polygon ต่างกัน → rename เป็น <SPAR>_<NUM>_B
+    - ซ้ำจริง (NUM_APAR เหมือน original) → delete
+    - NUM_APAR ต่างกัน → rename เป็น <SPAR>_<NUM>"""
+    actions = []
+    for dp, orig in pairs:
+        key = (dp['spar_code'], dp['num_apar'])
+        base = {'plot_id': dp['plot_id'], 'plot_code': dp['plot_code'],
+                'spar_code': dp['spar_code'], 'num_apar': dp['num_apar'],
+                'orig_plot_id': orig['plot_id'] if orig else None}
+        if key in geo_diff:
+            actions.append(dict(base, action='rename', reason='geo-diff',
+                                new_code=new_plot_code(dp, geo_diff)))
+        elif orig and orig['num_apar'] == dp['num_apar']:
+            actions.append(dict(base, action='delete', reason='dup-of-original'))
+        else:
+            actions.append(dict(base, action='rename', reason='diff-num',
+                                new_code=new_plot_code(dp, geo_diff)))
+    return {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'database': db.describe(),
+        'geo_diff': sorted([list(k) for k in geo_diff]),
+        'summary': {
+            'delete': sum(1 for a in actions if a['action'] == 'delete'),
+            'rename': sum(1 for a in actions if a['action'] == 'rename'),
+        },
+        'actions': actions,
+    }
+
+
+def write_plan(plan, path):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(plan, f, ensure_ascii=False, indent=2)
+
+
+def load_plan(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+# ============================================================
+# Apply
+# ============================================================
+def _chunks(items, size):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def _placeholders(n):
+    return ', '.join(['%s'] * n)
+
+
+def check_plan(cur, plan, batch_size=500):
+    """plan ยังตรงกับ DB ไหม (plot_id ยังอยู่และ plot_code ยังเป็นค่าเดิม) — คืนรายการที่ไม่ตรง
+    ล็อกแถว (FOR UPDATE) ไว้จนจบ transaction"""
+    expected = {a['plot_id']: a['plot_code'] for a in plan['actions']}
+    found = {}
+    ids = list(expected)
+    for chunk in _chunks(ids, batch_size):
+        cur.execute(f"SELECT plot_id, plot_code FROM land_plots "
+                    f"WHERE plot_id IN ({_placeholders(len(chunk))}) FOR UPDATE", chunk)
+        for r in cur.fetchall():
+            found[r['plot_id']] = r['plot_code']
+    return [(pid, code, found.get(pid)) for pid, code in expected.items() if found.get(pid) != code]
+
+
+def apply_plan(conn, plan, batch_size=500):
+    """รัน plan ใน transaction เดียว: DELETE ... IN (...) และ UPDATE ... CASE ทีละ batch
+    plan ที่ไม่ตรงกับ DB แล้ว (stale) จะไม่ถูกรัน — คืน (deleted, renamed)"""
+    import pymysql
+    deletes = [a['plot_id'] for a in plan['actions'] if a['action'] == 'delete']
+    renames = [(a['plot_id'], a['new_code']) for a in plan['actions'] if a['action'] == 'rename']
+
+    cur = conn.cursor(pymysql.cursors.DictCursor)
+    try:
+        stale = check_plan(cur, plan, batch_size)
+        if stale:
+            raise RuntimeError(f"plan ไม่ตรงกับ DB แล้ว {len(stale)} รายการ เช่น plot_id={stale[0][0]} "
+                               f"(plan: {stale[0][1]}, DB: {stale[0][2]}) — สร้าง plan ใหม่")
+
+        deleted = 0
+        for chunk in _chunks(deletes, batch_size):
+            cur.execute(f"DELETE FROM land_plots WHERE plot_id IN ({_placeholders(len(chunk))})", chunk)
+            deleted += cur.rowcount
+
+        renamed = 0
+        for chunk in _chunks(renames, batch_size):
+            case = ' '.join(['WHEN %s THEN %s'] * len(chunk))
+            args = [v for pair in chunk for v in pair] + [pid for pid, _ in chunk]
+            cur.execute(f"UPDATE land_plots SET plot_code = CASE plot_id {case} END, data_issues = NULL "
+                        f"WHERE plot_id IN ({_placeholders(len(chunk))})", args)
+            renamed += cur.rowcount
+
+        conn.commit()
+        return deleted, renamed
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+
+
+# ============================================================
+# Apply หลาย connection (asyncio) — ไม่ใช่ transaction เดียว รันซ้ำได้
+# ============================================================
+def split_actions(cur, plan, batch_size=500):
+    """แยก action ตามสถานะใน DB ตอนนี้ -> (ยังไม่ทำ, ทำไปแล้ว, ไม่ตรงกับ DB)
+    ทำไปแล้ว = delete ที่ plot_id หายแล้ว / rename ที่ plot_code เป็นชื่อใหม่แล้ว (จากรอบก่อนที่พลาดกลางทาง)"""
+    found = {}
+    ids = [a['plot_id'] for a in plan['actions']]
+    for chunk in _chunks(ids, batch_size):
+        cur.execute(f"SELECT plot_id, plot_code FROM land_plots "
+                    f"WHERE plot_id IN ({_placeholders(len(chunk))})", chunk)
+        for r in cur.fetchall():
+            found[r['plot_id']] = r['plot_code']
+
+    pending, done, stale = [], [], []
+    for a in plan['actions']:
+        code = found.get(a['plot_id'])
+        if code == a['plot_code']:
+            pending.append(a)
+        elif (a['action'] == 'delete' and code is None) or \
+                (a['action'] == 'rename' and code == a['new_code']):
+            done.append(a)
+        else:
+            stale.append((a['plot_id'], a['plot_code'], code))
+    return pending, done, stale
+
+
+def _guard(chunk):
+    """เงื่อนไข plot_code ยังเป็นค่าตาม plan (กันแถวที่ถูกแก้ระหว่างตรวจกับรัน)"""
+    case = ' '.join(['WHEN %s THEN %s'] * len(chunk))
+    return f"plot_code = CASE plot_id {case} END", [v for a in chunk for v in (a['plot_id'], a['plot_code'])]
+
+
+async def _delete_chunk(cur, chunk):
+    guard, guard_args = _guard(chunk)
+    await cur.execute(f"DELETE FROM land_plots WHERE plot_id IN ({_placeholders(len(chunk))}) "
+                      f"AND {guard}", [a['plot_id'] for a in chunk] + guard_args)
+    if cur.rowcount != len(chunk):
+        raise RuntimeError(f"plan ไม่ตรงกับ DB ระหว่างรัน (DELETE ได้ {cur.rowcount}/{len(chunk)}) — สร้าง plan ใหม่")
+    return cur.rowcount
+
+
+async def _rename_chunk(cur, chunk):
+    guard, guard_args = _guard(chunk)
+    case = ' '.join(['WHEN %s THEN %s'] * len(chunk))
+    args = ([v for a in chunk for v in (a['plot_id'], a['new_code'])]
+            + [a['plot_id'] for a in chunk] + guard_args)
+    await cur.execute(f"UPDATE land_plots SET plot_code = CASE plot_id {case} END, data_issues = NULL "
+                      f"WHERE plot_id IN ({_placeholders(len(chunk))}) AND {guard}", args)
+    if cur.rowcount != len(chunk):
+        raise RuntimeError(f"plan ไม่ตรงกับ DB ระหว่างรัน (UPDATE ได้ {cur.rowcount}/{len(chunk)}) — สร้าง plan ใหม่")
+    return cur.rowcount
+
+
+def apply_plan_async(plan, connections=4, batch_size=500):
+    """รัน plan ด้วยหลาย connection (landmgmt/aiodb.py) ชุดละ 1 transaction
+    DELETE ทั้งหมดก่อน แล้วจึง UPDATE (ชื่อใหม่อาจชนกับแถวที่กำลังจะถูกลบ)
+    action ที่ทำไปแล้วจากรอบก่อนจะถูกข้าม — คืน (deleted, renamed, already_done)"""
+    from . import aiodb
+    aiodb.require_aiomysql()
+
+    conn = db.get_connection()
+    cur = db.dict_cursor(conn)
+    try:
+        pending, done, stale = split_actions(cur, plan, batch_size)
+        conn.commit()   # จบ read transaction — ไม่ถือ snapshot ไว้ระหว่าง connection อื่นเขียน
+    finally:
+        cur.close()
+    if stale:
+        raise RuntimeError(f"plan ไม่ตรงกับ DB แล้ว {len(stale)} รายการ เช่น plot_id={stale[0][0]} "
+                           f"(plan: {stale[0][1]}, DB: {stale[0][2]}) — สร้าง plan ใหม่")
+
+    deletes = aiodb.chunks([a for a in pending if a['action'] == 'delete'], batch_size)
+    renames = aiodb.chunks([a for a in pending if a['action'] == 'rename'], batch_size)
+    counts = {'delete': 0, 'rename': 0}
+
+    def on_done(kind):
+        def done_cb(chunk, n):
+            counts[kind] += n
+        return done_cb
+
+    async def run():
+        await aiodb.run_lanes(aiodb.spread(deletes, connections), _delete_chunk, on_done=on_done('delete'))
+        await aiodb.run_lanes(aiodb.spread(renames, connections), _rename_chunk, on_done=on_done('rename'))
+
+    asyncio.run(run())
+    return counts['delete'], counts['rename'], len(done)
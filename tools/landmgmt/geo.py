@@ -0,0 +1,125 @@
+"""
+แปลงพิกัด UTM (WGS84) -> Lat/Lng
+
+- UTMZone: ค่าคงที่ของ ellipsoid/โซน คำนวณครั้งเดียวต่อโซน
+- utm_to_latlng(): แปลงทีละจุด (pure Python)
+- utm_to_latlng_array(): แปลงทั้งคอลัมน์ E/N หรือ vertex ของ polygon ในครั้งเดียว (NumPy)
+ผลลัพธ์ปัดเป็น 7 ตำแหน่งทศนิยมเหมือนกันทั้งสองแบบ
+"""
+import math
+from functools import lru_cache
+
+try:
+    import numpy as np
+except ImportError:  # numpy เป็น optional — ใช้แบบทีละจุดแทน
+    np = None
+
+
+class UTMZone:
+    """Transverse Mercator inverse (Krüger series) สำหรับ 1 โซน"""
+
+    def __init__(self, zone=47, northern=True):
+        a = 6378137.0
+        f = 1 / 298.257223563
+        e = math.sqrt(2 * f - f * f)
+        self.zone = zone
+        self.northern = northern
+        self.a = a
+        self.k0 = 0.9996
+        self.ee = e * e
+        self.e2 = e * e / (1 - e * e)
+        self.mu_div = a * (1 - e*e/4 - 3*e**4/64 - 5*e**6/256)
+        e1 = (1 - math.sqrt(1 - e*e)) / (1 + math.sqrt(1 - e*e))
+        self.c2 = 3*e1/2 - 27*e1**3/32
+        self.c4 = 21*e1**2/16 - 55*e1**4/32
+        self.c6 = 151*e1**3/96
+        self.c8 = 1097*e1**4/512
+        self.lng0 = math.radians((zone - 1) * 6 - 180 + 3)
+
+    def to_latlng(self, easting, northing):
+        """แปลง 1 จุด -> (lat, lng)"""
+        x = easting - 500000.0
+        y = northing if self.northern else northing - 10000000.0
+
+        mu = (y / self.k0) / self.mu_div
+        phi1 = (mu
+            + self.c2 * math.sin(2*mu)
+            + self.c4 * math.sin(4*mu)
+            + self.c6 * math.sin(6*mu)
+            + self.c8 * math.sin(8*mu))
+
+        e2 = self.e2
+        sin_phi = math.sin(phi1)
+        C1 = e2 * math.cos(phi1)**2
+        T1 = math.tan(phi1)**2
+        N1 = self.a / math.sqrt(1 - self.ee * sin_phi**2)
+        R1 = self.a * (1 - self.ee) / (1 - self.ee * sin_phi**2)**1.5
+        D = x / (N1 * self.k0)
+
+        lat = phi1 - (N1 * math.tan(phi1) / R1) * (
+            D**2/2
+            - (5 + 3*T1 + 10*C1 - 4*C1**2 - 9*e2) * D**4/24
+            + (61 + 90*T1 + 298*C1 + 45*T1**2 - 252*e2 - 3*C1**2) * D**6/720
+        )
+        lng = self.lng0 + (D - (1 + 2*T1 + C1) * D**3/6
+            + (5 - 2*C1 + 28*T1 - 3*C1**2 + 8*e2 + 24*T1**2) * D**5/120) / math.cos(phi1)
+
+        return round(math.degrees(lat), 7), round(math.degrees(lng), 7)
+
+    def to_latlng_array(self, easting, northing):
+        """แปลงทั้ง array ของ E/N -> (lat array, lng array)"""
+        if np is None:
+            raise RuntimeError("utm_to_latlng_array ต้องใช้ numpy (pip install numpy)")
+        x = np.asarray(easting, dtype=np.float64) - 500000.0
+        y = np.asarray(northing, dtype=np.float64)
+        if not self.northern:
+            y = y - 10000000.0
+
+        mu = (y / self.k0) / self.mu_div
+        phi1 = (mu
+            + self.c2 * np.sin(2*mu)
+            + self.c4 * np.sin(4*mu)
+            + self.c6 * np.sin(6*mu)
+            + self.c8 * np.sin(8*mu))
+
+        e2 = self.e2
+        sin_phi = np.sin(phi1)
+        tan_phi = np.tan(phi1)
+        cos_phi = np.cos(phi1)
+        C1 = e2 * cos_phi**2
+        T1 = tan_phi**2
+        N1 = self.a / np.sqrt(1 - self.ee * sin_phi**2)
+        R1 = self.a * (1 - self.ee) / (1 - self.ee * sin_phi**2)**1.5
+        D = x / (N1 * self.k0)
+
+        lat = phi1 - (N1 * tan_phi / R1) * (
+            D**2/2
+            - (5 + 3*T1 + 10*C1 - 4*C1**2 - 9*e2) * D**4/24
+            + (61 + 90*T1 + 298*C1 + 45*T1**2 - 252*e2 - 3*C1**2) * D**6/720
+        )
+        lng = self.lng0 + (D - (1 + 2*T1 + C1) * D**3/6
+            + (5 - 2*C1 + 28*T1 - 3*C1**2 + 8*e2 + 24*T1**2) * D**5/120) / cos_phi
+
+        return np.round(np.degrees(lat), 7), np.round(np.degrees(lng), 7)
+
+
+@lru_cache(maxsize=None)
+def get_zone(zone=47, northern=True):
+    return UTMZone(zone, northern)
+
+
+def utm_to_latlng(easting, northing, zone=47, northern=True):
+    return get_zone(zone, northern).to_latlng(easting, northing)
+
+
+def utm_to_latlng_array(easting, northing, zone=47, northern=True):
+    return get_zone(zone, northern).to_latlng_array(easting, northing)
+
+
+def ring_to_latlng(points, zone=47, northern=True):
+    """แปลง vertex ของ polygon ring [(E, N), ...] -> array (n, 2) ของ [lat, lng] (ลำดับแบบ Leaflet)"""
+    if np is None:
+        raise RuntimeError("ring_to_latlng ต้องใช้ numpy (pip install numpy)")
+    pts = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    lat, lng = utm_to_latlng_array(pts[:, 0], pts[:, 1], zone, northern)
+    return np.column_stack((lat, lng))
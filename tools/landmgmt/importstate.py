@@ -0,0 +1,187 @@
+"""
+สถานะของการ import ครั้งก่อน — hash ของแต่ละแถว (หลัง transform) สำหรับ upsert แบบ incremental
+
+key ของแถวคือ plot_code|villager_key (SPAR_CODE|IDCARD) ถ้าซ้ำในไฟล์เดียวกันต่อท้าย #2, #3 ...
+แถวที่ไม่มี SPAR_CODE/IDCARD ใช้รหัส IMP-/TEMP_ ตามเลขแถว จึงถือว่าเปลี่ยนถ้าแถวเลื่อน
+
+diff() แยกแถวเป็น ใหม่ / เปลี่ยน / เหมือนเดิม / ถูกลบออกจากไฟล์
+แถวที่ต้องเขียนรวมแถวอื่นที่ใช้ plot_code หรือเลขบัตรเดียวกันด้วย
+เพื่อให้ผลใน DB เหมือน import ทั้งไฟล์ (แถวหลังทับแถวก่อน)
+
+checkpoint (upsert --commit-every / --resume): เลขแถวสุดท้ายที่ commit แล้ว + sha256 ของไฟล์ xlsx
+ใช้ต่อได้เฉพาะ DB และไฟล์เดียวกัน ลบทิ้งเมื่อ import จบครบ
+"""
+import hashlib
+import json
+import os
+from datetime import datetime
+
+STATE_VERSION = 2  # 2: hash รวม latitude/longitude ที่คำนวณใน transform แล้ว
+CHECKPOINT_VERSION = 1
+
+
+def norm_key(key):
+    # MySQL collation (_ci, PAD SPACE) ไม่สนตัวพิมพ์และช่องว่างท้าย — dict ต้องเทียบแบบเดียวกัน
+    return key.rstrip().upper()
+
+
+def row_hash(rec):
+    """hash ของข้อมูลที่จะเขียน DB (ไม่รวมเลขแถว)"""
+    payload = {k: v for k, v in rec.items() if k != 'row_num'}
+    data = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.blake2b(data.encode('utf-8'), digest_size=16).hexdigest()
+
+
+def keyed(recs):
+    """[(key, rec)] ตามลำดับแถว"""
+    seen = {}
+    out = []
+    for rec in recs:
+        key = f"{rec['plot_code']}|{rec['villager_key']}"
+        n = seen[key] = seen.get(key, 0) + 1
+        out.append((key if n == 1 else f"{key}#{n}", rec))
+    return out
+
+
+# ============================================================
+# State file
+# ============================================================
+def _write_json(path, data):
+    """เขียนไฟล์ใหม่แล้วค่อยแทนที่ — ไฟล์เดิมไม่เสียถ้า process ตายกลางทาง"""
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+def load(path, database):
+    """(rows, เหตุผลถ้าใช้ไม่ได้) — rows = {key: {hash, plot_code, villager_key, row_num}}"""
+    if not os.path.exists(path):
+        return None, 'ยังไม่มี state จากครั้งก่อน'
+    try:
+        with open(path, encoding='utf-8') as f:
+            state = json.load(f)
+    except (OSError, ValueError) as ex:
+        return None, f'อ่าน state ไม่ได้ ({ex})'
+    if state.get('version') != STATE_VERSION:
+        return None, 'state เป็นรูปแบบเก่า'
+    if state.get('database') != database:
+        return None, f"state เป็นของ DB {state.get('database')}"
+    return state['rows'], None
+
+
+def _entry(rec):
+    return {'hash': row_hash(rec), 'plot_code': rec['plot_code'],
+            'villager_key': rec['villager_key'], 'row_num': rec['row_num']}
+
+
+def entries(keyed_recs):
+    return {key: _entry(rec) for key, rec in keyed_recs}
+
+
+class Entries:
+    """entries(keyed(recs)) แบบสะสมทีละแถว — ไม่ต้องเก็บ record ทั้งแถวไว้จนจบ (upsert แบบ stream)"""
+
+    def __init__(self):
+        self.rows = {}
+        self._seen = {}
+
+    def add(self, rec):
+        key = f"{rec['plot_code']}|{rec['villager_key']}"
+        n = self._seen[key] = self._seen.get(key, 0) + 1
+        self.rows[key if n == 1 else f"{key}#{n}"] = _entry(rec)
+
+
+def save(path, database, source_sha, rows):
+    state = {
+        'version': STATE_VERSION,
+        'database': database,
+        'source_sha256': source_sha,
+        'saved': datetime.now().isoformat(timespec='seconds'),
+        'rows': rows,
+    }
+    _write_json(path, state)
+
+
+# ============================================================
+# Checkpoint
+# ============================================================
+def load_checkpoint(path, database, source_sha):
+    """(checkpoint, เหตุผลถ้าใช้ไม่ได้) — checkpoint = {row_num, rows_done, stats, ...}"""
+    if not os.path.exists(path):
+        return None, 'ไม่มี checkpoint'
+    try:
+        with open(path, encoding='utf-8') as f:
+            cp = json.load(f)
+    except (OSError, ValueError) as ex:
+        return None, f'อ่าน checkpoint ไม่ได้ ({ex})'
+    if cp.get('version') != CHECKPOINT_VERSION:
+        return None, 'checkpoint เป็นรูปแบบเก่า'
+    if cp.get('database') != database:
+        return None, f"checkpoint เป็นของ DB {cp.get('database')}"
+    if cp.get('source_sha256') != source_sha:
+        return None, 'ไฟล์ xlsx เปลี่ยนหลังจากสร้าง checkpoint'
+    return cp, None
+
+
+def save_checkpoint(path, database, source_sha, row_num, rows_done, stats):
+    _write_json(path, {
+        'version': CHECKPOINT_VERSION,
+        'database': database,
+        'source_sha256': source_sha,
+        'row_num': row_num,
+        'rows_done': rows_done,
+        'stats': stats,
+        'saved': datetime.now().isoformat(timespec='seconds'),
+    })
+
+
+def clear_checkpoint(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+# ============================================================
+# Diff
+# ============================================================
+class Delta:
+    def __init__(self, inserted, changed, unchanged, removed, apply):
+        self.inserted = inserted    # [key]
+        self.changed = changed      # [key]
+        self.unchanged = unchanged  # จำนวน
+        self.removed = removed      # [entry เดิมจาก state]
+        self.apply = apply          # [rec] ที่ต้องเขียน ตามลำดับแถว
+
+
+def diff(prev_rows, keyed_recs, current):
+    """เทียบ state เดิมกับแถวปัจจุบัน — current คือ entries(keyed_recs)"""
+    inserted, changed = [], []
+    dirty = set()
+    for i, (key, _) in enumerate(keyed_recs):
+        old = prev_rows.get(key)
+        if old is None:
+            inserted.append(key)
+            dirty.add(i)
+        elif old['hash'] != current[key]['hash']:
+            changed.append(key)
+            dirty.add(i)
+    removed = [dict(entry, key=key) for key, entry in prev_rows.items() if key not in current]
+
+    # แถวที่ใช้ plot_code / เลขบัตรเดียวกับแถวที่ต้องเขียน ต้องเขียนด้วย (วนจนไม่มีเพิ่ม)
+    by_plot, by_villager = {}, {}
+    for i, (_, rec) in enumerate(keyed_recs):
+        by_plot.setdefault(norm_key(rec['plot_code']), []).append(i)
+        by_villager.setdefault(norm_key(rec['villager_key']), []).append(i)
+    todo = list(dirty)
+    while todo:
+        rec = keyed_recs[todo.pop()][1]
+        for j in by_plot[norm_key(rec['plot_code'])] + by_villager[norm_key(rec['villager_key'])]:
+            if j not in dirty:
+                dirty.add(j)
+                todo.append(j)
+
+    apply = [rec for i, (_, rec) in enumerate(keyed_recs) if i in dirty]
+    unchanged = len(keyed_recs) - len(inserted) - len(changed)
+    return Delta(inserted, changed, unchanged, removed, apply)
@@ -0,0 +1,177 @@
+"""
+วัดเวลาแยกตามขั้นและตามรูปแบบ SQL (opt-in — upsert_xlsx.py --instrument)
+
+- Recorder.stage(name): เวลา wall ของขั้น (รวมทุกครั้งที่เข้า) + จำนวนครั้ง
+- Recorder.cursor(cur): ห่อ cursor ของ pymysql — ทุก execute/executemany ถูกนับตาม SQL ที่ normalize แล้ว
+  (ตัดค่าคงที่/placeholder เป็น ?, ยุบ whitespace และรายการ (?, ?, ...)) → จำนวนครั้ง, ms รวม, ms สูงสุด, rowcount รวม
+- Recorder.iterate(iterable, name): เวลาที่รอ next() (เช่นรอ process pool แปลงแถว)
+- NULL: ไม่วัดอะไรเลย — ใช้แทนเมื่อไม่ได้สั่ง --instrument จึงไม่ต้องเช็คในโค้ดที่เรียก
+"""
+import json
+import re
+import time
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+from functools import lru_cache
+
+_STRING = re.compile(r"'(?:[^'\\]|\\.|'')*'")
+_NUMBER = re.compile(r'(?<![\w.])\d+(?:\.\d+)?\b')
+_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)+\s*\)')
+_ROWS = re.compile(r'\(\?, \.\.\.\)(?:\s*,\s*\(\?, \.\.\.\))+')
+
+
+@lru_cache(maxsize=512)
+def normalize(sql):
+    """รูปแบบของ SQL — คำสั่งเดียวกันที่ต่างแค่ค่าจะได้ข้อความเดียวกัน"""
+    s = _STRING.sub('?', sql).replace('%s', '?')
+    s = _NUMBER.sub('?', s)
+    s = ' '.join(s.split())
+    s = _LIST.sub('(?, ...)', s)
+    return _ROWS.sub('(?, ...), ...', s)
+
+
+class TimedCursor:
+    """cursor ที่ส่งต่อทุกอย่างให้ cursor จริง แต่จับเวลา execute/executemany"""
+
+    def __init__(self, cur, recorder):
+        self._cur = cur
+        self._rec = recorder
+
+    def execute(self, sql, args=None):
+        t0 = time.perf_counter()
+        try:
+            return self._cur.execute(sql, args)
+        finally:
+            self._rec.query(sql, time.perf_counter() - t0, self._cur.rowcount)
+
+    def executemany(self, sql, args):
+        t0 = time.perf_counter()
+        try:
+            return self._cur.executemany(sql, args)
+        finally:
+            self._rec.query(sql, time.perf_counter() - t0, self._cur.rowcount)
+
+    def __getattr__(self, name):
+        return getattr(self._cur, name)
+
+    def __iter__(self):
+        return iter(self._cur)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return self._cur.__exit__(*exc)
+
+
+class Recorder:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.created = datetime.now()
+        self.stages = {}        # name -> [จำนวนครั้ง, วินาที]
+        self.queries = {}       # SQL ที่ normalize แล้ว -> [จำนวนครั้ง, วินาทีรวม, วินาทีสูงสุด, rowcount รวม]
+
+    # ---------- เก็บค่า ----------
+    def add(self, name, seconds, count=1):
+        s = self.stages.setdefault(name, [0, 0.0])
+        s[0] += count
+        s[1] += seconds
+
+    @contextmanager
+    def stage(self, name):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - t0)
+
+    def query(self, sql, seconds, rowcount=None):
+        key = normalize(sql)
+        q = self.queries.get(key)
+        if q is None:
+            q = self.queries[key] = [0, 0.0, 0.0, 0]
+        q[0] += 1
+        q[1] += seconds
+        if seconds > q[2]:
+            q[2] = seconds
+        if rowcount and rowcount > 0:
+            q[3] += rowcount
+
+    def cursor(self, cur):
+        return TimedCursor(cur, self)
+
+    def iterate(self, iterable, name):
+        """ส่งต่อ item เหมือนเดิม — นับเวลาที่รอแต่ละ next() เป็นขั้น name (1 ครั้งต่อการวนทั้งหมด)"""
+        waited = 0.0
+        it = iter(iterable)
+        try:
+            while True:
+                t0 = time.perf_counter()
+                try:
+                    item = next(it)
+                except StopIteration:
+                    waited += time.perf_counter() - t0
+                    return
+                waited += time.perf_counter() - t0
+                yield item
+        finally:
+            self.add(name, waited)
+
+    # ---------- สรุป ----------
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def to_dict(self, **extra):
+        total = self.elapsed()
+        return dict(extra, created=self.created.isoformat(timespec='seconds'), total_sec=round(total, 4),
+                    stages=[{'stage': k, 'count': c, 'seconds': round(s, 4)} for k, (c, s) in self.stages.items()],
+                    queries=[{'sql': k, 'count': c, 'total_ms': round(t * 1000, 3), 'max_ms': round(m * 1000, 3),
+                              'rows': r}
+                             for k, (c, t, m, r) in sorted(self.queries.items(), key=lambda kv: -kv[1][1])])
+
+    def summary_lines(self, sql_width=70):
+        total = self.elapsed()
+        lines = [f"{'ขั้น':<22}{'ครั้ง':>9}{'วินาที':>11}{'%':>7}"]
+        accounted = 0.0
+        for name, (count, seconds) in self.stages.items():
+            accounted += seconds
+            lines.append(f"{name:<22}{count:>9,}{seconds:>11.3f}{seconds / total * 100 if total else 0:>6.1f}%")
+        rest = max(total - accounted, 0.0)
+        lines.append(f"{'(อื่นๆ)':<22}{'':>9}{rest:>11.3f}{rest / total * 100 if total else 0:>6.1f}%")
+        lines.append(f"{'รวม':<22}{'':>9}{total:>11.3f}")
+        if self.queries:
+            n = sum(q[0] for q in self.queries.values())
+            ms = sum(q[1] for q in self.queries.values()) * 1000
+            lines += ['', f"SQL: {n:,} คำสั่ง, {len(self.queries)} รูปแบบ, {ms:,.0f} ms",
+                      f"{'ครั้ง':>9}{'ms รวม':>11}{'ms สูงสุด':>11}{'แถว':>10}  SQL"]
+            for sql, (count, t, m, rows) in sorted(self.queries.items(), key=lambda kv: -kv[1][1]):
+                text = sql if len(sql) <= sql_width else sql[:sql_width - 3] + '...'
+                lines.append(f"{count:>9,}{t * 1000:>11,.1f}{m * 1000:>11,.1f}{rows:>10,}  {text}")
+        return lines
+
+    def write_json(self, path, **extra):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(**extra), f, ensure_ascii=False, indent=2)
+
+
+class _NullRecorder:
+    """Recorder ที่ไม่ทำอะไร"""
+    _null = nullcontext()
+
+    def add(self, name, seconds, count=1):
+        pass
+
+    def stage(self, name):
+        return self._null
+
+    def query(self, sql, seconds, rowcount=None):
+        pass
+
+    def cursor(self, cur):
+        return cur
+
+    def iterate(self, iterable, name):
+        return iterable
+
+
+NULL = _NullRecorder()
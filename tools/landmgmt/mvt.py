@@ -0,0 +1,231 @@
+"""
+Mapbox Vector Tile (MVT v2, .pbf) สำหรับ tile แบบ static z/x/y — เขียน protobuf เอง (ไม่ต้องติดตั้ง library เพิ่ม)
+
+- lnglat_to_mercator(): [lng, lat] → Web Mercator (EPSG:3857, เมตร)
+- tile_bounds() / tiles_covering(): ขอบเขต tile เป็นเมตร / tile ที่ bbox ครอบคลุม
+- clip_ring(): ตัด ring ให้อยู่ในกรอบ (Sutherland–Hodgman แบบ NumPy ทีละด้าน)
+- Layer: สะสม feature (POLYGON) + properties แล้ว encode เป็น layer message
+- encode_tile(): รวม layer เป็น tile (bytes)
+
+พิกัดใน tile เป็นจำนวนเต็ม 0..extent (y ชี้ลง) — ring นอกพื้นที่บวก (ตามเข็มนาฬิกาบนจอ), ring ในพื้นที่ลบ
+ต้องติดตั้ง numpy
+"""
+import math
+import struct
+
+from .geo import np
+
+EXTENT = 4096
+BUFFER = 64             # หน่วย extent ที่เผื่อรอบ tile กันเส้นขอบขาดตรงรอยต่อ
+EARTH_RADIUS = 6378137.0
+ORIGIN_SHIFT = math.pi * EARTH_RADIUS   # ครึ่งหนึ่งของความกว้างโลก (เมตร)
+MAX_LAT = 85.0511287798
+
+POLYGON = 3
+CMD_MOVE_TO, CMD_LINE_TO, CMD_CLOSE_PATH = 1, 2, 7
+
+
+# ============================================================
+# Web Mercator / tile
+# ============================================================
+def lnglat_to_mercator(lnglat):
+    """ndarray (n, 2) [lng, lat] → (n, 2) [x, y] เมตร"""
+    ll = np.asarray(lnglat, dtype=np.float64).reshape(-1, 2)
+    lat = np.radians(np.clip(ll[:, 1], -MAX_LAT, MAX_LAT))
+    x = np.radians(ll[:, 0]) * EARTH_RADIUS
+    y = np.log(np.tan(math.pi / 4 + lat / 2)) * EARTH_RADIUS
+    return np.column_stack((x, y))
+
+
+def tile_size(z):
+    """ความกว้าง tile (เมตร) ที่ zoom z"""
+    return 2 * ORIGIN_SHIFT / (1 << z)
+
+
+def tile_bounds(z, x, y):
+    """(minx, miny, maxx, maxy) เมตร ของ tile z/x/y (y นับจากขอบบน แบบ XYZ)"""
+    size = tile_size(z)
+    minx = -ORIGIN_SHIFT + x * size
+    maxy = ORIGIN_SHIFT - y * size
+    return minx, maxy - size, minx + size, maxy
+
+
+def tiles_covering(bbox, z):
+    """tile (x, y) ที่ bbox (minx, miny, maxx, maxy) เมตร ครอบคลุมที่ zoom z"""
+    size = tile_size(z)
+    n = 1 << z
+    x0 = max(0, int((bbox[0] + ORIGIN_SHIFT) // size))
+    x1 = min(n - 1, int((bbox[2] + ORIGIN_SHIFT) // size))
+    y0 = max(0, int((ORIGIN_SHIFT - bbox[3]) // size))
+    y1 = min(n - 1, int((ORIGIN_SHIFT - bbox[1]) // size))
+    return [(x, y) for x in range(x0, x1 + 1) for y in range(y0, y1 + 1)]
+
+
+def to_tile_coords(xy, z, x, y, extent=EXTENT):
+    """เมตร → พิกัดใน tile (float, y ชี้ลง)"""
+    minx, _, _, maxy = tile_bounds(z, x, y)
+    k = extent / tile_size(z)
+    return np.column_stack(((xy[:, 0] - minx) * k, (maxy - xy[:, 1]) * k))
+
+
+# ============================================================
+# Clip
+# ============================================================
+def _clip_edge(pts, axis, limit, keep_less):
+    if not len(pts):
+        return pts
+    v = pts[:, axis]
+    inside = v <= limit if keep_less else v >= limit
+    nxt = np.roll(pts, -1, axis=0)
+    nxt_inside = np.roll(inside, -1)
+    vn = nxt[:, axis]
+    with np.errstate(divide='ignore', invalid='ignore'):    # ขอบที่ไม่ข้ามเส้นได้ nan แต่ไม่ถูกใช้
+        t = (limit - v) / (vn - v)
+        cross = pts + t[:, None] * (nxt - pts)
+    cross[:, axis] = limit
+    # แต่ละจุดให้ผลได้ 2 จุดตามลำดับ: จุดเดิม (ถ้าอยู่ใน) + จุดตัด (ถ้าขอบนี้ข้ามเส้น)
+    out = np.stack((pts, cross), axis=1)
+    mask = np.stack((inside, inside != nxt_inside), axis=1)
+    return out[mask]
+
+
+def clip_ring(pts, lo, hi):
+    """ตัด ring (ไม่ปิด, (n, 2)) ให้อยู่ในกรอบ [lo, hi] ทั้งสองแกน"""
+    for axis in (0, 1):
+        pts = _clip_edge(pts, axis, lo, keep_less=False)
+        pts = _clip_edge(pts, axis, hi, keep_less=True)
+    return pts
+
+
+def quantize_ring(pts, exterior):
+    """ปัดเป็นจำนวนเต็ม ตัดจุดซ้ำติดกัน และหมุนทิศตามชนิด ring — คืน None ถ้าไม่เหลือพื้นที่"""
+    g = np.round(pts).astype(np.int64)
+    if len(g):
+        keep = np.any(g != np.roll(g, 1, axis=0), axis=1)
+        g = g[keep] if keep.any() else g[:1]
+    if len(g) < 3:
+        return None
+    area = _signed_area(g)
+    if area == 0:
+        return None
+    if (area > 0) != exterior:
+        g = g[::-1]
+    return g
+
+
+def _signed_area(g):
+    x, y = g[:, 0], g[:, 1]
+    return int((x * np.roll(y, -1) - np.roll(x, -1) * y).sum())
+
+
+# ============================================================
+# Protobuf
+# ============================================================
+def _varint(n):
+    out = bytearray()
+    while n > 0x7F:
+        out.append((n & 0x7F) | 0x80)
+        n >>= 7
+    out.append(n)
+    return bytes(out)
+
+
+def _zigzag(n):
+    return (n << 1) ^ (n >> 63)
+
+
+def _key(field, wire_type):
+    return _varint((field << 3) | wire_type)
+
+
+def _bytes_field(field, data):
+    return _key(field, 2) + _varint(len(data)) + data
+
+
+def _varint_field(field, n):
+    return _key(field, 0) + _varint(n)
+
+
+def _packed(field, values):
+    return _bytes_field(field, b''.join(_varint(v) for v in values))
+
+
+def _value(v):
+    """Value message — string / bool / sint / double"""
+    if isinstance(v, bool):
+        return _varint_field(7, int(v))
+    if isinstance(v, int):
+        return _varint_field(6, _zigzag(v))
+    if isinstance(v, float):
+        return _key(3, 1) + struct.pack('<d', v)
+    return _bytes_field(1, str(v).encode('utf-8'))
+
+
+def _command(cmd, count):
+    return (cmd & 0x7) | (count << 3)
+
+
+def encode_polygon(rings):
+    """rings: [ndarray (n, 2) int ไม่ปิด] (ring นอกตามด้วย ring ใน) → geometry command integers"""
+    out = []
+    cx = cy = 0
+    for ring in rings:
+        pts = ring.tolist()
+        out.append(_command(CMD_MOVE_TO, 1))
+        x, y = pts[0]
+        out += (_zigzag(x - cx), _zigzag(y - cy))
+        cx, cy = x, y
+        out.append(_command(CMD_LINE_TO, len(pts) - 1))
+        for x, y in pts[1:]:
+            out += (_zigzag(x - cx), _zigzag(y - cy))
+            cx, cy = x, y
+        out.append(_command(CMD_CLOSE_PATH, 1))
+    return out
+
+
+class Layer:
+    """layer หนึ่งชั้นใน tile — keys/values ใช้ตารางร่วมกันทั้ง layer"""
+
+    def __init__(self, name, extent=EXTENT):
+        self.name = name
+        self.extent = extent
+        self.features = []
+        self._keys = {}
+        self._values = {}
+
+    def __len__(self):
+        return len(self.features)
+
+    def _index(self, table, item):
+        idx = table.get(item)
+        if idx is None:
+            idx = table[item] = len(table)
+        return idx
+
+    def add_polygon(self, fid, rings, properties):
+        """rings จาก quantize_ring() — ring แรกเป็น ring นอก"""
+        tags = []
+        for k, v in properties.items():
+            if v is None or v == '':
+                continue
+            tags += (self._index(self._keys, k), self._index(self._values, (type(v), v)))
+        self.features.append((fid, tags, encode_polygon(rings)))
+
+    def encode(self):
+        out = [_bytes_field(1, self.name.encode('utf-8'))]
+        for fid, tags, geom in self.features:
+            feat = _varint_field(1, fid)
+            if tags:
+                feat += _packed(2, tags)
+            feat += _varint_field(3, POLYGON) + _packed(4, geom)
+            out.append(_bytes_field(2, feat))
+        out += [_bytes_field(3, k.encode('utf-8')) for k in self._keys]
+        out += [_bytes_field(4, _value(v)) for _, v in self._values]
+        out.append(_varint_field(5, self.extent))
+        out.append(_varint_field(15, 2))
+        return b''.join(out)
+
+
+def encode_tile(layers):
+    """layer ที่ไม่มี feature จะไม่ถูกเขียน — คืน b'' ถ้าว่างทั้ง tile"""
+    return b''.join(_bytes_field(3, layer.encode()) for layer in layers if len(layer))
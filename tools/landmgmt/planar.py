@@ -0,0 +1,177 @@
+"""
+เรขาคณิตของ polygon บนระนาบ (NumPy) — พื้นที่, เส้นรอบรูป, จุดอยู่ใน polygon, พื้นที่ส่วนที่ทับกัน
+
+polygon = [ring ndarray (n, 2), ...] (ring ปิดหรือไม่ปิดก็ได้) — ring ในนับแบบ even-odd
+จึงไม่ขึ้นกับทิศการวนของไฟล์ต้นทาง
+
+intersection_area(): พื้นที่ A ∩ B แบบตรงตัว (ไม่ประมาณด้วย grid) จาก ∮ x dy รอบขอบของ A ∩ B
+ขอบของ A ∩ B = ส่วนของขอบ A ที่อยู่ใน B + ส่วนของขอบ B ที่อยู่ใน A
+ตัดทุกขอบตรงจุดตัดกับอีก polygon แล้วตัดสินแต่ละท่อนจากจุดกึ่งกลาง
+ขอบที่ทับกันพอดี (แปลงข้างเคียงใช้ขอบร่วม) นับครั้งเดียวเมื่อวิ่งทิศเดียวกัน และไม่นับเมื่อวิ่งสวนกัน
+"""
+from .geo import np
+
+EPS = 1e-9      # ระยะ (หน่วยเดียวกับพิกัด หลังย้ายจุดอ้างอิง) ที่ถือว่าอยู่บนเส้น
+
+
+def open_ring(ring):
+    ring = np.asarray(ring, dtype=np.float64).reshape(-1, 2)
+    if len(ring) > 1 and (ring[0] == ring[-1]).all():
+        ring = ring[:-1]
+    return ring
+
+
+def ring_signed_area(ring):
+    """บวก = ทวนเข็มนาฬิกา (แกน y ชี้ขึ้น)"""
+    r = open_ring(ring)
+    x, y = r[:, 0], r[:, 1]
+    return float((x * np.roll(y, -1) - np.roll(x, -1) * y).sum()) / 2
+
+
+def points_in_rings(pts, rings, chunk=4096):
+    """bool (n,) — จุดอยู่ในพื้นที่ของ polygon (even-odd ทุก ring)"""
+    pts = np.asarray(pts, dtype=np.float64).reshape(-1, 2)
+    a = np.concatenate([open_ring(r) for r in rings])
+    b = np.concatenate([np.roll(open_ring(r), -1, axis=0) for r in rings])
+    inside = np.zeros(len(pts), dtype=bool)
+    for s in range(0, len(pts), chunk):
+        px = pts[s:s + chunk, 0:1]
+        py = pts[s:s + chunk, 1:2]
+        cond = (a[:, 1] > py) != (b[:, 1] > py)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            xc = a[:, 0] + (py - a[:, 1]) * (b[:, 0] - a[:, 0]) / (b[:, 1] - a[:, 1])
+        inside[s:s + chunk] = (np.count_nonzero(cond & (px < xc), axis=1) % 2) == 1
+    return inside
+
+
+def orient(rings):
+    """ring นอกทวนเข็ม / ring ในตามเข็ม — ตัดสินจากจำนวน ring อื่นที่ล้อมรอบ (even-odd)"""
+    rings = [open_ring(r) for r in rings if len(open_ring(r)) >= 3]
+    out = []
+    for k, r in enumerate(rings):
+        others = [o for j, o in enumerate(rings) if j != k]
+        hole = bool(others) and bool(points_in_rings(r[:1], others)[0])
+        if (ring_signed_area(r) > 0) == hole:
+            r = r[::-1]
+        out.append(r)
+    return out
+
+
+def area(rings):
+    return sum(ring_signed_area(r) for r in orient(rings))
+
+
+def perimeter(rings):
+    return sum(float(np.hypot(*(np.roll(r, -1, axis=0) - r).T).sum()) for r in map(open_ring, rings))
+
+
+def thinness(rings):
+    """4πA / P² — วงกลม = 1, สี่เหลี่ยมจัตุรัส ≈ 0.785, แถบยาวบางเข้าใกล้ 0"""
+    p = perimeter(rings)
+    return 4 * np.pi * area(rings) / (p * p) if p > 0 else 0.0
+
+
+# ============================================================
+# พื้นที่ส่วนที่ทับกัน
+# ============================================================
+def _edges(rings, box=None):
+    """ขอบ (จุดต้น, จุดปลาย) ที่ยาวไม่เป็นศูนย์ — ให้ box: เฉพาะขอบที่ bbox ทับ box (minx, miny, maxx, maxy)"""
+    a = np.concatenate(rings)
+    b = np.concatenate([np.roll(r, -1, axis=0) for r in rings])
+    keep = np.any(a != b, axis=1)
+    if box is not None:
+        lo, hi = np.minimum(a, b), np.maximum(a, b)
+        keep &= (lo[:, 0] <= box[2]) & (hi[:, 0] >= box[0]) & (lo[:, 1] <= box[3]) & (hi[:, 1] >= box[1])
+    return a[keep], b[keep]
+
+
+def _split_params(pa, pb, qa, qb):
+    """ค่า t (0..1) บนขอบ p แต่ละเส้นที่ต้องตัด — จุดตัดกับขอบ q และปลายขอบ q ที่อยู่บนขอบ p"""
+    d = pb - pa                                     # (m, 2)
+    e = qb - qa                                     # (k, 2)
+    w = qa[None, :, :] - pa[:, None, :]             # (m, k, 2)
+    denom = d[:, None, 0] * e[None, :, 1] - d[:, None, 1] * e[None, :, 0]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t = (w[..., 0] * e[None, :, 1] - w[..., 1] * e[None, :, 0]) / denom
+        u = (w[..., 0] * d[:, None, 1] - w[..., 1] * d[:, None, 0]) / denom
+    cross = (np.abs(denom) > EPS) & (t > 0) & (t < 1) & (u >= -EPS) & (u <= 1 + EPS)
+
+    # ปลายขอบ q ที่อยู่บนขอบ p (รวมกรณีขนานซ้อนกัน)
+    dd = (d * d).sum(axis=1)[:, None]
+    params = [t]
+    masks = [cross]
+    for end in (qa, qb):
+        v = end[None, :, :] - pa[:, None, :]
+        s = (v[..., 0] * d[:, None, 0] + v[..., 1] * d[:, None, 1]) / dd
+        off = np.abs(v[..., 0] * d[:, None, 1] - v[..., 1] * d[:, None, 0]) / np.sqrt(dd)
+        params.append(s)
+        masks.append((off <= EPS) & (s > 0) & (s < 1))
+    return params, masks
+
+
+def _boundary_area(pa, pb, q_rings, qa, qb, count_same_direction):
+    """∮ x dy ของส่วนขอบ p ที่อยู่ใน polygon q (ขอบ p วนตามทิศของ orient())"""
+    if not len(pa):
+        return 0.0
+    if len(qa):
+        params, masks = _split_params(pa, pb, qa, qb)
+        split = np.flatnonzero(np.any(masks[0] | masks[1] | masks[2], axis=1))
+    else:
+        split = []
+    seg_a, seg_b = [pa], [pb]
+    if len(split):
+        whole = np.ones(len(pa), dtype=bool)
+        whole[split] = False
+        seg_a, seg_b = [pa[whole]], [pb[whole]]
+        for i in split:
+            ts = np.unique(np.concatenate([[0.0, 1.0]] + [p[i][m[i]] for p, m in zip(params, masks)]))
+            pts = pa[i] + ts[:, None] * (pb[i] - pa[i])
+            seg_a.append(pts[:-1])
+            seg_b.append(pts[1:])
+    sa, sb = np.concatenate(seg_a), np.concatenate(seg_b)
+    keep = np.any(np.abs(sb - sa) > EPS, axis=1)
+    sa, sb = sa[keep], sb[keep]
+    mid = (sa + sb) / 2
+
+    # ท่อนที่ทับขอบ q พอดี: นับตามทิศ (เทียบกับขอบ q ที่ทับอยู่)
+    e = qb - qa
+    v = mid[:, None, :] - qa[None, :, :]
+    ee = (e * e).sum(axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        s = (v[..., 0] * e[None, :, 0] + v[..., 1] * e[None, :, 1]) / ee
+        off = np.abs(v[..., 0] * e[None, :, 1] - v[..., 1] * e[None, :, 0]) / np.sqrt(ee)
+    on_edge = (off <= EPS) & (s >= 0) & (s <= 1)
+    on_boundary = on_edge.any(axis=1) if len(qa) else np.zeros(len(mid), dtype=bool)
+    same_dir = np.zeros(len(mid), dtype=bool)
+    if on_boundary.any():
+        dseg = sb - sa
+        dot = dseg[:, None, 0] * e[None, :, 0] + dseg[:, None, 1] * e[None, :, 1]
+        same_dir = (on_edge & (dot > 0)).any(axis=1)
+
+    inside = np.zeros(len(mid), dtype=bool)
+    rest = ~on_boundary
+    if rest.any():
+        inside[rest] = points_in_rings(mid[rest], q_rings)
+    use = inside | (on_boundary & same_dir & count_same_direction)
+    return float((sa[use, 0] * sb[use, 1] - sb[use, 0] * sa[use, 1]).sum()) / 2
+
+
+def intersection_area(a_rings, b_rings):
+    """พื้นที่ A ∩ B (หน่วยพิกัดยกกำลังสอง) — 0 ถ้าแค่แตะขอบกัน"""
+    a_rings, b_rings = orient(a_rings), orient(b_rings)
+    if not a_rings or not b_rings:
+        return 0.0
+    a_pts, b_pts = np.concatenate(a_rings), np.concatenate(b_rings)
+    box = (*np.maximum(a_pts.min(axis=0), b_pts.min(axis=0)), *np.minimum(a_pts.max(axis=0), b_pts.max(axis=0)))
+    if box[0] > box[2] or box[1] > box[3]:
+        return 0.0
+    origin = np.array(box[:2])      # ย้ายจุดอ้างอิงลดการปัดเศษของพิกัด UTM
+    a_rings = [r - origin for r in a_rings]
+    b_rings = [r - origin for r in b_rings]
+    box = (0.0, 0.0, box[2] - origin[0], box[3] - origin[1])
+    # ขอบที่อยู่นอก bbox ร่วม ไม่มีทางอยู่ในอีก polygon หรือตัดขอบของมัน
+    pa, pb = _edges(a_rings, box)
+    qa, qb = _edges(b_rings, box)
+    area_ab = _boundary_area(pa, pb, b_rings, qa, qb, True)
+    area_ba = _boundary_area(qa, qb, a_rings, pa, pb, False)
+    return max(0.0, area_ab + area_ba)
@@ -0,0 +1,128 @@
+"""
+polygon ของแปลงใน shapefile
+- read_outer_rings(): ring นอก (outer ring) สำหรับ land_plots.polygon_coords
+- read_plot_polygons(): ทุก ring + properties สำหรับไฟล์แผนที่ (build_boundaries.py, build_tiles.py)
+
+อ่านพิกัด UTM ของทุกแปลงต่อกันเป็น array เดียว แปลงเป็น lat/lng ในครั้งเดียว (NumPy)
+แล้วแยกกลับเป็นรายแปลงด้วย offsets — ผลเหมือน update_polygons.php + shp_to_geojson.php
+(ใช้ ring แรกของ polygon, [lat, lng] แบบ Leaflet, ปัด 7 ตำแหน่ง)
+
+ต้องติดตั้ง numpy
+"""
+import json
+
+from . import config, shp, shpmap
+from .geo import np, utm_to_latlng_array
+
+POLYGON_TYPES = (5, 15, 25)   # Polygon, PolygonZ, PolygonM
+
+# field ที่ใช้สร้าง properties แบบเดียวกับ shp_to_geojson.php
+FEATURE_FIELDS = ('SPAR_CODE', 'NAME_TITLE', 'NAME', 'SURNAME', 'NAME_DNP', 'RAI', 'NGAN', 'WA_SQ',
+                  'BAN_E', 'BAN_TYPE', 'PTYPE', 'REMARK')
+
+
+class OuterRings:
+    """ring นอกของทุกแปลง — codes[k] คู่กับ xy[offsets[k]:offsets[k + 1]]"""
+
+    def __init__(self, codes, records, offsets, xy):
+        self.codes = codes          # [plot_code (SPAR_CODE)]
+        self.records = records      # [index ใน shapefile]
+        self.offsets = offsets      # ndarray (len(codes) + 1,)
+        self.xy = xy                # ndarray (n, 2) UTM E/N
+        self._latlng = None
+
+    def __len__(self):
+        return len(self.codes)
+
+    @property
+    def num_points(self):
+        return len(self.xy)
+
+    def latlng(self, zone=47, northern=True):
+        """[lat, lng] ของทุกจุด (n, 2) — แปลงทั้งชุดครั้งเดียวแล้ว cache"""
+        if self._latlng is None:
+            lat, lng = utm_to_latlng_array(self.xy[:, 0], self.xy[:, 1], zone, northern)
+            self._latlng = np.column_stack((lat, lng))
+        return self._latlng
+
+    def ring(self, k):
+        return self.latlng()[self.offsets[k]:self.offsets[k + 1]]
+
+    def leaflet_json(self, k):
+        """JSON แบบ Leaflet [[lat, lng], ...] ไม่มีช่องว่าง"""
+        return json.dumps(self.ring(k).tolist(), separators=(',', ':'))
+
+
+def read_outer_rings(path=None, code_field='SPAR_CODE'):
+    """ring นอกของทุก record ที่เป็น polygon และมี SPAR_CODE — ตามลำดับใน shapefile
+    คืน (OuterRings, จำนวน record ที่ข้าม)"""
+    with shpmap.MappedShapefile(path or config.SHP_PATH) as layer:
+        codes_col = layer.dbf.column(code_field)
+        deleted = layer.dbf.deleted()
+        types = layer.shp.record_types()
+
+        codes, records, parts = [], [], []
+        skipped = 0
+        for i in range(len(layer)):
+            code = codes_col[i]
+            if deleted[i] or types[i] not in POLYGON_TYPES or not code:
+                skipped += 1
+                continue
+            coords = layer.shp.coords(i)
+            starts = layer.shp.parts(i)
+            end = starts[1] if len(starts) > 1 else len(coords)
+            if end - starts[0] == 0:
+                skipped += 1
+                continue
+            codes.append(code)
+            records.append(i)
+            parts.append(coords[starts[0]:end])
+
+        # copy ออกจาก mmap ก่อนปิดไฟล์
+        xy = np.concatenate(parts) if parts else np.empty((0, 2))
+        offsets = np.zeros(len(parts) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(p) for p in parts])
+        del parts, coords, codes_col    # ทิ้ง view ก่อนออกจาก with — mmap ปิดได้ทันทีไม่ต้องรอ GC
+    return OuterRings(codes, records, offsets, xy), skipped
+
+
+# ============================================================
+# polygon ทั้งหมด (ทุก ring) + properties สำหรับไฟล์แผนที่
+# ============================================================
+def _num(v):
+    """ตัวเลขแบบ (float) ของ PHP — จำนวนเต็มไม่มี .0 เหมือนไฟล์เดิม"""
+    try:
+        f = float(v)
+    except (TypeError, ValueError):
+        return 0
+    return int(f) if f.is_integer() else f
+
+
+def feature_properties(rec):
+    """properties ของ feature แบบเดียวกับ shp_to_geojson.php"""
+    return {
+        'plot_code': rec.get('SPAR_CODE', ''),
+        'owner': rec.get('NAME_TITLE', '') + rec.get('NAME', '') + ' ' + rec.get('SURNAME', ''),
+        'park': rec.get('NAME_DNP', ''),
+        'area_rai': _num(rec.get('RAI')),
+        'area_ngan': _num(rec.get('NGAN')),
+        'area_sqwa': _num(rec.get('WA_SQ')),
+        'ban_e': rec.get('BAN_E', ''),
+        'ban_type': int(_num(rec.get('BAN_TYPE'))),
+        'ptype': rec.get('PTYPE', ''),
+        'remark': rec.get('REMARK', ''),
+    }
+
+
+def read_plot_polygons(path=None):
+    """(properties, polygons) ของทุก record ที่เป็น polygon — polygon = [ring ndarray (n, 2) UTM, ...]"""
+    _, layer = shp.iter_layer(path or config.SHP_PATH, FEATURE_FIELDS)
+    props, polys = [], []
+    for _, rec, shape in layer:
+        if shape.shapeType not in POLYGON_TYPES or not shape.points:
+            continue
+        pts = np.asarray(shape.points, dtype=np.float64)
+        bounds = list(shape.parts) + [len(pts)]
+        props.append(feature_properties(rec))
+        polys.append([pts[a:b] for a, b in zip(bounds, bounds[1:]) if b > a])
+    return props, polys
@@ -0,0 +1,155 @@
+"""
+Rule registry — กฎตรวจข้อมูลราษฎรที่ใช้ร่วมกันทุก tool (audit, inspect_xlsx, ฟอร์ม)
+
+rule หนึ่งตัวตรวจค่าเดียว: fn(value, label) -> [ปัญหา]  (list ว่าง = ผ่าน)
+เรียกใช้ได้ 3 แบบ
+- get('idcard')(value)              ค่าเดียว เช่น ค่าจากฟอร์มที่ส่งเข้ามา
+- get('name').check_column(values)  ทั้งคอลัมน์ (xlsx / ผล query) — ค่าซ้ำตรวจครั้งเดียว
+- check_record(rec, spec) / check_rows(rows, spec)
+      spec = [(ชื่อ rule, field หรือ index, label)] — rec เป็น dict หรือ list ก็ได้
+
+ทุก rule นับจำนวนแถว/เวลาที่ใช้/จำนวนแถวที่มีปัญหา ดูด้วย format_stats()
+"""
+import time
+
+from .validators import (validate_idcard, validate_idcard_xlsx, validate_name, validate_name_xlsx,
+                         validate_prefix)
+
+
+class Rule:
+    def __init__(self, name, fn, label=None):
+        self.name = name
+        self.fn = fn
+        self.label = label
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.rows = 0       # จำนวนค่าที่ถูกตรวจ
+        self.evals = 0      # จำนวนครั้งที่เรียก fn จริง (check_column ข้ามค่าซ้ำ)
+        self.hits = 0       # จำนวนค่าที่มีปัญหา
+        self.seconds = 0.0
+
+    def __call__(self, value, label=None):
+        t0 = time.perf_counter()
+        issues = self.fn(value, label or self.label)
+        self.seconds += time.perf_counter() - t0
+        self.rows += 1
+        self.evals += 1
+        if issues:
+            self.hits += 1
+        return issues
+
+    def check_column(self, values, label=None):
+        """ตรวจทั้งคอลัมน์ คืน list ขนานกับ values
+        ผลของค่าที่ซ้ำกันเป็น list ตัวเดียวกัน — ผู้เรียกห้ามแก้ list ที่ได้คืน"""
+        label = label or self.label
+        fn = self.fn
+        cache = {}
+        out = []
+        t0 = time.perf_counter()
+        for v in values:
+            issues = cache.get(v)
+            if issues is None:
+                issues = cache[v] = fn(v, label)
+            out.append(issues)
+        self.seconds += time.perf_counter() - t0
+        self.rows += len(out)
+        self.evals += len(cache)
+        self.hits += sum(1 for issues in out if issues)
+        return out
+
+
+# ============================================================
+# Registry
+# ============================================================
+RULES = {}
+
+
+def register(name, label=None):
+    """decorator ลงทะเบียน fn(value, label) เป็น rule ชื่อ name"""
+    def deco(fn):
+        RULES[name] = Rule(name, fn, label)
+        return fn
+    return deco
+
+
+def get(name):
+    return RULES[name]
+
+
+@register('idcard')
+def _idcard(value, label):
+    return validate_idcard(value)
+
+
+@register('idcard_xlsx')
+def _idcard_xlsx(value, label):
+    return validate_idcard_xlsx(value)
+
+
+@register('name', 'ชื่อ')
+def _name(value, label):
+    return validate_name(value, label)
+
+
+@register('name_xlsx', 'ชื่อ')
+def _name_xlsx(value, label):
+    return validate_name_xlsx(value, label)
+
+
+@register('prefix', 'คำนำหน้า')
+def _prefix(value, label):
+    return validate_prefix(value, label)
+
+
+# spec มาตรฐานของตาราง villagers
+VILLAGER_ID_SPEC = [('idcard', 'id_card_number', None)]
+VILLAGER_NAME_SPEC = [
+    ('name', 'first_name', 'ชื่อ'),
+    ('name', 'last_name', 'สกุล'),
+    ('prefix', 'prefix', 'คำนำหน้า'),
+]
+
+
+# ============================================================
+# Record / result set
+# ============================================================
+def check_record(rec, spec):
+    """ตรวจ record เดียว (dict จาก DB/ฟอร์ม หรือ list ของแถว xlsx) — คืนปัญหารวม"""
+    issues = []
+    for rule_name, field, label in spec:
+        issues.extend(RULES[rule_name](rec[field], label))
+    return issues
+
+
+def check_rows(rows, spec):
+    """ตรวจทั้ง result set แบบทีละคอลัมน์ — คืน list ปัญหาขนานกับ rows"""
+    out = [[] for _ in rows]
+    for rule_name, field, label in spec:
+        col = RULES[rule_name].check_column([r[field] for r in rows], label)
+        for acc, issues in zip(out, col):
+            if issues:
+                acc.extend(issues)
+    return out
+
+
+# ============================================================
+# Timing
+# ============================================================
+def reset_stats():
+    for r in RULES.values():
+        r.reset_stats()
+
+
+def stats():
+    """[(name, rows, evals, hits, seconds)] เรียงจากใช้เวลามากสุด"""
+    return sorted(((r.name, r.rows, r.evals, r.hits, r.seconds) for r in RULES.values()),
+                  key=lambda s: -s[4])
+
+
+def format_stats():
+    lines = [f"  {'rule':<12} {'rows':>8} {'evals':>8} {'hits':>6} {'ms':>9}"]
+    for name, rows, evals, hits, seconds in stats():
+        if rows:
+            lines.append(f"  {name:<12} {rows:>8} {evals:>8} {hits:>6} {seconds * 1000:>9.1f}")
+    return '\n'.join(lines)
@@ -0,0 +1,164 @@
+"""
+อ่าน Shapefile แปลงสอบทาน และเปรียบเทียบ geometry ของ records ที่ SPAR_CODE + NUM_APAR ซ้ำกัน
+
+ใช้โดย check_shp_dup.py (รายงาน) และ fix_dup.py (ชุด geo-diff ที่ห้ามลบ)
+อ่านผ่าน shpmap (memory-map, ถอดเฉพาะคอลัมน์ที่ใช้) ถ้ามี numpy ไม่งั้นใช้ pyshp
+
+geometry เทียบด้วย fingerprint ของพิกัดแบบ binary (float64) หลัง normalize ring
+— ไม่ขึ้นกับลำดับ ring, จุดเริ่ม และทิศทางการวน; tolerance > 0 จะ snap พิกัดเข้า grid ก่อน
+"""
+import hashlib
+from array import array
+from collections import defaultdict
+
+from . import config, shpmap
+
+
+def open_reader(path=None):
+    import shapefile
+    return shapefile.Reader(str(path or config.SHP_PATH), encoding='utf-8')
+
+
+def field_str(val):
+    """ค่าใน .dbf เป็น str ให้ตรงกับ DB (N field ที่เป็นจำนวนเต็มไม่ให้มี .0)"""
+    if val is None:
+        return ''
+    if isinstance(val, float) and val.is_integer():
+        val = int(val)
+    return str(val).strip()
+
+
+def iter_records(sf):
+    """(index, record, shape) ทีละ record ที่ไม่ถูก mark ลบ — index เป็นลำดับใน shapefile
+    (iterShapeRecords ของ pyshp จับคู่ shape กับ record ตามลำดับ ซึ่งเลื่อนเมื่อมี record ที่ถูกลบ)"""
+    for rec in sf.iterRecords():
+        yield rec.oid, rec, sf.shape(rec.oid)
+
+
+def iter_layer(path, names):
+    """(index, {field: str}, shape) เฉพาะ field ใน names ที่มีอยู่จริง — คืน (fields ทั้งหมด, iterator)
+    ข้าม record ที่ถูก mark ลบใน .dbf แบบเดียวกับ pyshp"""
+    if shpmap.np is not None:
+        layer = shpmap.MappedShapefile(path or config.SHP_PATH)
+        fields = layer.dbf.field_names
+        deleted = layer.dbf.deleted()
+        cols = {}
+        for n in names:
+            if n in fields:
+                col = layer.dbf.column(n)
+                if col.field.type in 'NF':  # ตัวเลข → str แบบเดียวกับ pyshp + field_str
+                    col = ['' if v != v else field_str(float(v)) for v in col.numbers()]
+                cols[n] = col
+
+        def gen():
+            try:
+                for i in range(len(layer)):
+                    if deleted[i]:
+                        continue
+                    yield i, {n: c[i] for n, c in cols.items()}, layer.shp.shape(i)
+            finally:
+                cols.clear()
+                layer.close()
+        return fields, gen()
+
+    sf = open_reader(path)
+    fields = [f[0] for f in sf.fields[1:]]  # skip DeletionFlag
+    idx = {n: fields.index(n) for n in names if n in fields}
+
+    def gen():
+        try:
+            for i, rec, shape in iter_records(sf):
+                yield i, {n: field_str(rec[k]) for n, k in idx.items()}, shape
+        finally:
+            sf.close()
+    return fields, gen()
+
+
+# ============================================================
+# Geometry fingerprint
+# ============================================================
+def _rings(shape):
+    pts = shape.points
+    bounds = list(shape.parts) + [len(pts)]
+    return [pts[bounds[k]:bounds[k + 1]] for k in range(len(bounds) - 1)]
+
+
+def _normalize_ring(ring):
+    """ตัดจุดปิด ring, เริ่มที่จุดน้อยสุด และเลือกทิศที่ได้ลำดับน้อยกว่า"""
+    ring = [p for k, p in enumerate(ring) if k == 0 or p != ring[k - 1]]  # จุดซ้ำติดกัน
+    if len(ring) > 1 and ring[0] == ring[-1]:
+        ring = ring[:-1]
+    if not ring:
+        return ring
+    k = min(range(len(ring)), key=ring.__getitem__)
+    ring = ring[k:] + ring[:k]
+    rev = ring[:1] + ring[:0:-1]
+    return min(ring, rev)
+
+
+def geometry_fingerprint(shape, tolerance=None):
+    """digest ของ geometry (hex 32 ตัว)
+    tolerance=None เทียบพิกัดตรงตัว (float64 เดียวกันทุก bit)
+    tolerance=0.01 snap พิกัดเข้า grid 1 ซม. (หน่วยเดียวกับ .shp = เมตร UTM)"""
+    rings = []
+    for ring in _rings(shape):
+        ring = [(p[0], p[1]) for p in ring]
+        if tolerance:
+            ring = [(round(x / tolerance), round(y / tolerance)) for x, y in ring]
+        ring = _normalize_ring(ring)
+        if ring:
+            rings.append(ring)
+    rings.sort()
+
+    h = hashlib.blake2b(digest_size=16)
+    h.update(array('q', [shape.shapeType, len(rings)]).tobytes())
+    typecode = 'q' if tolerance else 'd'
+    for ring in rings:
+        h.update(array('q', [len(ring)]).tobytes())
+        h.update(array(typecode, [c for p in ring for c in p]).tobytes())
+    return h.hexdigest()
+
+
+# ============================================================
+# Duplicate comparison
+# ============================================================
+def duplicate_groups(path=None, tolerance=None):
+    """จัดกลุ่ม records ตาม (SPAR_CODE, NUM_APAR) แล้วแยกกลุ่มที่ซ้ำเป็น
+    same_geo (geometry เหมือนกัน — ลบได้) และ diff_geo (ต่างกัน — ลบไม่ได้)
+    คืน (same_geo, diff_geo, info) — กลุ่มเป็น (spar, numapar, entries)"""
+    fields, records = iter_layer(path, ('SPAR_CODE', 'NUM_APAR', 'FID'))
+    combo_map = defaultdict(list)
+    n = 0
+    for i, rec, shp in records:
+        n += 1
+        spar = rec.get('SPAR_CODE', '')
+        numapar = rec.get('NUM_APAR', '')
+        fid = rec.get('FID', str(i))
+
+        combo_map[(spar, numapar)].append({
+            'idx': i, 'fid': fid, 'geo_hash': geometry_fingerprint(shp, tolerance),
+            'bbox': getattr(shp, 'bbox', None) or None,
+            'num_points': len(shp.points) if shp.points else 0,
+        })
+
+    info = {'records': n, 'fields': fields, 'tolerance': tolerance,
+            'spar_idx': fields.index('SPAR_CODE') if 'SPAR_CODE' in fields else None,
+            'numapar_idx': fields.index('NUM_APAR') if 'NUM_APAR' in fields else None,
+            'fid_idx': fields.index('FID') if 'FID' in fields else None}
+
+    same_geo = []
+    diff_geo = []
+    for (spar, numapar), entries in combo_map.items():
+        if len(entries) <= 1:
+            continue
+        if len(set(e['geo_hash'] for e in entries)) == 1:
+            same_geo.append((spar, numapar, entries))
+        else:
+            diff_geo.append((spar, numapar, entries))
+    return same_geo, diff_geo, info
+
+
+def geo_diff_keys(path=None, tolerance=None):
+    """{(SPAR_CODE, NUM_APAR)} ที่ซ้ำกันแต่ polygon ต่างกัน"""
+    _, diff_geo, _ = duplicate_groups(path, tolerance)
+    return {(spar, numapar) for spar, numapar, _ in diff_geo}
@@ -0,0 +1,314 @@
+"""
+อ่าน Shapefile (.dbf / .shp / .shx) แบบ memory-map สำหรับงาน QA ที่อ่านทั้ง layer
+
+ต่างจาก pyshp ที่ถอดทุก field ของทุก record เป็น list/dict:
+- .dbf เป็นตาราง byte ความกว้างคงที่ — column(name) คืน view ของคอลัมน์นั้น (ไม่ copy)
+  ถอดเป็น str เฉพาะแถวที่เรียก หรือ .numbers() เป็น NumPy array ทั้งคอลัมน์
+- .shp อ่านตำแหน่ง record จาก .shx — coords(i) เป็น NumPy view (n, 2) ชี้เข้าไฟล์ตรง ๆ
+
+close() ไม่ error ถ้ายังมี view (คอลัมน์/coords) เหลืออยู่ — ไฟล์ถูกปิดจริงเมื่อ view สุดท้ายถูกทิ้ง
+view ที่เก็บไว้ใช้หลัง close() ยังอ่านได้ แต่ถ้าจะเก็บนาน ให้ copy (np.array(...)) เพื่อไม่ให้ไฟล์ค้างเปิด
+
+    with MappedShapefile(config.SHP_PATH) as shp:
+        spar = shp.dbf.column('SPAR_CODE')
+        area = shp.dbf.column('AREA_RAI').numbers()
+        for i in range(len(shp)):
+            spar[i], shp.shp.coords(i)
+
+ต้องติดตั้ง numpy
+"""
+import mmap
+import os
+import struct
+from array import array
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+
+def _require_numpy():
+    if np is None:
+        raise RuntimeError("shpmap ต้องใช้ numpy (pip install numpy)")
+
+
+def _map(path):
+    with open(path, 'rb') as f:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def _unmap(mm):
+    """ปิด mmap — ถ้ายังมี NumPy view ชี้อยู่ (BufferError) ปล่อยให้ GC ปิดเมื่อ view สุดท้ายหายไป"""
+    if mm is None:
+        return
+    try:
+        mm.close()
+    except BufferError:
+        pass
+
+
+def _base(path):
+    """ตัดนามสกุล .shp/.dbf/.shx ออก (รับ path แบบเดียวกับ shapefile.Reader)"""
+    path = str(path)
+    root, ext = os.path.splitext(path)
+    return root if ext.lower() in ('.shp', '.dbf', '.shx') else path
+
+
+# ============================================================
+# DBF
+# ============================================================
+class DbfField:
+    def __init__(self, name, type, offset, length, decimal):
+        self.name = name
+        self.type = type            # 'C', 'N', 'F', 'D', 'L'
+        self.offset = offset        # ตำแหน่งใน record (นับ deletion flag แล้ว)
+        self.length = length
+        self.decimal = decimal
+
+    def __repr__(self):
+        return f"DbfField({self.name!r}, {self.type!r}, {self.length}, {self.decimal})"
+
+
+class DbfColumn:
+    """คอลัมน์เดียวของ .dbf — bytes เป็น view เข้า mmap, ถอดเป็น str เมื่อเรียกเท่านั้น"""
+
+    def __init__(self, field, raw, encoding):
+        self.field = field
+        self.raw = raw              # ndarray dtype S{length}, shape (n,)
+        self.encoding = encoding
+        self._numbers = None
+
+    def __len__(self):
+        return len(self.raw)
+
+    def __getitem__(self, i):
+        return self.raw[i].decode(self.encoding, 'replace').strip()
+
+    def __iter__(self):
+        enc = self.encoding
+        for b in self.raw:
+            yield b.decode(enc, 'replace').strip()
+
+    def decode(self):
+        """ถอดทั้งคอลัมน์เป็น list ของ str"""
+        return list(self)
+
+    def numbers(self):
+        """ค่าตัวเลขทั้งคอลัมน์เป็น float64 (ช่องว่าง/อ่านไม่ได้ = NaN) — cache ไว้"""
+        if self._numbers is None:
+            vals = np.char.strip(self.raw)
+            out = np.full(len(vals), np.nan)
+            ok = (vals != b'') & (np.char.find(vals, b'*') < 0)  # '*****' = overflow
+            if ok.any():
+                try:
+                    out[ok] = vals[ok].astype(np.float64)
+                except ValueError:
+                    out[ok] = [_to_float(v) for v in vals[ok]]
+            self._numbers = out
+        return self._numbers
+
+
+def _to_float(b):
+    try:
+        return float(b)
+    except ValueError:
+        return np.nan
+
+
+class DbfTable:
+    def __init__(self, path, encoding=None):
+        _require_numpy()
+        self.path = path
+        self.encoding = encoding or _read_cpg(path) or 'utf-8'
+        self._mm = _map(path)
+        mm = self._mm
+
+        self.num_records, self.header_len, self.record_len = struct.unpack('<IHH', mm[4:12])
+        self.fields = []
+        offset = 1  # deletion flag
+        pos = 32
+        while pos < self.header_len - 1 and mm[pos] != 0x0D:
+            desc = mm[pos:pos + 32]
+            name = desc[:11].split(b'\x00', 1)[0].decode('ascii', 'replace').strip()
+            f = DbfField(name, chr(desc[11]), offset, desc[16], desc[17])
+            self.fields.append(f)
+            offset += f.length
+            pos += 32
+        self._by_name = {f.name: f for f in self.fields}
+
+        # ตาราง record ทั้งหมดเป็น uint8 (n, record_len) — ไม่ copy
+        self._table = np.frombuffer(mm, dtype=np.uint8,
+                                    count=self.num_records * self.record_len,
+                                    offset=self.header_len).reshape(self.num_records, self.record_len)
+        self._columns = {}
+
+    def __len__(self):
+        return self.num_records
+
+    @property
+    def field_names(self):
+        return [f.name for f in self.fields]
+
+    def column(self, name):
+        col = self._columns.get(name)
+        if col is None:
+            f = self._by_name[name]
+            raw = self._table[:, f.offset:f.offset + f.length].view(f'S{f.length}').reshape(-1)
+            col = self._columns[name] = DbfColumn(f, raw, self.encoding)
+        return col
+
+    def deleted(self):
+        """bool array ของ record ที่ถูก mark ลบ ('*')"""
+        return self._table[:, 0] == ord('*')
+
+    def record(self, i):
+        """dict ของ record เดียว (ถอดทุก field — ใช้เฉพาะตอนแสดงผล)"""
+        return {f.name: self.column(f.name)[i] for f in self.fields}
+
+    def close(self):
+        self._columns = {}
+        self._table = None
+        mm, self._mm = self._mm, None
+        _unmap(mm)
+
+
+def _read_cpg(dbf_path):
+    cpg = os.path.splitext(dbf_path)[0] + '.cpg'
+    if os.path.exists(cpg):
+        with open(cpg, encoding='ascii', errors='replace') as f:
+            return f.read().strip() or None
+    return None
+
+
+# ============================================================
+# SHP / SHX
+# ============================================================
+NULL_SHAPE = 0
+POINT_TYPES = (1, 11, 21)
+MULTI_TYPES = (3, 5, 13, 15, 23, 25, 31)   # มี parts (PolyLine/Polygon/MultiPatch + Z/M)
+MULTIPOINT_TYPES = (8, 18, 28)
+
+
+class MappedShape:
+    """geometry เดียว — หน้าตาเหมือน shapefile.Shape (shapeType, points, parts, bbox)"""
+    __slots__ = ('shapeType', 'points', 'parts', 'bbox')
+
+    def __init__(self, shape_type, points, parts, bbox):
+        self.shapeType = shape_type
+        self.points = points
+        self.parts = parts
+        self.bbox = bbox
+
+
+class ShpFile:
+    def __init__(self, shp_path, shx_path):
+        _require_numpy()
+        self._mm = _map(shp_path)
+        self._shx = _map(shx_path)
+        self.shape_type = struct.unpack('<i', self._mm[32:36])[0]
+        self.bbox = struct.unpack('<4d', self._mm[36:68])
+        # .shx: offset / ความยาว (หน่วย 16-bit word, big-endian) ต่อ record
+        idx = np.frombuffer(self._shx, dtype='>i4', offset=100).reshape(-1, 2)
+        self.offsets = idx[:, 0].astype(np.int64) * 2 + 8      # ตำแหน่ง content (ข้าม record header)
+        self.lengths = idx[:, 1].astype(np.int64) * 2
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def _header(self, i):
+        """(shape_type, content offset, num_parts, num_points)"""
+        off = int(self.offsets[i])
+        st = struct.unpack_from('<i', self._mm, off)[0]
+        if st in MULTI_TYPES:
+            nparts, npoints = struct.unpack_from('<2i', self._mm, off + 36)
+            return st, off, nparts, npoints
+        if st in MULTIPOINT_TYPES:
+            return st, off, 0, struct.unpack_from('<i', self._mm, off + 36)[0]
+        if st in POINT_TYPES:
+            return st, off, 0, 1
+        return st, off, 0, 0
+
+    def _coord_offset(self, st, off, nparts):
+        if st in MULTI_TYPES:
+            return off + 44 + 4 * nparts
+        if st in MULTIPOINT_TYPES:
+            return off + 40
+        return off + 4
+
+    def coords(self, i):
+        """พิกัด XY เป็น ndarray (n, 2) ที่ชี้เข้า .shp โดยตรง (read-only, ไม่ copy)"""
+        st, off, nparts, npoints = self._header(i)
+        return np.frombuffer(self._mm, dtype='<f8', count=npoints * 2,
+                             offset=self._coord_offset(st, off, nparts)).reshape(npoints, 2)
+
+    def raw_coords(self, i):
+        """bytes ของพิกัด XY ตามที่เก็บในไฟล์ (float64 little-endian)"""
+        st, off, nparts, npoints = self._header(i)
+        start = self._coord_offset(st, off, nparts)
+        return self._mm[start:start + npoints * 16]
+
+    def parts(self, i):
+        st, off, nparts, _ = self._header(i)
+        if st not in MULTI_TYPES:
+            return [0]
+        return list(struct.unpack_from(f'<{nparts}i', self._mm, off + 44))
+
+    def record_types(self):
+        """shape type ของทุก record เป็น ndarray (n,)"""
+        return np.array([struct.unpack_from('<i', self._mm, int(o))[0] for o in self.offsets],
+                        dtype=np.int32)
+
+    def record_bboxes(self):
+        """bbox ของทุก record เป็น ndarray (n, 4) [xmin, ymin, xmax, ymax] — NaN ถ้าไม่มี bbox"""
+        out = np.full((len(self), 4), np.nan)
+        types = self.record_types()
+        has_box = np.isin(types, MULTI_TYPES + MULTIPOINT_TYPES)
+        for k in np.nonzero(has_box)[0]:
+            out[k] = np.frombuffer(self._mm, dtype='<f8', count=4, offset=int(self.offsets[k]) + 4)
+        pts = np.isin(types, POINT_TYPES)
+        for k in np.nonzero(pts)[0]:
+            xy = np.frombuffer(self._mm, dtype='<f8', count=2, offset=int(self.offsets[k]) + 4)
+            out[k] = (xy[0], xy[1], xy[0], xy[1])
+        return out
+
+    def shape(self, i):
+        """MappedShape ที่ points เป็น list ของ tuple (ใช้แทน shapefile.Shape ได้)"""
+        st, off, nparts, npoints = self._header(i)
+        if st == NULL_SHAPE:
+            return MappedShape(st, [], [], None)
+        flat = array('d')
+        flat.frombytes(self.raw_coords(i))
+        points = list(zip(flat[0::2], flat[1::2]))
+        bbox = struct.unpack_from('<4d', self._mm, off + 4) if st not in POINT_TYPES else None
+        return MappedShape(st, points, self.parts(i), bbox)
+
+    def close(self):
+        mm, shx, self._mm, self._shx = self._mm, self._shx, None, None
+        _unmap(mm)
+        _unmap(shx)
+
+
+# ============================================================
+# Shapefile (.dbf + .shp + .shx)
+# ============================================================
+class MappedShapefile:
+    def __init__(self, path, encoding=None):
+        base = _base(path)
+        self.dbf = DbfTable(base + '.dbf', encoding)
+        self.shp = ShpFile(base + '.shp', base + '.shx')
+        if len(self.dbf) != len(self.shp):
+            raise ValueError(f"จำนวน record ไม่ตรงกัน: .dbf {len(self.dbf)} / .shp {len(self.shp)}")
+
+    def __len__(self):
+        return len(self.dbf)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.dbf.close()
+        self.shp.close()
@@ -0,0 +1,245 @@
+"""
+SQL ของ upsert โหมด batch — staging table ชั่วคราว แล้ว UPDATE ... JOIN / INSERT ... SELECT ทีละชุด
+
+batch_steps() คืนรายการคำสั่งเป็นข้อมูล จึงใช้ได้ทั้ง cursor ของ pymysql (run_batch)
+และ aiomysql (landmgmt/aiodb.py) โดย SQL ชุดเดียวกัน
+
+คอลัมน์ของ staging table ใช้ชนิดและ collation เดียวกับคอลัมน์ในตารางจริง (stage_ddl() อ่านจาก information_schema)
+- ชนิดใน STAGE_DDL เป็นแค่ค่าสำรอง — DB จริงอาจต่างจาก sql/schema.sql (Railway: perimeter DECIMAL(10,3),
+  plot_code VARCHAR(50) ...) ค่าที่ผ่าน staging ต้องถูกปัด/ตัดแบบเดียวกับที่โหมด row เขียนตรง
+- collation ต้องตรงกับคอลัมน์ที่ JOIN/COALESCE ด้วย (Railway: villagers/land_plots เป็น utf8mb4_thai_520_w2
+  แต่ default ของ database อาจไม่ใช่ → error 1267 "Illegal mix of collations")
+"""
+import re
+
+from . import instrument
+from .importstate import norm_key
+from .transform import VILLAGER_COLS, PLOT_DIRECT_COLS, PLOT_COALESCE_COLS, PLOT_COLS
+
+# staging table เป็น TEMPORARY จึงไม่ commit transaction และหายเองเมื่อปิด connection
+# (แต่ละ connection มี staging table ของตัวเอง)
+STAGE_DDL = [
+    """
+    CREATE TEMPORARY TABLE IF NOT EXISTS _stage_villagers (
+        id_card_number  VARCHAR(13) PRIMARY KEY,
+        can_update      TINYINT(1) NOT NULL,
+        prefix          VARCHAR(20),
+        first_name      VARCHAR(100),
+        last_name       VARCHAR(100),
+        village_name    VARCHAR(100),
+        village_no      VARCHAR(10),
+        sub_district    VARCHAR(100),
+        district        VARCHAR(100),
+        province        VARCHAR(100),
+        address         TEXT,
+        name_default    VARCHAR(100) NOT NULL,
+        surname_default VARCHAR(100) NOT NULL
+    ) ENGINE=InnoDB
+    """,
+    """
+    CREATE TEMPORARY TABLE IF NOT EXISTS _stage_plots (
+        plot_code        VARCHAR(20) PRIMARY KEY,
+        id_card_number   VARCHAR(13) NOT NULL,
+        area_rai         DECIMAL(10,2),
+        area_ngan        DECIMAL(10,2),
+        area_sqwa        DECIMAL(10,2),
+        land_use_type    VARCHAR(20),
+        status           VARCHAR(20),
+        perimeter        DECIMAL(12,2),
+        remark_risk      VARCHAR(20),
+        data_issues      TEXT,
+        park_name        VARCHAR(100),
+        latitude         DECIMAL(10,7),
+        longitude        DECIMAL(10,7),
+        code_dnp         VARCHAR(20),
+        apar_code        VARCHAR(20),
+        apar_no          VARCHAR(20),
+        num_apar         VARCHAR(20),
+        spar_code        VARCHAR(20),
+        ban_e            VARCHAR(20),
+        ban_type         VARCHAR(50),
+        num_spar         VARCHAR(20),
+        spar_no          VARCHAR(20),
+        par_ban          VARCHAR(100),
+        par_moo          VARCHAR(20),
+        par_tam          VARCHAR(100),
+        par_amp          VARCHAR(100),
+        par_prov         VARCHAR(100),
+        ptype            VARCHAR(50),
+        target_fid       INT,
+        occupation_since INT
+    ) ENGINE=InnoDB
+    """,
+]
+
+# staging table -> ตารางจริงที่คอลัมน์ชื่อเดียวกันใช้ชนิด/collation ตาม
+STAGE_TARGET = {'_stage_villagers': 'villagers', '_stage_plots': 'land_plots'}
+# คอลัมน์ที่ชื่อไม่ตรงกับตารางจริง
+STAGE_SOURCE = {
+    ('_stage_villagers', 'name_default'): ('villagers', 'first_name'),
+    ('_stage_villagers', 'surname_default'): ('villagers', 'last_name'),
+    ('_stage_plots', 'id_card_number'): ('villagers', 'id_card_number'),
+}
+
+TARGET_COLUMNS_SQL = """
+    SELECT TABLE_NAME, COLUMN_NAME, COLUMN_TYPE, COLLATION_NAME FROM information_schema.COLUMNS
+    WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME IN (%s)
+"""
+
+# นิยามคอลัมน์ใน DDL: ชื่อ + ชนิด (ส่วนที่ตามมา เช่น NOT NULL / PRIMARY KEY คงไว้)
+_COL_DEF = re.compile(r'^(\s*)(\w+)(\s+)((?:TINY|SMALL|MEDIUM|BIG)?INT|DECIMAL|VARCHAR|(?:LONG|MEDIUM)?TEXT)'
+                      r'(\([\d,\s]+\))?(?!\w)', re.M)
+_TABLE_NAME = re.compile(r'TABLE IF NOT EXISTS (\w+)')
+
+
+def target_columns_sql(tables):
+    """(sql, args) ที่คืนแถว (ตาราง, คอลัมน์, ชนิด, collation) ของ tables ใน database ปัจจุบัน"""
+    return TARGET_COLUMNS_SQL % ', '.join(['%s'] * len(tables)), tuple(tables)
+
+
+def match_target(ddl, rows, target, sources=None):
+    """ddl ที่ชนิด + COLLATE ของแต่ละคอลัมน์ตรงกับคอลัมน์ชื่อเดียวกันใน target (หรือ sources[(staging, คอลัมน์)])
+    rows = ผลของ target_columns_sql() — คอลัมน์ที่ไม่มีในตารางจริงใช้ชนิดใน ddl ตามเดิม"""
+    columns = {(t, c): (ctype, coll) for t, c, ctype, coll in rows}
+    table = _TABLE_NAME.search(ddl).group(1)
+    sources = sources or {}
+
+    def repl(m):
+        col = columns.get(sources.get((table, m.group(2)), (target, m.group(2))))
+        if col is None:
+            return m.group(0)
+        ctype, coll = col
+        return m.group(1) + m.group(2) + m.group(3) + ctype + (f' COLLATE {coll}' if coll else '')
+    return _COL_DEF.sub(repl, ddl)
+
+
+def stage_ddl(rows):
+    """STAGE_DDL ที่ชนิด/collation ตรงกับตารางจริง — rows = ผลของ target_columns_sql(STAGE_TARGET.values())"""
+    return [match_target(ddl, rows, STAGE_TARGET[_TABLE_NAME.search(ddl).group(1)], STAGE_SOURCE)
+            for ddl in STAGE_DDL]
+
+
+def create_staging(cur):
+    """สร้าง staging table ด้วย cursor ของ pymysql"""
+    cur.execute(*target_columns_sql(STAGE_TARGET.values()))
+    for ddl in stage_ddl(cur.fetchall()):
+        cur.execute(ddl)
+
+
+V_STAGE_COLS = ('id_card_number', 'can_update') + VILLAGER_COLS + ('name_default', 'surname_default')
+P_STAGE_COLS = ('plot_code', 'id_card_number') + PLOT_COLS
+
+
+def merge_batch(recs):
+    """รวมแถวที่ key ซ้ำกันภายในชุด ให้ผลเหมือนการ UPSERT ทีละแถวตามลำดับ
+    - ค่า COALESCE: ค่าที่ไม่ว่างตัวหลังสุดชนะ
+    - ค่าที่ UPDATE ทับตรงๆ (และเจ้าของแปลง): แถวหลังสุดชนะ
+    - เลขบัตรไม่ถูกต้อง: ใช้ข้อมูลแถวแรก (แบบเดิมไม่ UPDATE)
+    key ของ dict เทียบแบบ norm_key ให้ตรงกับ primary key ของ staging table (_ci, PAD SPACE)
+    — key ที่ต่างกันแค่ตัวพิมพ์/ช่องว่างท้ายเป็นแถวเดียวกัน ไม่งั้น INSERT ชน duplicate key"""
+    villagers = {}
+    plots = {}
+    for rec in recs:
+        key = rec['villager_key']
+        vk = norm_key(key)
+        sv = villagers.get(vk)
+        if sv is None:
+            villagers[vk] = dict(rec['villager'], id_card_number=key, can_update=int(rec['id_valid']),
+                                 name_default=rec['name_default'],
+                                 surname_default=rec['surname_default'])
+        elif sv['can_update']:
+            for c in VILLAGER_COLS:
+                if rec['villager'][c] is not None:
+                    sv[c] = rec['villager'][c]
+
+        code = rec['plot_code']
+        pk = norm_key(code)
+        sp = plots.get(pk)
+        if sp is None:
+            plots[pk] = dict(rec['plot'], plot_code=code, id_card_number=key)
+        else:
+            sp['id_card_number'] = key
+            for c in PLOT_DIRECT_COLS:
+                sp[c] = rec['plot'][c]
+            for c in PLOT_COALESCE_COLS:
+                if rec['plot'][c] is not None:
+                    sp[c] = rec['plot'][c]
+    return villagers, plots
+
+
+def batch_steps(recs):
+    """คำสั่งของ 1 ชุด -> ([(sql, args, executemany?, ตัวนับ, ขั้น)], {ตัวนับ: จำนวน key ในชุด})
+    ตัวนับ 'villager'/'plot' = rowcount ของคำสั่งนั้นคือจำนวนที่ INSERT ใหม่ (ที่เหลือคือ UPDATE)
+    ขั้น = ชื่อที่ใช้จับเวลา (landmgmt/instrument.py)"""
+    villagers, plots = merge_batch(recs)
+
+    set_direct = [f'lp.{c} = s.{c}' for c in PLOT_DIRECT_COLS]
+    set_coalesce = [f'lp.{c} = COALESCE(s.{c}, lp.{c})' for c in PLOT_COALESCE_COLS]
+    steps = [
+        # --- Stage ---
+        ("DELETE FROM _stage_villagers", None, False, None, 'villager_upsert'),
+        ("DELETE FROM _stage_plots", None, False, None, 'plot_upsert'),
+        (f"INSERT INTO _stage_villagers ({', '.join(V_STAGE_COLS)}) "
+         f"VALUES ({', '.join(['%s'] * len(V_STAGE_COLS))})",
+         [tuple(sv[c] for c in V_STAGE_COLS) for sv in villagers.values()],
+         True, None, 'villager_upsert'),
+        (f"INSERT INTO _stage_plots ({', '.join(P_STAGE_COLS)}) "
+         f"VALUES ({', '.join(['%s'] * len(P_STAGE_COLS))})",
+         [tuple(sp[c] for c in P_STAGE_COLS) for sp in plots.values()],
+         True, None, 'plot_upsert'),
+
+        # --- Villagers: UPDATE ที่มีอยู่แล้ว, INSERT ที่ยังไม่มี ---
+        (f"""
+        UPDATE villagers v
+        JOIN _stage_villagers s ON s.id_card_number = v.id_card_number
+        SET {', '.join(f'v.{c} = COALESCE(s.{c}, v.{c})' for c in VILLAGER_COLS)}
+        WHERE s.can_update = 1
+        """, None, False, None, 'villager_upsert'),
+        ("""
+        INSERT INTO villagers
+            (id_card_number, prefix, first_name, last_name,
+             village_name, village_no, sub_district, district, province, address)
+        SELECT s.id_card_number, s.prefix,
+               COALESCE(s.first_name, s.name_default), COALESCE(s.last_name, s.surname_default),
+               s.village_name, s.village_no, s.sub_district, s.district, s.province, s.address
+        FROM _stage_villagers s
+        LEFT JOIN villagers v ON v.id_card_number = s.id_card_number
+        WHERE v.villager_id IS NULL
+        """, None, False, 'villager', 'villager_upsert'),
+
+        # --- Land plots: ผูก villager_id ผ่านเลขบัตรใน staging ---
+        (f"""
+        UPDATE land_plots lp
+        JOIN _stage_plots s ON s.plot_code = lp.plot_code
+        JOIN villagers v ON v.id_card_number = s.id_card_number
+        SET lp.villager_id = v.villager_id,
+            {', '.join(set_direct + set_coalesce)}
+        """, None, False, None, 'plot_upsert'),
+        (f"""
+        INSERT INTO land_plots (plot_code, villager_id, {', '.join(PLOT_COLS)})
+        SELECT s.plot_code, v.villager_id, {', '.join(f's.{c}' for c in PLOT_COLS)}
+        FROM _stage_plots s
+        JOIN villagers v ON v.id_card_number = s.id_card_number
+        LEFT JOIN land_plots lp ON lp.plot_code = s.plot_code
+        WHERE lp.plot_id IS NULL
+        """, None, False, 'plot', 'plot_upsert'),
+    ]
+    return steps, {'villager': len(villagers), 'plot': len(plots)}
+
+
+def tally(stats, counter, total, inserted):
+    stats[f'{counter}_insert'] += inserted
+    stats[f'{counter}_update'] += total - inserted
+
+
+def run_batch(cur, recs, stats, timer=instrument.NULL):
+    """รัน 1 ชุดด้วย cursor ของ pymysql (ไม่ commit)"""
+    steps, totals = batch_steps(recs)
+    for sql, params, many, counter, stage in steps:
+        with timer.stage(stage):
+            if many:
+                cur.executemany(sql, params)
+            else:
+                cur.execute(sql, params)
+        if counter:
+            tally(stats, counter, totals[counter], cur.rowcount)
@@ -0,0 +1,442 @@
+"""
+ข้อมูลสังเคราะห์สำหรับทดสอบ/benchmark — หน้าตาเหมือน ตารางแปลงสอบทาน2.xlsx + Merge_แปลงสอบทาน (shapefile)
+แต่ไม่มีข้อมูลบุคคลจริง (ชื่อประกอบจากพยางค์, เลขบัตรสุ่ม)
+
+- ลำดับคอลัมน์ / header / ชนิดค่าในแต่ละคอลัมน์ตรงกับไฟล์จริง (fix_xlsx.py อ้างคอลัมน์ตามตำแหน่ง)
+- field ของ .dbf ตรงกับ shapefile จริง, polygon เป็น UTM 47N วนตามเข็ม (ring นอกของ shapefile)
+- แปลงเป็นช่องของ lattice ที่ขยับจุดแบบสุ่ม — แปลงข้างเคียงใช้ขอบร่วมกันพอดีเหมือนข้อมูลจริง ไม่ทับกัน
+- ปัญหาที่ tools ต้องเจอ ใส่ตามสัดส่วน (ปรับได้): เลขบัตรผิด, _x000D_ ใน NAME/SURNAME,
+  HOME_NO ที่ Excel แปลงเป็นวันที่, SPAR_CODE ซ้ำ (ผู้ร่วมครอบครอง / DUP geometry เดียวกัน / DUP geometry ต่าง)
+
+สร้างทีละชุด (block) แล้วส่งต่อให้ writer ทันที จึงใช้หน่วยความจำคงที่แม้ 1 ล้านแถว
+ผลเหมือนเดิมทุกครั้งเมื่อใช้ seed เดิม
+
+ต้องติดตั้ง numpy (+ openpyxl / pyshp สำหรับเขียนไฟล์)
+"""
+import bisect
+import itertools
+import math
+from datetime import datetime
+
+from .geo import np
+from .validators import idcard_check_digit
+
+# ============================================================
+# โครงสร้างไฟล์จริง
+# ============================================================
+XLSX_HEADERS = ('FID', 'Shape *', 'TARGET_FID', 'NAME_DNP_T', 'NAME_DNP', 'CODE_DNP', 'APAR_CODE',
+                'APAR_NO', 'NUM_APAR', 'SPAR_CODE', 'SPAR_NO', 'NUM_SPAR', 'E', 'N', 'PAR_BAN', 'BAN_E',
+                'PAR_MOO', 'PAR_TAM', 'PAR_AMP', 'PAR_PROV', 'NAME_TITLE', 'NAME', 'SURNAME', 'IDCARD',
+                'HOME_NO', 'HOME_BAN', 'HOME_MOO', 'HOME_TAM', 'HOME_AMP', 'HOME_PROV', 'PERIMETER',
+                'AREA_RAI', 'RAI', 'NGAN', 'WA_SQ', 'REMARK', 'BAN_TYPE', 'YEAR', 'PTYPE')
+
+# (ชื่อ, ชนิด, ขนาด, ทศนิยม) ตาม .dbf จริง
+SHP_FIELDS = (
+    ('NAME_TITLE', 'C', 50, 0), ('NAME', 'C', 50, 0), ('SURNAME', 'C', 50, 0), ('IDCARD', 'C', 50, 0),
+    ('RAI', 'N', 14, 3), ('NGAN', 'N', 14, 3), ('NUM_SPAR', 'C', 50, 0), ('NAME_DNP_T', 'C', 50, 0),
+    ('NAME_DNP', 'C', 100, 0), ('CODE_DNP', 'N', 5, 0), ('APAR_CODE', 'C', 20, 0), ('APAR_NO', 'C', 10, 0),
+    ('NUM_APAR', 'C', 20, 0), ('SPAR_CODE', 'C', 20, 0), ('SPAR_NO', 'C', 10, 0), ('E', 'N', 19, 11),
+    ('N', 'N', 19, 11), ('PAR_BAN', 'C', 50, 0), ('BAN_E', 'C', 3, 0), ('PAR_MOO', 'C', 5, 0),
+    ('PAR_TAM', 'C', 50, 0), ('PAR_AMP', 'C', 50, 0), ('PAR_PROV', 'C', 50, 0), ('HOME_NO', 'C', 10, 0),
+    ('HOME_BAN', 'C', 50, 0), ('HOME_MOO', 'C', 5, 0), ('HOME_TAM', 'C', 50, 0), ('HOME_AMP', 'C', 50, 0),
+    ('HOME_PROV', 'C', 50, 0), ('PERIMETER', 'N', 19, 11), ('AREA_RAI', 'N', 19, 11), ('WA_SQ', 'N', 19, 11),
+    ('REMARK', 'C', 100, 0), ('BAN_TYPE', 'N', 5, 0), ('YEAR', 'C', 4, 0), ('TARGET_FID', 'N', 19, 11),
+    ('PTYPE', 'C', 100, 0),
+)
+
+UTM47N_PRJ = ('PROJCS["WGS_1984_UTM_Zone_47N",GEOGCS["GCS_WGS_1984",DATUM["D_WGS_1984",'
+              'SPHEROID["WGS_1984",6378137.0,298.257223563]],PRIMEM["Greenwich",0.0],'
+              'UNIT["Degree",0.0174532925199433]],PROJECTION["Transverse_Mercator"],'
+              'PARAMETER["False_Easting",500000.0],PARAMETER["False_Northing",0.0],'
+              'PARAMETER["Central_Meridian",99.0],PARAMETER["Scale_Factor",0.9996],'
+              'PARAMETER["Latitude_Of_Origin",0.0],UNIT["Meter",1.0]]')
+
+# ============================================================
+# ค่าตามสัดส่วนของไฟล์จริง (ชื่อสถานที่ — ไม่ใช่ข้อมูลบุคคล)
+# ============================================================
+# (PAR_BAN, BAN_E, PAR_MOO, PAR_TAM, PAR_AMP, BAN_TYPE, น้ำหนัก)
+VILLAGES = (
+    ('เขาแก่งเรียง', 'BKR', 3, 'ท่ากระดาน', 'ศรีสวัสดิ์', 1, 453),
+    (' ปลายดินสอ', 'PDS', 5, 'แม่กระบุง', 'ศรีสวัสดิ์', 1, 226),
+    ('ทับศิลา', 'TSL', 7, 'ช่องสะเดา', 'เมืองกาญจนบุรี', 3, 195),
+    ('ช่องสะเดา', 'CSD', 1, 'ช่องสะเดา', 'เมืองกาญจนบุรี', 1, 115),
+    ('ท่ากระทิ', 'TKT', 6, 'ช่องสะเดา', 'เมืองกาญจนบุรี', 3, 65),
+    ('ปลายดินสอ', 'PDS', 5, 'แม่กระบุง', 'ศรีสวัสดิ์', 1, 34),
+    ('บ้านทุ่งก้างย่าง', 'TKY', 3, 'ไทรโยค', 'ไทรโยค', 2, 33),
+    ('บ้านพุเตย', 'BPT', 8, 'ท่าเสา', 'ไทรโยค', 3, 20),
+    ('หมอเฒ่า', 'BMT', 2, 'ช่องสะเดา', 'เมืองกาญจนบุรี', 2, 12),
+    ('บ้านพุมุด', 'BPM', 7, 'ท่าเสา', 'ไทรโยค', 2, 11),
+    ('แก่งแคบ', 'BKK', 4, 'ท่ากระดาน', 'ศรีสวัสดิ์', 2, 9),
+    ('บ้านพุองกะ', 'POK', 4, 'ท่าเสา', 'ไทรโยค', 2, 5),
+    ('บ้านท่าเสา', 'BTS', 3, 'ท่าเสา', 'ไทรโยค', 3, 1),
+)
+# (HOME_TAM, HOME_AMP, HOME_PROV, น้ำหนัก) — ที่เหลือใช้ตำบล/อำเภอเดียวกับแปลง
+HOME_ELSEWHERE = (
+    ('ลาดหญ้า', 'เมืองกาญจนบุรี', 'กาญจนบุรี', 18), ('ปากแพรก', 'เมืองกาญจนบุรี', 'กาญจนบุรี', 9),
+    ('แขวงลาดพร้าว', 'เขตลาดพร้าว', 'กรุงเทพมหานคร', 8), ('หนองบัว', 'เมืองกาญจนบุรี', 'กาญจนบุรี', 8),
+    ('วังด้ง', 'เมืองกาญจนบุรี', 'กาญจนบุรี', 8), ('บ่อสุพรรณ', 'สองพี่น้อง', 'สุพรรณบุรี', 7),
+)
+HOME_ELSEWHERE_RATE = 0.13
+TITLES = (('นาย', 640), ('นาง', 361), ('นางสาว', 165), ('ว่าที่', 2), ('ร.ต.', 2), ('พ.ต.', 1),
+          ('จ.ส.อ.', 1), ('พ.ต.ต.', 1))
+REMARKS = (('ไม่ล่อแหลม', 1033), ('ล่อแหลม', 115), ('ล่อแหลม/แปลงทวงคืน', 4), ('ไม่ล่อแหลม/แปลงทวงคืน', 3),
+           ('ไม่ล่อแหลม/มอบอำนาจ', 3))
+PTYPES = (('ที่อยู่อาศัยและท', 578), ('ที่อยู่อาศัยและที่ทำกิน', 453), ('ที่ทำกิน', 132), ('ที่อยู่อาศัย', 16))
+PARK_NAMES = (('เอราวัณ', 1038), ('เอราวัน', 141))
+CODE_DNP = 1012
+YEAR = 2567
+
+# พยางค์สำหรับประกอบชื่อ/สกุล (ไม่ใช่ชื่อคนจริง)
+FIRST_SYLLABLES = ('สม', 'ศรี', 'บุญ', 'ทอง', 'คำ', 'แก้ว', 'จัน', 'ประ', 'วิ', 'สุ', 'มา', 'นวล',
+                   'อำ', 'พร', 'ชัย', 'ดวง', 'เพ็ญ', 'ลำ', 'สาย', 'บัว')
+LAST_SYLLABLES = ('ใจ', 'ชาย', 'สุข', 'มี', 'ดี', 'ศักดิ์', 'พร', 'ทิพย์', 'เดช', 'รัตน์', 'วงศ์', 'นาค',
+                  'สิงห์', 'แสง', 'เงิน', 'ผล', 'งาม', 'ทอง', 'คำ', 'ศรี')
+
+ARTIFACT = '_x000D_\n'
+
+# สัดส่วนปัญหาเริ่มต้น (ประมาณจากไฟล์จริง)
+DEFAULTS = {
+    'invalid_id_rate': 0.008,   # คนที่เลขบัตรผิด (checksum / ไม่ครบ 13 หลัก / มีช่องว่าง / มีตัวอักษร)
+    'artifact_rate': 0.002,     # แถวที่ NAME/SURNAME มี _x000D_
+    'date_home_rate': 0.15,     # HOME_NO ที่กลายเป็นวันที่ (เช่น "8/1" → 2026-01-08)
+    'dup_rate': 0.07,           # แถวเพิ่มที่ใช้ SPAR_CODE ซ้ำกับแถวก่อนหน้า
+    'repeat_owner_rate': 0.22,  # แปลงของคนที่มีแปลงอยู่แล้ว (เลขบัตรซ้ำหลายแถว)
+    'vacant_rate': 0.15,        # ช่องของ lattice ที่ไม่มีแปลง
+    'cell': 60.0,               # ขนาดช่อง (เมตร) — แปลงเฉลี่ยราว 2 ไร่
+}
+CENTER = (508300.0, 1586000.0)  # กึ่งกลางกลุ่มแปลงจริง (UTM 47N)
+
+
+def parse_count(text):
+    """'1k' → 1000, '1m' → 1000000, '2500' → 2500"""
+    t = str(text).strip().lower().replace(',', '').replace('_', '')
+    mult = 1
+    if t.endswith('k'):
+        mult, t = 1000, t[:-1]
+    elif t.endswith('m'):
+        mult, t = 1000000, t[:-1]
+    return int(float(t) * mult)
+
+
+def label_count(n):
+    if n >= 1000000 and n % 1000000 == 0:
+        return f"{n // 1000000}m"
+    if n >= 1000 and n % 1000 == 0:
+        return f"{n // 1000}k"
+    return str(n)
+
+
+_CUMULATIVE = {}
+
+
+def _pick(rng, items):
+    """สุ่มหนึ่งตัวตามน้ำหนัก (ตัวท้ายของ tuple) — สะสมน้ำหนักครั้งเดียวต่อ tuple"""
+    cum = _CUMULATIVE.get(id(items))
+    if cum is None:
+        cum = _CUMULATIVE[id(items)] = list(itertools.accumulate(it[-1] for it in items))
+    return items[bisect.bisect_right(cum, rng.random() * cum[-1])]
+
+
+# ============================================================
+# เลขบัตร / ชื่อ
+# ============================================================
+def valid_idcard(rng):
+    digits = [int(rng.integers(1, 9))] + [int(d) for d in rng.integers(0, 10, 11)]
+    s = ''.join(map(str, digits))
+    return s + str(idcard_check_digit(s))
+
+
+def invalid_idcard(rng):
+    """(ค่าในเซลล์, ชนิดปัญหา) — xlsx จริงเก็บเลขบัตรเป็น int ยกเว้นแบบที่มีช่องว่าง/ตัวอักษร"""
+    good = valid_idcard(rng)
+    kind = ('checksum', 'short', 'space', 'letter')[int(rng.integers(0, 4))]
+    if kind == 'checksum':
+        return int(good[:12] + str((int(good[12]) + int(rng.integers(1, 10))) % 10)), kind
+    if kind == 'short':
+        return int(good[:12]), kind
+    if kind == 'space':
+        return f"{good[0]} {good[1:5]} {good[5:10]} {good[10:12]} {good[12]}", kind
+    return good[:6] + 'O' + good[7:], kind
+
+
+def make_name(rng, syllables, n, max_bytes=50):
+    """ต่อพยางค์สุ่ม n พยางค์ — ไม่เกินขนาด field C(50) ของ .dbf (ภาษาไทย 3 byte/ตัว)"""
+    name = ''
+    for i in rng.integers(0, len(syllables), n):
+        if len((name + syllables[int(i)]).encode('utf-8')) > max_bytes:
+            break
+        name += syllables[int(i)]
+    return name
+
+
+# ============================================================
+# Polygon: lattice ที่ขยับจุด (ขอบร่วมกันพอดี)
+# ============================================================
+class Lattice:
+    """ช่อง (r, c) มุมล่างซ้าย = (x0 + c*cell, y0 + r*cell) — มุมทุกจุดและจุดกลางขอบ (ขอบละ 2 จุด)
+    ขยับแบบสุ่มครั้งเดียวและใช้ร่วมกันทุกช่องที่แตะ จึงไม่มีช่องว่าง/ทับกันระหว่างแปลงข้างเคียง"""
+
+    def __init__(self, rows, cols, cell, rng, origin):
+        self.rows, self.cols, self.cell = rows, cols, cell
+        self.x0, self.y0 = origin
+        j = 0.18 * cell
+        self.corner = rng.uniform(-j, j, (rows + 1, cols + 1, 2))
+        self.h_mid = rng.uniform(-0.1 * cell, 0.1 * cell, (rows + 1, cols, 2, 2))     # ขอบแนวนอน
+        self.v_mid = rng.uniform(-0.1 * cell, 0.1 * cell, (rows, cols + 1, 2, 2))     # ขอบแนวตั้ง
+        self.h_use = rng.random((rows + 1, cols, 2)) < 0.6
+        self.v_use = rng.random((rows, cols + 1, 2)) < 0.6
+
+    def _corner(self, r, c):
+        return np.stack((self.x0 + c * self.cell, self.y0 + r * self.cell), axis=-1) + self.corner[r, c]
+
+    def rings(self, r, c):
+        """ring ของช่อง (r, c) (array) — (n, 12, 2) วนตามเข็ม จุดที่ไม่ใช้ซ้ำกับจุดก่อนหน้า
+        และ mask (n, 12) ของจุดที่ใช้จริง"""
+        tl, tr = self._corner(r + 1, c), self._corner(r + 1, c + 1)
+        br, bl = self._corner(r, c + 1), self._corner(r, c)
+        t = np.array([1 / 3, 2 / 3])[None, :, None]
+        top = tl[:, None] + t * (tr - tl)[:, None] + self.h_mid[r + 1, c]           # ซ้าย → ขวา
+        bottom = bl[:, None] + t * (br - bl)[:, None] + self.h_mid[r, c]            # ซ้าย → ขวา
+        left = bl[:, None] + t * (tl - bl)[:, None] + self.v_mid[r, c]              # ล่าง → บน
+        right = br[:, None] + t * (tr - br)[:, None] + self.v_mid[r, c + 1]         # ล่าง → บน
+        pts = np.concatenate((tl[:, None], top, tr[:, None], right[:, ::-1], br[:, None],
+                              bottom[:, ::-1], bl[:, None], left), axis=1)
+        use = np.concatenate((np.ones((len(r), 1), bool), self.h_use[r + 1, c], np.ones((len(r), 1), bool),
+                              self.v_use[r, c + 1][:, ::-1], np.ones((len(r), 1), bool),
+                              self.h_use[r, c][:, ::-1], np.ones((len(r), 1), bool), self.v_use[r, c]), axis=1)
+        # จุดที่ไม่ใช้ → ซ้ำจุดก่อนหน้า (ขอบยาว 0 ไม่มีผลต่อพื้นที่/centroid)
+        for k in range(1, pts.shape[1]):
+            pts[~use[:, k], k] = pts[~use[:, k], k - 1]
+        return pts, use
+
+
+def area_centroid(pts):
+    """พื้นที่ (ตร.ม., บวก) และ centroid ของ ring (n, k, 2) แบบ vectorized"""
+    x, y = pts[..., 0], pts[..., 1]
+    xn, yn = np.roll(x, -1, axis=1), np.roll(y, -1, axis=1)
+    cross = x * yn - xn * y
+    a = cross.sum(axis=1) / 2
+    cx = ((x + xn) * cross).sum(axis=1) / (6 * a)
+    cy = ((y + yn) * cross).sum(axis=1) / (6 * a)
+    return np.abs(a), cx, cy
+
+
+# ============================================================
+# Generator
+# ============================================================
+class Generator:
+    """สร้างแถวทีละ block — for rows, rings in gen.blocks(): ...
+    rows: [dict ตาม XLSX_HEADERS + '_dbf' (ค่าสำหรับ .dbf)], rings: [ndarray (k, 2) ปิด วนตามเข็ม]
+    stats นับปัญหาที่ใส่ไว้ (ใช้ตรวจว่า tool เจอครบ)"""
+
+    def __init__(self, total_rows, seed=0, block=50000, **options):
+        self.total = total_rows
+        self.block = block
+        self.opt = dict(DEFAULTS, **options)
+        self.rng = np.random.default_rng(seed)
+        self.plots = max(1, round(total_rows / (1 + self.opt['dup_rate'])))
+        cells = math.ceil(self.plots / (1 - self.opt['vacant_rate']))
+        cols = math.ceil(math.sqrt(cells))
+        rows = math.ceil(cells / cols)
+        cell = self.opt['cell']
+        origin = (CENTER[0] - cols * cell / 2, CENTER[1] - rows * cell / 2)
+        self.lattice = Lattice(rows, cols, cell, self.rng, origin)
+        # เลือกช่องที่มีแปลง แล้วแบ่งหมู่บ้านเป็นแถบตามคอลัมน์ (สัดส่วนตามไฟล์จริง)
+        occupied = np.sort(self.rng.choice(rows * cols, self.plots, replace=False))
+        self.cell_r, self.cell_c = occupied // cols, occupied % cols
+        w = np.array([v[-1] for v in VILLAGES], dtype=np.float64)
+        edges = np.cumsum(w / w.sum()) * cols
+        self.cell_village = np.minimum(np.searchsorted(edges, self.cell_c, side='right'), len(VILLAGES) - 1)
+        order = np.argsort(self.cell_village, kind='stable')     # แถวเรียงตามหมู่บ้านเหมือนไฟล์จริง
+        self.cell_r, self.cell_c = self.cell_r[order], self.cell_c[order]
+        self.cell_village = self.cell_village[order]
+
+        self.people = []            # [dict] ต่อคน
+        self.by_village = {}        # village -> [index คน]
+        self.owner_plots = {}       # index คน -> จำนวนแปลงที่มี
+        self.spar_no = {}           # BAN_E -> เลขลำดับเจ้าของล่าสุด (PAR_BAN สะกดต่างกันแต่ใช้รหัสเดียวกัน)
+        self.stats = {'rows': 0, 'plots': 0, 'people': 0, 'invalid_id_people': 0, 'invalid_id_rows': 0,
+                      'invalid_id_kinds': {}, 'artifact_rows': 0, 'date_home_rows': 0,
+                      'dup_co_owner': 0, 'dup_same_geo': 0, 'dup_diff_geo': 0}
+
+    # ---------- คน ----------
+    def _new_person(self, v):
+        rng = self.rng
+        village = VILLAGES[v]
+        if rng.random() < self.opt['invalid_id_rate']:
+            idcard, kind = invalid_idcard(rng)
+            self.stats['invalid_id_people'] += 1
+            self.stats['invalid_id_kinds'][kind] = self.stats['invalid_id_kinds'].get(kind, 0) + 1
+        else:
+            idcard, kind = int(valid_idcard(rng)), None
+        if rng.random() < HOME_ELSEWHERE_RATE:
+            h = _pick(rng, HOME_ELSEWHERE)
+            home = (village[0].strip(), h[0], h[1], h[2])
+        else:
+            home = (village[0].strip(), village[3], village[4], 'กาญจนบุรี')
+        a, b = int(rng.integers(1, 200)), int(rng.integers(1, 13))
+        roll = rng.random()
+        if roll < self.opt['date_home_rate']:
+            # "d/m" ที่ Excel แปลงเป็นวันที่ (fix_xlsx.py แปลงกลับ)
+            d = min(a, 28)
+            home_no, home_text = datetime(2026, b, d), f"{d}/{b}"
+        elif roll < self.opt['date_home_rate'] + 0.29:
+            home_no = home_text = f"{a}/{b}"
+        else:
+            home_no, home_text = a, str(a)
+        spar_no = self.spar_no[village[1]] = self.spar_no.get(village[1], 0) + 1
+        person = {
+            'title': _pick(rng, TITLES)[0],
+            'name': make_name(rng, FIRST_SYLLABLES, int(rng.integers(2, 4))),
+            'surname': make_name(rng, LAST_SYLLABLES, int(rng.integers(2, 5))),
+            'idcard': idcard, 'invalid': kind is not None,
+            'home_no': home_no, 'home_text': home_text,
+            'home_moo': '-' if rng.random() < 0.07 else int(rng.integers(1, 12)),
+            'home': home, 'village': v, 'spar_no': spar_no,
+        }
+        self.people.append(person)
+        self.by_village.setdefault(v, []).append(len(self.people) - 1)
+        self.stats['people'] += 1
+        return len(self.people) - 1
+
+    def _owner(self, v):
+        pool = self.by_village.get(v)
+        if pool and self.rng.random() < self.opt['repeat_owner_rate']:
+            return pool[int(self.rng.integers(max(0, len(pool) - 50), len(pool)))]
+        return self._new_person(v)
+
+    # ---------- แถว ----------
+    def _row(self, fid, pi, v, area, cx, cy, spar_code, num_apar, num_spar):
+        rng = self.rng
+        p = self.people[pi]
+        village = VILLAGES[v]
+        name, surname = p['name'], p['surname']
+        if rng.random() < self.opt['artifact_rate']:
+            if rng.random() < 0.8:
+                surname += ARTIFACT
+            else:
+                name += ARTIFACT
+            self.stats['artifact_rows'] += 1
+        if isinstance(p['home_no'], datetime):
+            self.stats['date_home_rows'] += 1
+        if p['invalid']:
+            self.stats['invalid_id_rows'] += 1
+        rai = int(area // 1600)
+        ngan = int(area % 1600 // 400)
+        wa = float(area % 400 / 4)
+        park = _pick(rng, PARK_NAMES)[0]
+        remark = _pick(rng, REMARKS)[0]
+        ptype = _pick(rng, PTYPES)[0]
+        home_ban, home_tam, home_amp, home_prov = p['home']
+        row = {
+            'FID': fid, 'Shape *': 'Polygon', 'TARGET_FID': 0, 'NAME_DNP_T': 'อุทยานแห่งชาติ',
+            'NAME_DNP': park, 'CODE_DNP': CODE_DNP, 'APAR_CODE': ' ', 'APAR_NO': 10000 + p['spar_no'],
+            'NUM_APAR': num_apar, 'SPAR_CODE': spar_code, 'SPAR_NO': p['spar_no'], 'NUM_SPAR': num_spar,
+            'E': float(cx), 'N': float(cy), 'PAR_BAN': village[0], 'BAN_E': village[1], 'PAR_MOO': village[2],
+            'PAR_TAM': village[3], 'PAR_AMP': village[4], 'PAR_PROV': 'กาญจนบุรี',
+            'NAME_TITLE': p['title'], 'NAME': name, 'SURNAME': surname, 'IDCARD': p['idcard'],
+            'HOME_NO': p['home_no'], 'HOME_BAN': home_ban, 'HOME_MOO': p['home_moo'], 'HOME_TAM': home_tam,
+            'HOME_AMP': home_amp, 'HOME_PROV': home_prov,
+            'PERIMETER': float(area),       # ไฟล์จริงเก็บพื้นที่ (ตร.ม.) ไว้ในคอลัมน์นี้
+            'AREA_RAI': rai, 'RAI': rai, 'NGAN': ngan, 'WA_SQ': wa, 'REMARK': remark,
+            'BAN_TYPE': village[5], 'YEAR': YEAR, 'PTYPE': ptype,
+        }
+        # .dbf เก็บข้อความต้นฉบับ (ก่อน Excel แปลงเป็นวันที่) และไม่มี _x000D_
+        row['_dbf'] = dict(row, NAME=p['name'], SURNAME=p['surname'], HOME_NO=p['home_text'],
+                           IDCARD=str(p['idcard']), YEAR=str(YEAR))
+        self.stats['rows'] += 1
+        return row
+
+    def blocks(self):
+        rng = self.rng
+        fid = 0
+        remaining_dups = self.total - self.plots
+        for s in range(0, self.plots, self.block):
+            r = self.cell_r[s:s + self.block]
+            c = self.cell_c[s:s + self.block]
+            pts, use = self.lattice.rings(r, c)
+            area, cx, cy = area_centroid(pts)
+            rows, rings = [], []
+            left = self.plots - s
+            for k in range(len(r)):
+                v = int(self.cell_village[s + k])
+                pi = self._owner(v)
+                p = self.people[pi]
+                nplot = self.owner_plots.get(pi, 0) + 1
+                self.owner_plots[pi] = nplot
+                spar_code = f"{VILLAGES[v][1]}{CODE_DNP}{p['spar_no']:05d}{nplot:05d}"
+                ring = pts[k][use[k]]
+                ring = np.vstack((ring, ring[:1]))
+                rows.append(self._row(fid, pi, v, area[k], cx[k], cy[k], spar_code, 10000 + nplot, nplot))
+                rings.append(ring)
+                fid += 1
+                self.stats['plots'] += 1
+
+                # แถว SPAR_CODE ซ้ำ — กระจายให้ครบจำนวนพอดีเมื่อถึงแปลงสุดท้าย
+                if remaining_dups > 0 and rng.random() < remaining_dups / (left - k):
+                    remaining_dups -= 1
+                    kind = rng.random()
+                    if kind < 0.8:
+                        # ผู้ร่วมครอบครอง: SPAR_CODE เดียวกัน NUM_APAR ใหม่ คนละคน polygon เดียวกัน
+                        other = self._new_person(v)
+                        rows.append(self._row(fid, other, v, area[k], cx[k], cy[k], spar_code,
+                                              20000 + nplot, nplot))
+                        rings.append(ring)
+                        self.stats['dup_co_owner'] += 1
+                    elif kind < 0.9:
+                        # DUP ทั้ง SPAR_CODE + NUM_APAR และ geometry เหมือนกัน (ลบได้)
+                        rows.append(self._row(fid, pi, v, area[k], cx[k], cy[k], spar_code,
+                                              10000 + nplot, nplot))
+                        rings.append(ring.copy())
+                        self.stats['dup_same_geo'] += 1
+                    else:
+                        # DUP SPAR_CODE + NUM_APAR แต่ geometry ต่าง (ย่อ 60% รอบ centroid — ลบไม่ได้)
+                        small = (ring - (cx[k], cy[k])) * 0.6 + (cx[k], cy[k])
+                        a2 = area[k] * 0.36
+                        rows.append(self._row(fid, pi, v, a2, cx[k], cy[k], spar_code, 10000 + nplot, nplot))
+                        rings.append(small)
+                        self.stats['dup_diff_geo'] += 1
+                    fid += 1
+            yield rows, rings
+
+
+# ============================================================
+# Writers
+# ============================================================
+def xlsx_writer():
+    """(workbook, sheet) แบบ write-only (stream) — ชีต Sheet1 แถวแรกเป็น header เหมือนไฟล์จริง
+    เพิ่มแถวด้วย sheet.append(xlsx_row(row)) แล้ว workbook.save(path)"""
+    import openpyxl
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet('Sheet1')
+    ws.append(list(XLSX_HEADERS))
+    return wb, ws
+
+
+def xlsx_row(row):
+    return [row[h] for h in XLSX_HEADERS]
+
+
+def shp_writer(base):
+    """shapefile.Writer พร้อม field แบบไฟล์จริง — เขียนด้วย add_shape() แล้ว close_shp()"""
+    import shapefile
+    w = shapefile.Writer(base, shapeType=shapefile.POLYGON, encoding='utf-8')
+    for name, kind, size, dec in SHP_FIELDS:
+        w.field(name, kind, size=size, decimal=dec)
+    return w
+
+
+def add_shape(w, row, ring):
+    dbf = row['_dbf']
+    w.poly([ring.tolist()])
+    # ช่องว่างล้วน (APAR_CODE ' ') ใน .dbf คือค่าว่าง
+    w.record(*[dbf[name] if kind == 'N' else ('' if dbf[name] is None else str(dbf[name]).strip())
+               for name, kind, _, _ in SHP_FIELDS])
+
+
+def close_shp(w, base):
+    w.close()
+    with open(base + '.prj', 'w', encoding='ascii') as f:
+        f.write(UTM47N_PRJ)
+    with open(base + '.cpg', 'w', encoding='ascii') as f:
+        f.write('UTF-8')
@@ -0,0 +1,202 @@
+"""
+ย่อ geometry ของแปลงแบบรักษา topology — ขอบที่แปลงข้างเคียงใช้ร่วมกันถูกย่อครั้งเดียว จึงยังทับกันสนิท
+
+ขั้นตอน (ทำในพิกัด UTM หน่วยเมตร):
+1. snap ทุกจุดเข้า grid (default 1 ซม.) ให้จุดที่ควรเป็นจุดเดียวกันของแปลงข้างเคียงตรงกันทุก bit
+2. หา junction — จุดที่เพื่อนบ้าน (จุดก่อน/หลัง) ต่างกันระหว่าง ring ที่ผ่านจุดนั้น
+3. ตัด ring ที่ junction เป็น arc แล้วรวม arc ที่ซ้ำกัน (รวมถึงที่วิ่งกลับทิศ) เหลือชุดเดียว
+   ring ที่ไม่มี junction เป็น arc ปิดหนึ่งเส้น (หมุนให้เริ่มที่จุดน้อยสุด — polygon ซ้ำกันได้ arc เดียวกัน)
+4. ย่อแต่ละ arc ด้วย Douglas–Peucker โดยคงปลายทั้งสอง (junction) ไว้
+   ring ที่ย่อแล้วเหลือไม่ถึง 3 จุดจะย่อ arc ของมันใหม่ด้วย tolerance ครึ่งหนึ่งจนกว่าจะพอ
+
+ผลลัพธ์ Topology ใช้สร้างทั้ง GeoJSON (ประกอบ ring จาก arc) และ TopoJSON (arc ใช้ร่วมกัน)
+ต้องติดตั้ง numpy
+"""
+from .geo import np
+
+
+class Topology:
+    """polygons[k] = [ring, ...] — ring คือ list ของ arc index (ลบ = ~index คือวิ่งกลับทิศ)"""
+
+    def __init__(self, snap):
+        self.snap = snap
+        self.arcs = []          # [ndarray (n, 2) พิกัด UTM หลัง snap]
+        self.original = []      # [ndarray (n, 2) พิกัดเดิมก่อน snap ของจุดเดียวกัน]
+        self.simplified = []    # [ndarray (m, 2)] หลัง simplify()
+        self.polygons = []
+        self.dropped_rings = 0  # ring ที่มีไม่ถึง 3 จุดหลัง snap
+
+    @property
+    def num_points(self):
+        return sum(len(a) for a in self.arcs)
+
+    def ring_coords(self, ring, arcs=None):
+        """พิกัดของ ring (ปิด — จุดแรก = จุดสุดท้าย) จาก arc"""
+        arcs = self.simplified if arcs is None else arcs
+        parts = []
+        for i, idx in enumerate(ring):
+            a = arcs[idx] if idx >= 0 else arcs[~idx][::-1]
+            parts.append(a if i == 0 else a[1:])
+        return np.concatenate(parts)
+
+    # ============================================================
+    # Simplify
+    # ============================================================
+    def simplify(self, tolerance):
+        """Douglas–Peucker ทุก arc — คืน (จำนวน arc ที่ต้องลด tolerance เพื่อกัน ring ยุบ)"""
+        tol = [tolerance] * len(self.arcs)
+        self.simplified = [douglas_peucker(a, tolerance) for a in self.arcs]
+        refined = set()
+        changed = True
+        while changed:
+            changed = False
+            for poly in self.polygons:
+                for ring in poly:
+                    if _distinct_points(self.ring_coords(ring)) >= 3:
+                        continue
+                    for idx in ring:
+                        i = idx if idx >= 0 else ~idx
+                        if len(self.simplified[i]) < len(self.arcs[i]):
+                            tol[i] = tol[i] / 2 if tol[i] > self.snap else 0.0
+                            self.simplified[i] = douglas_peucker(self.arcs[i], tol[i])
+                            refined.add(i)
+                            changed = True
+        return len(refined)
+
+    def max_deviation(self):
+        """ระยะมากสุด (เมตร) จากจุดเดิม (ก่อน snap) ถึงเส้นที่ย่อแล้ว — (ค่ามากสุด, arc index)"""
+        worst, worst_arc = 0.0, None
+        for i, (orig, simp) in enumerate(zip(self.original, self.simplified)):
+            d = _distance_to_polyline(orig, simp).max() if len(orig) else 0.0
+            if d > worst:
+                worst, worst_arc = float(d), i
+        return worst, worst_arc
+
+
+def build(polygons, snap=0.01):
+    """polygons: [[ring ndarray (n, 2) UTM, ...], ...] (ring ปิดหรือไม่ปิดก็ได้) -> Topology
+    polygon ที่ไม่เหลือ ring เลยจะได้ [] (index ยังตรงกับ input)"""
+    topo = Topology(snap)
+
+    # --- 1. snap + ตัดจุดซ้ำติดกัน ---
+    rings = []          # [(polygon index, keys ndarray int64 แบบวน ไม่ปิด)]
+    origin = {}         # key -> พิกัดเดิม (จุดแรกที่เจอ)
+    for pi, poly in enumerate(polygons):
+        for ring in poly:
+            xy = np.asarray(ring, dtype=np.float64).reshape(-1, 2)
+            g = np.round(xy / snap).astype(np.int64)
+            keys = (g[:, 0] << 32) | (g[:, 1] & 0xFFFFFFFF)
+            keep = np.ones(len(keys), dtype=bool)
+            keep[1:] = keys[1:] != keys[:-1]
+            keys, xy = keys[keep], xy[keep]
+            while len(keys) > 1 and keys[-1] == keys[0]:
+                keys, xy = keys[:-1], xy[:-1]
+            if len(np.unique(keys)) < 3:
+                topo.dropped_rings += 1
+                continue
+            for k, p in zip(keys.tolist(), xy):
+                origin.setdefault(k, p)
+            rings.append((pi, keys.tolist()))
+
+    # --- 2. junction: จุดที่คู่เพื่อนบ้านต่างกันระหว่าง ring ---
+    first_pair = {}
+    junctions = set()
+    for _, keys in rings:
+        n = len(keys)
+        for i, k in enumerate(keys):
+            a, b = keys[i - 1], keys[(i + 1) % n]
+            pair = (a, b) if a < b else (b, a)
+            seen = first_pair.setdefault(k, pair)
+            if seen != pair:
+                junctions.add(k)
+
+    # --- 3. ตัดเป็น arc + รวม arc ซ้ำ ---
+    arc_index = {}
+    arc_keys = []
+
+    def add_arc(seq):
+        t = tuple(seq)
+        idx = arc_index.get(t)
+        if idx is not None:
+            return idx
+        idx = arc_index.get(t[::-1])
+        if idx is not None:
+            return ~idx
+        arc_index[t] = len(arc_keys)
+        arc_keys.append(t)
+        return len(arc_keys) - 1
+
+    topo.polygons = [[] for _ in polygons]
+    for pi, keys in rings:
+        cuts = [i for i, k in enumerate(keys) if k in junctions]
+        if not cuts:
+            seq = _canonical_loop(keys)
+            topo.polygons[pi].append([add_arc(seq + [seq[0]])])
+            continue
+        start = cuts[0]
+        rot = keys[start:] + keys[:start]
+        cuts = [c - start for c in cuts] + [len(keys)]
+        rot.append(rot[0])
+        ring_arcs = [add_arc(rot[c0:c1 + 1]) for c0, c1 in zip(cuts, cuts[1:])]
+        topo.polygons[pi].append(ring_arcs)
+
+    for t in arc_keys:
+        k = np.array(t, dtype=np.int64)
+        topo.arcs.append(np.column_stack(((k >> 32), (k << 32) >> 32)).astype(np.float64) * snap)
+        topo.original.append(np.array([origin[x] for x in t]))
+    topo.simplified = list(topo.arcs)
+    return topo
+
+
+def _canonical_loop(keys):
+    """หมุน ring ที่ไม่มี junction ให้เริ่มจากจุดน้อยสุด และเลือกทิศที่ลำดับน้อยกว่า"""
+    m = keys.index(min(keys))
+    fwd = keys[m:] + keys[:m]
+    rev = [fwd[0]] + fwd[1:][::-1]
+    return min(fwd, rev)
+
+
+def _distinct_points(coords):
+    return len({(x, y) for x, y in coords.tolist()})
+
+
+# ============================================================
+# Douglas–Peucker
+# ============================================================
+def douglas_peucker(pts, tolerance):
+    """คงจุดแรก/สุดท้ายเสมอ — arc ปิด (จุดแรก = จุดสุดท้าย) ใช้ระยะถึงจุดแทนระยะถึงเส้น"""
+    n = len(pts)
+    if n <= 2 or tolerance <= 0:
+        return pts
+    keep = np.zeros(n, dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, n - 1)]
+    while stack:
+        i, j = stack.pop()
+        if j <= i + 1:
+            continue
+        d = _segment_distance(pts[i + 1:j], pts[i], pts[j])
+        k = int(np.argmax(d))
+        if d[k] > tolerance:
+            k += i + 1
+            keep[k] = True
+            stack.append((i, k))
+            stack.append((k, j))
+    return pts[keep]
+
+
+def _segment_distance(p, a, b):
+    """ระยะจากทุกจุดใน p (m, 2) ถึงส่วนของเส้นตรง a-b"""
+    ab = b - a
+    denom = float(ab @ ab)
+    if denom == 0.0:
+        return np.hypot(*(p - a).T)
+    t = np.clip(((p - a) @ ab) / denom, 0.0, 1.0)
+    proj = a + t[:, None] * ab
+    return np.hypot(*(p - proj).T)
+
+
+def _distance_to_polyline(p, line):
+    if len(line) == 1:
+        return np.hypot(*(p - line[0]).T)
+    return np.min([_segment_distance(p, a, b) for a, b in zip(line[:-1], line[1:])], axis=0)
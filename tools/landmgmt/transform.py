@@ -0,0 +1,409 @@
+"""
+แปลงแถวจาก ตารางแปลงสอบทาน2.xlsx เป็น record สำหรับ villagers + land_plots
+
+ฟังก์ชันทั้งหมดอยู่ระดับ module จึง pickle ส่งเข้า process pool ได้
+Pipeline แบ่งแถวเป็นชุด (chunk) ส่งให้ process pool แปลง แล้วส่ง record ออกตามลำดับแถวเดิม
+ผ่าน queue ที่จำกัดขนาด — ฝั่งเขียน DB อ่านจาก Pipeline ได้ทันทีขณะชุดถัดไปกำลังแปลง
+
+    pipe = Pipeline(rows, headers, workers=4)
+    for rec in pipe:
+        ...
+    pipe.skipped   # จำนวนแถวว่าง
+"""
+import itertools
+import queue
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from .geo import np, utm_to_latlng, utm_to_latlng_array
+from .validators import check_idcard
+
+# ============================================================
+# คอลัมน์
+# ============================================================
+HEADER_MARKERS = ('NAME', 'SURNAME', 'IDCARD', 'SPAR_CODE', 'NUM_APAR')
+
+VILLAGER_COLS = ('prefix', 'first_name', 'last_name', 'village_name', 'village_no',
+                 'sub_district', 'district', 'province', 'address')
+
+# คอลัมน์ land_plots ที่ UPDATE ทับตรงๆ (ที่เหลือ UPDATE แบบ COALESCE)
+PLOT_DIRECT_COLS = ('area_rai', 'area_ngan', 'area_sqwa', 'land_use_type', 'status',
+                    'perimeter', 'remark_risk', 'data_issues')
+PLOT_COALESCE_COLS = ('park_name', 'latitude', 'longitude', 'code_dnp', 'apar_code',
+                      'apar_no', 'num_apar', 'spar_code', 'ban_e', 'ban_type', 'num_spar',
+                      'spar_no', 'par_ban', 'par_moo', 'par_tam', 'par_amp', 'par_prov',
+                      'ptype', 'target_fid', 'occupation_since')
+PLOT_COLS = PLOT_DIRECT_COLS + PLOT_COALESCE_COLS
+
+
+def find_header(head_rows):
+    """(index ของแถว header แบบ 0-based, {ชื่อคอลัมน์: index}) จากแถวแรกๆ ของชีต"""
+    header_row_idx = 0
+    for ri in range(len(head_rows)):
+        for ci, val in enumerate(head_rows[ri]):
+            if val and str(val).strip().upper() in HEADER_MARKERS:
+                header_row_idx = ri
+                break
+        if header_row_idx != 0:
+            break
+
+    headers = {}
+    for ci, val in enumerate(head_rows[header_row_idx] if head_rows else ()):
+        if val:
+            headers[str(val).strip().upper()] = ci
+    return header_row_idx, headers
+
+
+def row_dict(row, headers):
+    """tuple ของแถว -> dict {ชื่อคอลัมน์: ค่า}"""
+    n = len(row)
+    return {name: row[ci] for name, ci in headers.items() if ci < n}
+
+
+# ============================================================
+# Map PTYPE -> land_use_type enum
+# ============================================================
+def map_land_use(ptype):
+    if not ptype:
+        return 'other'
+    if 'อยู่อาศัย' in ptype and 'ทำกิน' in ptype:
+        return 'mixed'
+    if 'อยู่อาศัย' in ptype:
+        return 'residential'
+    if 'เกษตร' in ptype or 'ทำกิน' in ptype:
+        return 'agriculture'
+    if 'สวน' in ptype:
+        return 'garden'
+    if 'ปศุสัตว์' in ptype or 'เลี้ยง' in ptype:
+        return 'livestock'
+    return 'other'
+
+
+# ============================================================
+# Map REMARK -> remark_risk enum
+# ============================================================
+def map_remark(remark):
+    if not remark:
+        return 'not_risky'
+    r = str(remark).strip()
+    if r == 'ล่อแหลมมีคดี':
+        return 'risky_case'
+    if r == 'ไม่ล่อแหลมมีคดี':
+        return 'not_risky_case'
+    if 'ล่อแหลม' in r:
+        return 'risky'
+    if 'ไม่ล่อแหลม' in r:
+        return 'not_risky'
+    return 'not_risky'
+
+
+# Helper to get cell value from row dict
+def get_val(row_data, col_name):
+    return row_data.get(col_name)
+
+
+def get_str(row_data, col_name):
+    v = get_val(row_data, col_name)
+    if v is None:
+        return ''
+    return str(v).strip()
+
+
+def get_float(row_data, col_name):
+    v = get_val(row_data, col_name)
+    if v is None:
+        return 0.0
+    try:
+        return float(v)
+    except (ValueError, TypeError):
+        return 0.0
+
+
+# ============================================================
+# Transform: 1 แถว xlsx -> record สำหรับ villagers + land_plots
+# ============================================================
+def transform_row(row_num, rd):
+    """แปลงแถวข้อมูลเป็น dict พร้อมเขียน DB — คืน None ถ้าเป็นแถวว่าง"""
+    # --- Read fields ---
+    idcard     = get_str(rd, 'IDCARD')
+    name_title = get_str(rd, 'NAME_TITLE')
+    name       = get_str(rd, 'NAME')
+    surname    = get_str(rd, 'SURNAME')
+    home_no    = get_str(rd, 'HOME_NO')
+    home_ban   = get_str(rd, 'HOME_BAN')
+    home_moo   = get_str(rd, 'HOME_MOO')
+    home_tam   = get_str(rd, 'HOME_TAM')
+    home_amp   = get_str(rd, 'HOME_AMP')
+    home_prov  = get_str(rd, 'HOME_PROV')
+
+    spar_code  = get_str(rd, 'SPAR_CODE')
+    name_dnp   = get_str(rd, 'NAME_DNP')
+    code_dnp   = get_str(rd, 'CODE_DNP')
+    apar_code  = get_str(rd, 'APAR_CODE')
+    apar_no    = get_str(rd, 'APAR_NO')
+    num_apar   = get_str(rd, 'NUM_APAR')
+    spar_no    = get_str(rd, 'SPAR_NO').zfill(5) if get_str(rd, 'SPAR_NO') else ''
+    num_spar   = get_str(rd, 'NUM_SPAR').zfill(5) if get_str(rd, 'NUM_SPAR') else ''
+    par_ban    = get_str(rd, 'PAR_BAN')
+    ban_e      = get_str(rd, 'BAN_E')
+    par_moo    = get_str(rd, 'PAR_MOO')
+    par_tam    = get_str(rd, 'PAR_TAM')
+    par_amp    = get_str(rd, 'PAR_AMP')
+    par_prov   = get_str(rd, 'PAR_PROV')
+    perimeter  = get_float(rd, 'PERIMETER')
+    rai        = get_float(rd, 'RAI')
+    ngan       = get_float(rd, 'NGAN')
+    wa_sq      = get_float(rd, 'WA_SQ')
+    area_rai   = get_float(rd, 'AREA_RAI')
+    ptype      = get_str(rd, 'PTYPE')
+    remark     = get_str(rd, 'REMARK')
+    ban_type   = get_str(rd, 'BAN_TYPE')
+    year_val   = get_str(rd, 'YEAR')
+
+    e_val      = get_float(rd, 'E')
+    n_val      = get_float(rd, 'N')
+    target_fid_str = get_str(rd, 'TARGET_FID')
+
+    # Skip empty rows
+    if not idcard and not spar_code and not name:
+        return None
+
+    # --- Data issues ---
+    id_valid = check_idcard(idcard) if idcard else False
+    issues = []
+    if not idcard:
+        issues.append('ไม่มีเลขบัตร')
+    elif not id_valid:
+        issues.append(f'เลขบัตรไม่ถูกต้อง: {idcard}')
+    if not name:
+        issues.append('ไม่มีชื่อ')
+    if not surname:
+        issues.append('ไม่มีนามสกุล')
+
+    # --- UTM -> LatLng (คำนวณทีละชุดใน project_latlng) ---
+    utm_en = (e_val, n_val) if e_val > 0 and n_val > 0 else None
+
+    # --- Year conversion (พ.ศ. -> ค.ศ.) ---
+    occupation_since = None
+    if year_val:
+        try:
+            yr = int(float(year_val))
+            if yr > 2400:
+                yr -= 543
+            occupation_since = yr
+        except (ValueError, TypeError):
+            pass
+
+    # --- Plot code ---
+    plot_code = spar_code
+    if not plot_code:
+        plot_code = f'IMP-{row_num:05d}'
+        issues.append(f'ไม่มี SPAR_CODE — ใช้รหัส {plot_code}')
+
+    # --- Address ---
+    home_addr = f"{home_no} หมู่ {home_moo or '-'}" if home_no else ''
+
+    # --- Status ---
+    issue_text = '; '.join(issues) if issues else None
+    status = 'pending_review' if issue_text else 'surveyed'
+
+    # --- Target FID ---
+    target_fid = None
+    if target_fid_str:
+        try:
+            target_fid = int(float(target_fid_str))
+        except (ValueError, TypeError):
+            pass
+
+    # --- BAN_TYPE ---
+    ban_type_val = None
+    if ban_type:
+        try:
+            ban_type_val = str(int(float(ban_type)))
+        except (ValueError, TypeError):
+            ban_type_val = ban_type
+
+    # --- Villager key: เลขบัตร หรือ TEMP_ ถ้าไม่มีเลขบัตร ---
+    if idcard:
+        villager_key = idcard
+        name_default = surname_default = 'ไม่ระบุ'
+    else:
+        villager_key = f'TEMP_{row_num:05d}'
+        name_default = surname_default = f'ไม่ระบุ_{row_num}'
+
+    return {
+        'row_num': row_num,
+        'villager_key': villager_key,
+        'has_idcard': bool(idcard),
+        'id_valid': id_valid,
+        'name_default': name_default,
+        'surname_default': surname_default,
+        'villager': {
+            'prefix': name_title or None,
+            'first_name': name or None,
+            'last_name': surname or None,
+            'village_name': home_ban or None,
+            'village_no': home_moo or None,
+            'sub_district': home_tam or None,
+            'district': home_amp or None,
+            'province': home_prov or None,
+            'address': home_addr or None,
+        },
+        'plot_code': plot_code,
+        'utm': utm_en,
+        'plot': {
+            'park_name': name_dnp or None,
+            # Use RAI if > 0, otherwise AREA_RAI
+            'area_rai': rai if rai > 0 else area_rai,
+            'area_ngan': ngan,
+            'area_sqwa': wa_sq,
+            'land_use_type': map_land_use(ptype),
+            'latitude': None,
+            'longitude': None,
+            'status': status,
+            'code_dnp': code_dnp or None,
+            'apar_code': apar_code or None,
+            'apar_no': apar_no or None,
+            'num_apar': num_apar or None,
+            'spar_code': spar_code or None,
+            'ban_e': ban_e or None,
+            'perimeter': perimeter,
+            'ban_type': ban_type_val,
+            'num_spar': num_spar or None,
+            'spar_no': spar_no or None,
+            'par_ban': par_ban or None,
+            'par_moo': par_moo or None,
+            'par_tam': par_tam or None,
+            'par_amp': par_amp or None,
+            'par_prov': par_prov or None,
+            'ptype': ptype or None,
+            'target_fid': target_fid,
+            'occupation_since': occupation_since,
+            'remark_risk': map_remark(remark),
+            'data_issues': issue_text,
+        },
+    }
+
+
+def project_latlng(recs):
+    """เติม latitude/longitude จาก E/N (UTM 47N) — ทั้งชุดในครั้งเดียวถ้ามี numpy"""
+    todo = [r for r in recs if r['utm']]
+    if not todo:
+        return
+    if np is not None and len(todo) > 1:
+        lat, lng = utm_to_latlng_array([r['utm'][0] for r in todo],
+                                       [r['utm'][1] for r in todo], 47, True)
+        for r, la, lo in zip(todo, lat.tolist(), lng.tolist()):
+            r['plot']['latitude'], r['plot']['longitude'] = la, lo
+    else:
+        for r in todo:
+            r['plot']['latitude'], r['plot']['longitude'] = utm_to_latlng(*r['utm'], 47, True)
+
+
+# ============================================================
+# Worker: แปลงทีละชุด (รันใน process pool หรือ thread ของ Pipeline)
+# ============================================================
+_headers = None
+
+
+def _init_worker(headers):
+    global _headers
+    _headers = headers
+
+
+def transform_chunk(start, rows):
+    """แปลงแถวดิบชุดหนึ่ง (เลขแถวเริ่มที่ start) -> (records พร้อม lat/lng, จำนวนแถวว่าง)"""
+    recs = []
+    skipped = 0
+    for row_num, row in enumerate(rows, start):
+        rec = transform_row(row_num, row_dict(row, _headers))
+        if rec is None:
+            skipped += 1
+        else:
+            recs.append(rec)
+    project_latlng(recs)
+    return recs, skipped
+
+
+# ============================================================
+# Pipeline: process pool แปลง -> queue จำกัดขนาด -> ผู้เขียน DB คนเดียว
+# ============================================================
+_DONE = object()
+
+
+class Pipeline:
+    """วนได้ครั้งเดียว — ให้ record ตามลำดับแถว (row_num เริ่มที่ 1 นับรวมแถวว่าง)
+
+    workers <= 1 หรือข้อมูลไม่ถึง 2 ชุด: แปลงใน thread เดียว (ไม่เปิด process pool)
+    depth: จำนวนชุดที่แปลงล่วงหน้าได้ก่อนรอฝั่งเขียน (default workers * 2)
+    """
+
+    def __init__(self, rows, headers, workers=1, chunk_size=500, total=None, depth=None):
+        self.chunk_size = chunk_size
+        if total is not None:
+            workers = min(workers, -(-total // chunk_size))
+        self.workers = workers if workers > 1 else 0
+        self.skipped = 0
+        self.chunks = 0
+        self._rows = iter(rows)
+        self._headers = headers
+        self._queue = queue.Queue(maxsize=depth or max(self.workers, 1) * 2)
+        self._stop = threading.Event()
+        self._pool = None
+        if self.workers:
+            self._pool = ProcessPoolExecutor(self.workers, initializer=_init_worker,
+                                             initargs=(headers,))
+        else:
+            _init_worker(headers)
+        self._feeder = threading.Thread(target=self._feed, name='transform-feeder', daemon=True)
+        self._feeder.start()
+
+    def _put(self, item):
+        # รอจนมีที่ว่างใน queue หรือผู้อ่านสั่งหยุด
+        while not self._stop.is_set():
+            try:
+                self._queue.put(item, timeout=0.2)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def _feed(self):
+        start = 1
+        try:
+            while not self._stop.is_set():
+                chunk = list(itertools.islice(self._rows, self.chunk_size))
+                if not chunk:
+                    break
+                if self._pool is not None:
+                    item = self._pool.submit(transform_chunk, start, chunk)
+                else:
+                    item = transform_chunk(start, chunk)
+                if not self._put(item):
+                    return
+                start += len(chunk)
+        except BaseException as ex:
+            self._put(ex)
+            return
+        self._put(_DONE)
+
+    def __iter__(self):
+        try:
+            while True:
+                item = self._queue.get()
+                if item is _DONE:
+                    break
+                if isinstance(item, BaseException):
+                    raise item
+                recs, skipped = item.result() if self._pool is not None else item
+                self.skipped += skipped
+                self.chunks += 1
+                yield from recs
+        finally:
+            self.close()
+
+    def close(self):
+        self._stop.set()
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
@@ -0,0 +1,129 @@
+"""
+ตรวจสอบเลขบัตรประชาชนไทย และชื่อ/สกุล
+
+ฟังก์ชันในนี้เป็นตัวตรวจจริงของ rule ใน rules.py — regex compile ครั้งเดียวตอน import
+รับค่าได้ทั้งจาก DB (str), จาก xlsx (str/int/float) และจากฟอร์ม
+"""
+import re
+
+DIGIT_RE = re.compile(r'[0-9]')
+SPECIAL_RE = re.compile(r'[!@#$%^&*()=+\[\]{}<>|\\/:;]')
+DOTS_ONLY_RE = re.compile(r'^[\s.]+$')
+
+EMPTY_NAMES = ('ไม่ระบุ',)
+
+
+# ============================================================
+# Thai ID validation
+# ============================================================
+def idcard_check_digit(digits):
+    """หลักที่ 13 ที่ถูกต้องของเลข 12 หลักแรก"""
+    s = sum(int(digits[i]) * (13 - i) for i in range(12))
+    return (11 - (s % 11)) % 10
+
+
+def check_idcard(idc):
+    """True ถ้าเป็นเลข 13 หลักที่ checksum ถูกต้อง"""
+    if not idc:
+        return False
+    idc = str(idc)
+    if len(idc) != 13 or not idc.isdigit():
+        return False
+    return idcard_check_digit(idc) == int(idc[12])
+
+
+def validate_idcard(idc):
+    """รายการปัญหาของเลขบัตร (ว่าง = ถูกต้อง)"""
+    issues = []
+    if not idc:
+        issues.append('ไม่มีเลขบัตร')
+        return issues
+    idc = str(idc)
+    if idc.startswith('TEMP_'):
+        issues.append(f'เลขบัตรชั่วคราว: {idc}')
+        return issues
+    if ' ' in idc:
+        issues.append(f'มีช่องว่างในเลขบัตร')
+    clean = idc.replace(' ', '')
+    if len(clean) != 13:
+        issues.append(f'ไม่ครบ 13 หลัก ({len(clean)} หลัก)')
+    if not clean.isdigit():
+        issues.append('มีตัวอักษรปน')
+    elif len(clean) == 13:
+        check = idcard_check_digit(clean)
+        if check != int(clean[12]):
+            issues.append(f'checksum ผิด (หลักสุดท้ายควรเป็น {check} แต่เป็น {clean[12]})')
+        if clean.startswith('0'):
+            issues.append('ขึ้นต้นด้วย 0 (น่าสงสัย)')
+    return issues
+
+
+def validate_idcard_xlsx(id_str):
+    """แบบของ inspect_xlsx — ตัดช่องว่าง/ขีด/tab ก่อนตรวจ (เลขบัตรใน Excel มักพิมพ์เป็น 1-2345-...)
+    ข้อความใส่ค่าที่ตรวจไว้ด้วย เพื่อให้ดูในรายงานได้โดยไม่ต้องเปิดไฟล์"""
+    if not id_str:
+        return ['ไม่มีเลขบัตร']
+    clean = str(id_str).strip().replace(' ', '').replace('-', '').replace('\t', '')
+    if not clean.isdigit():
+        return [f"มีอักขระที่ไม่ใช่ตัวเลข: '{id_str}'"]
+    if len(clean) != 13:
+        return [f"ไม่ครบ 13 หลัก (มี {len(clean)} หลัก): '{clean}'"]
+    issues = []
+    check = idcard_check_digit(clean)
+    if int(clean[12]) != check:
+        issues.append(f"Check digit ไม่ถูกต้อง (คาดหวัง {check}, ได้ {clean[12]}): '{clean}'")
+    if clean[0] == '0':
+        issues.append(f"ขึ้นต้นด้วย 0 (ผิดปกติ): '{clean}'")
+    return issues
+
+
+# ============================================================
+# Name validation
+# ============================================================
+def validate_name(name, label):
+    issues = []
+    if name is not None and not isinstance(name, str):
+        name = str(name)
+    if not name or not name.strip() or name in EMPTY_NAMES:
+        issues.append(f'{label}: ว่าง/ไม่ระบุ')
+        return issues
+    if DIGIT_RE.search(name):
+        issues.append(f'{label}: มีตัวเลขปน "{name}"')
+    if SPECIAL_RE.search(name):
+        issues.append(f'{label}: มีอักขระพิเศษ "{name}"')
+    if '_x000D_' in name or '\r' in name or '\n' in name:
+        issues.append(f'{label}: มี artifact/ขึ้นบรรทัดใหม่ "{repr(name)}"')
+    if len(name.strip()) <= 1:
+        issues.append(f'{label}: สั้นเกินไป "{name}"')
+    if DOTS_ONLY_RE.match(name):
+        issues.append(f'{label}: มีแต่จุดหรือช่องว่าง "{name}"')
+    if name.strip() != name:
+        issues.append(f'{label}: มีช่องว่างนำหน้า/ต่อท้าย')
+    return issues
+
+
+def validate_name_xlsx(name_str, label):
+    """แบบของ inspect_xlsx — strip ก่อนตรวจ ('ไม่ระบุ' ไม่นับเป็นค่าว่าง)
+    ข้อความใส่ค่าที่ตรวจไว้ด้วย เพื่อให้ดูในรายงานได้โดยไม่ต้องเปิดไฟล์"""
+    if not name_str or str(name_str).strip() == '':
+        return [f'{label}: ว่างเปล่า']
+    name = str(name_str).strip()
+    issues = []
+    if DIGIT_RE.search(name):
+        issues.append(f"{label}: มีตัวเลขปนในชื่อ '{name}'")
+    if '_x000D_' in name or '\r' in name or '\n' in name:
+        issues.append(f"{label}: มี carriage return/newline artifact '{repr(name)}'")
+    if SPECIAL_RE.search(name):
+        issues.append(f"{label}: มีอักขระพิเศษ '{name}'")
+    if len(name) < 2:
+        issues.append(f"{label}: สั้นเกินไป '{name}'")
+    if DOTS_ONLY_RE.match(name):
+        issues.append(f"{label}: มีแต่จุดหรือช่องว่าง '{name}'")
+    return issues
+
+
+def validate_prefix(prefix, label='คำนำหน้า'):
+    """คำนำหน้าเป็นค่าไม่บังคับ — ตรวจเฉพาะเมื่อมีค่า"""
+    if prefix and len(str(prefix).strip()) <= 1:
+        return [f'{label}: สั้นเกินไป "{prefix}"']
+    return []
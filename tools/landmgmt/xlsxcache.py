@@ -0,0 +1,502 @@
+"""
+Cache แบบคอลัมน์ของไฟล์ xlsx — แปลงด้วย openpyxl ครั้งเดียว แล้วอ่านจาก cache จนกว่าไฟล์จะเปลี่ยน
+
+    wb = xlsxcache.load_workbook(config.XLSX_PATH)        # ทั้งไฟล์ — เข้าถึงเซลล์แบบสุ่มได้
+    ws = wb[wb.sheetnames[0]]
+    ws.max_row, ws.cell(row=2, column=3).value, ws.iter_rows(values_only=True)
+
+    ws = xlsxcache.open_sheet(config.XLSX_PATH)           # ทีละแถว — หน่วยความจำคงที่
+    for row in ws.iter_rows(values_only=True): ...
+
+- เก็บที่ tools/.cache/ (override ด้วย LANDMGMT_CACHE) ปิดได้ด้วย LANDMGMT_XLSX_CACHE=0
+- key คือ mtime + ขนาดไฟล์ ถ้าไม่ตรงจะเทียบ sha256 ของเนื้อไฟล์ก่อนสร้างใหม่
+  (แค่ touch ไฟล์ไม่ต้องแปลงใหม่)
+- แบ่งเป็น group ละ GROUP_ROWS แถว ไฟล์ละ group (ชนิดของคอลัมน์เลือกต่อ group)
+  open_sheet() ที่ยังไม่มี cache ส่งแถวจาก openpyxl ให้ผู้อ่านทันทีและเขียน group ไปพร้อมกัน
+  meta (.json) เขียนเมื่ออ่านครบทุก sheet — อ่านไม่จบ cache ไม่ถูกใช้
+- มี pyarrow → Parquet, ไม่มี → pickle ของ list ต่อคอลัมน์
+  คอลัมน์ที่มีหลายชนิดปนกัน (เช่น HOME_NO ที่มีทั้งเลขและวันที่) เก็บชนิดหลักตรง ๆ
+  ส่วนเซลล์ชนิดอื่นเก็บเป็น str + รหัสชนิด แล้วแปลงกลับตอนอ่าน
+  — ค่าที่ได้เหมือนอ่านจาก openpyxl (data_only=True) ทุกเซลล์
+"""
+import glob
+import hashlib
+import itertools
+import json
+import os
+import pickle
+from datetime import date, datetime, time, timedelta
+
+from . import config
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover
+    pa = pq = None
+
+CACHE_DIR = os.environ.get('LANDMGMT_CACHE', config.tool_path('.cache'))
+ENABLED = os.environ.get('LANDMGMT_XLSX_CACHE', '1').lower() not in ('0', 'off', 'no', 'false')
+FORMAT_VERSION = 3     # 3: แบ่งเป็น group ละ GROUP_ROWS แถว
+GROUP_ROWS = 10000
+
+
+# ============================================================
+# Workbook / sheet ที่อ่านจาก cache (หน้าตาเหมือน openpyxl แบบอ่านอย่างเดียว)
+# ============================================================
+class _Cell:
+    __slots__ = ('value',)
+
+    def __init__(self, value):
+        self.value = value
+
+
+class CachedSheet:
+    def __init__(self, title, columns, max_row):
+        self.title = title
+        self.columns = columns          # [list ต่อคอลัมน์] ยาว max_row ทุกคอลัมน์
+        self.max_row = max_row
+        self.max_column = len(columns)
+
+    def cell(self, row, column):
+        """เซลล์แบบ 1-based เหมือน openpyxl (นอกตาราง = None)"""
+        if 1 <= column <= self.max_column and 1 <= row <= self.max_row:
+            return _Cell(self.columns[column - 1][row - 1])
+        return _Cell(None)
+
+    def col_values(self, column):
+        """ค่าทั้งคอลัมน์ (1-based) — list ใน cache ตรง ๆ ห้ามแก้"""
+        return self.columns[column - 1]
+
+    def iter_rows(self, min_row=1, max_row=None, values_only=True):
+        """tuple ของค่าทีละแถว (รองรับเฉพาะ values_only)"""
+        stop = self.max_row if max_row is None else min(max_row, self.max_row)
+        return zip(*(col[min_row - 1:stop] for col in self.columns)) if self.columns else iter(())
+
+
+class CachedWorkbook:
+    def __init__(self, source, sheets, from_cache, sha256=None):
+        self.source = source
+        self._sheets = sheets           # {ชื่อ sheet: CachedSheet} ตามลำดับเดิม
+        self.from_cache = from_cache
+        self.sha256 = sha256            # sha256 ของไฟล์ xlsx
+
+    @property
+    def sheetnames(self):
+        return list(self._sheets)
+
+    @property
+    def worksheets(self):
+        return list(self._sheets.values())
+
+    def __getitem__(self, name):
+        return self._sheets[name]
+
+    def close(self):
+        pass
+
+
+# ============================================================
+# Encode คอลัมน์ (Parquet)
+# ============================================================
+KINDS = {str: 'str', int: 'int', float: 'float', bool: 'bool',
+         datetime: 'datetime', date: 'date', time: 'time', timedelta: 'timedelta'}
+KIND_CODES = {k: i for i, k in enumerate(('str', 'int', 'float', 'bool',
+                                          'datetime', 'date', 'time', 'timedelta'))}
+CODE_KINDS = {i: k for k, i in KIND_CODES.items()}
+
+
+def _kind(v):
+    k = KINDS.get(type(v))
+    if k is None:
+        raise TypeError(f"ไม่รองรับชนิดข้อมูล {type(v).__name__} ใน xlsx cache")
+    return k
+
+
+def _to_text(v, kind):
+    if kind == 'float':
+        return repr(v)
+    if kind == 'bool':
+        return '1' if v else '0'
+    if kind in ('datetime', 'date', 'time'):
+        return v.isoformat()
+    if kind == 'timedelta':
+        return repr(v.total_seconds())
+    return str(v)
+
+
+def _from_text(s, kind):
+    if kind == 'str':
+        return s
+    if kind == 'int':
+        return int(s)
+    if kind == 'float':
+        return float(s)
+    if kind == 'bool':
+        return s == '1'
+    if kind == 'datetime':
+        return datetime.fromisoformat(s)
+    if kind == 'date':
+        return date.fromisoformat(s)
+    if kind == 'time':
+        return time.fromisoformat(s)
+    return timedelta(seconds=float(s))
+
+
+ARROW_TYPES = {
+    'str': lambda: pa.string(), 'int': lambda: pa.int64(), 'float': lambda: pa.float64(),
+    'bool': lambda: pa.bool_(), 'datetime': lambda: pa.timestamp('us'),
+}
+
+
+def _encode_column(values):
+    """คืน [(ชื่อท้าย, pa.Array)]
+    เก็บชนิดที่พบมากสุดเป็นคอลัมน์ตรง ๆ ส่วนเซลล์ชนิดอื่น (เช่น หัวตารางที่เป็น str ในคอลัมน์ตัวเลข)
+    เก็บเป็น str ใน __alt พร้อมรหัสชนิดใน __kind"""
+    counts = {}
+    for v in values:
+        if v is not None:
+            k = _kind(v)
+            counts[k] = counts.get(k, 0) + 1
+    if not counts:
+        return [('', pa.nulls(len(values)))]
+    typed = [k for k in counts if k in ARROW_TYPES]
+    main = max(typed, key=counts.get) if typed else None
+    if len(counts) == 1 and main is not None:
+        return [('', pa.array(values, ARROW_TYPES[main]()))]
+
+    main_vals, alt, codes = [], [], []
+    for v in values:
+        k = None if v is None else _kind(v)
+        if k is None or k == main:
+            main_vals.append(v)
+            alt.append(None)
+            codes.append(None)
+        else:
+            main_vals.append(None)
+            alt.append(_to_text(v, k))
+            codes.append(KIND_CODES[k])
+    main_arr = pa.array(main_vals, ARROW_TYPES[main]()) if main else pa.nulls(len(values))
+    return [('', main_arr), ('__alt', pa.array(alt, pa.string())), ('__kind', pa.array(codes, pa.int8()))]
+
+
+def _decode_table(table, width):
+    names = set(table.column_names)
+    cols = []
+    for ci in range(width):
+        values = table.column(f'c{ci}').to_pylist()
+        if f'c{ci}__kind' in names:
+            alt = table.column(f'c{ci}__alt').to_pylist()
+            for i, c in enumerate(table.column(f'c{ci}__kind').to_pylist()):
+                if c is not None:
+                    values[i] = _from_text(alt[i], CODE_KINDS[c])
+        cols.append(values)
+    return cols
+
+
+# ============================================================
+# Build / read
+# ============================================================
+_WRITE_ERRORS = (OSError, TypeError) + ((pa.ArrowException,) if pa is not None else ())
+_READ_ERRORS = (OSError, ValueError, KeyError, EOFError, pickle.UnpicklingError) \
+    + ((pa.ArrowException,) if pa is not None else ())
+
+
+def _sha256(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _cache_base(path):
+    name = os.path.basename(path)
+    key = hashlib.sha1(os.path.abspath(path).encode('utf-8')).hexdigest()[:8]
+    return os.path.join(CACHE_DIR, f"{os.path.splitext(name)[0]}.{key}")
+
+
+def _group_path(base, backend, si, k):
+    return f"{base}.s{si}.g{k}.{'parquet' if backend == 'parquet' else 'pkl'}"
+
+
+def _write_json(path, data):
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+
+
+def _columns(rows):
+    """list ของแถว → list ต่อคอลัมน์ (แถวสั้นเติม None)"""
+    width = max((len(r) for r in rows), default=0)
+    return [[r[ci] if ci < len(r) else None for r in rows] for ci in range(width)]
+
+
+def _write_group(path, backend, columns):
+    tmp = path + '.tmp'
+    if backend == 'parquet':
+        arrays, names = [], []
+        for ci, values in enumerate(columns):
+            for suffix, arr in _encode_column(values):
+                names.append(f'c{ci}{suffix}')
+                arrays.append(arr)
+        pq.write_table(pa.table(arrays, names=names), tmp)
+    else:
+        with open(tmp, 'wb') as f:
+            pickle.dump(columns, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, path)
+
+
+def _read_group(path, backend, nrows, width):
+    """list ต่อคอลัมน์ของ group เดียว เติมคอลัมน์ว่างให้กว้างเท่า sheet"""
+    if backend == 'parquet':
+        table = pq.read_table(path)
+        cols = _decode_table(table, sum(1 for n in table.column_names if '__' not in n))
+    else:
+        with open(path, 'rb') as f:
+            cols = pickle.load(f)
+    return cols + [[None] * nrows] * (width - len(cols))
+
+
+class _CacheWriter:
+    """เขียน cache ทีละ group (GROUP_ROWS แถว) ขณะอ่าน xlsx — meta เขียนใน finish() เป็นไฟล์สุดท้าย
+    เขียนไม่ได้ (ดิสก์เต็ม, ชนิดข้อมูลที่ไม่รองรับ) → เลิกเขียน cache แต่ผู้อ่านยังได้แถวครบตามปกติ"""
+
+    def __init__(self, base, meta):
+        self.base = base
+        self.meta = meta
+        self.sheets = []
+        self.ok = True
+        self._buf = []
+        try:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            for old in glob.glob(glob.escape(base) + '.*'):
+                os.remove(old)          # cache รอบก่อน (รวม meta) ต้องหายก่อนเขียน group ใหม่
+        except OSError:
+            self.ok = False
+
+    def begin_sheet(self, title):
+        self.sheets.append({'title': title, 'max_row': 0, 'max_column': 0, 'groups': []})
+        self._buf = []
+
+    def add(self, row):
+        self._buf.append(row)
+        if len(self._buf) >= GROUP_ROWS:
+            self._flush()
+
+    def end_sheet(self):
+        self._flush()
+
+    def _flush(self):
+        rows, self._buf = self._buf, []
+        if not rows or not self.ok:
+            return
+        sh = self.sheets[-1]
+        path = _group_path(self.base, self.meta['backend'], len(self.sheets) - 1, len(sh['groups']))
+        try:
+            _write_group(path, self.meta['backend'], _columns(rows))
+        except _WRITE_ERRORS:
+            self.ok = False
+            return
+        sh['groups'].append(len(rows))
+        sh['max_row'] += len(rows)
+        sh['max_column'] = max(sh['max_column'], max(len(r) for r in rows))
+
+    def finish(self):
+        if self.ok:
+            try:
+                _write_json(f'{self.base}.json', dict(self.meta, sheets=self.sheets))
+            except OSError:
+                pass
+
+
+def _new_meta(path, st, sha):
+    return {
+        'version': FORMAT_VERSION,
+        'source': os.path.abspath(path),
+        'mtime_ns': st.st_mtime_ns,
+        'size': st.st_size,
+        'sha256': sha,
+        'backend': 'parquet' if pq is not None else 'pickle',
+        'group_rows': GROUP_ROWS,
+    }
+
+
+def _load_meta(base):
+    try:
+        with open(f'{base}.json', encoding='utf-8') as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if meta.get('version') != FORMAT_VERSION:
+        return None
+    if meta.get('backend') == 'parquet' and pq is None:
+        return None
+    return meta
+
+
+def _fresh_meta(path, base, st, refresh):
+    """(meta, sha256) — meta เป็น None ถ้าไม่มี cache ที่ตรงกับไฟล์ (sha256 คำนวณแล้วคืนมาด้วยถ้าต้องเทียบ)"""
+    meta = None if refresh else _load_meta(base)
+    if meta is None:
+        return None, None
+    sha = None
+    if meta['mtime_ns'] != st.st_mtime_ns or meta['size'] != st.st_size:
+        sha = _sha256(path)
+        if meta['sha256'] != sha:
+            return None, sha
+        meta['mtime_ns'] = st.st_mtime_ns       # แค่ touch — จำ mtime ใหม่ ไม่ต้องแปลงใหม่
+        try:
+            _write_json(f'{base}.json', meta)
+        except OSError:
+            pass
+    for si, info in enumerate(meta['sheets']):
+        for k in range(len(info['groups'])):
+            if not os.path.exists(_group_path(base, meta['backend'], si, k)):
+                return None, sha
+    return meta, sha
+
+
+def _read_xlsx(path, writer=None):
+    """อ่านทุก sheet ด้วย openpyxl (read_only) เป็น {ชื่อ: CachedSheet} — ส่งทุกแถวให้ writer ด้วยถ้ามี"""
+    import openpyxl
+    wb = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        sheets = {}
+        for ws in wb.worksheets:
+            if writer is not None:
+                writer.begin_sheet(ws.title)
+            rows = []
+            for row in ws.iter_rows(values_only=True):
+                rows.append(row)
+                if writer is not None:
+                    writer.add(row)
+            if writer is not None:
+                writer.end_sheet()
+            sheets[ws.title] = CachedSheet(ws.title, _columns(rows), len(rows))
+        return sheets
+    finally:
+        wb.close()
+
+
+def _read_cache(base, meta):
+    sheets = {}
+    for si, info in enumerate(meta['sheets']):
+        width = info['max_column']
+        columns = [[] for _ in range(width)]
+        for k, n in enumerate(info['groups']):
+            for col, values in zip(columns, _read_group(_group_path(base, meta['backend'], si, k),
+                                                        meta['backend'], n, width)):
+                col.extend(values)
+        sheets[info['title']] = CachedSheet(info['title'], columns, info['max_row'])
+    return sheets
+
+
+def load_workbook(path=None, refresh=False):
+    """CachedWorkbook ของไฟล์ xlsx ทั้งไฟล์ (เข้าถึงเซลล์แบบสุ่มได้) — ใช้ cache ถ้ายังตรงกับไฟล์
+    ไม่งั้นแปลงใหม่แล้วเขียน cache"""
+    path = str(path or config.XLSX_PATH)
+    st = os.stat(path)
+    base = _cache_base(path)
+    sha = None
+    if ENABLED:
+        meta, sha = _fresh_meta(path, base, st, refresh)
+        if meta is not None:
+            try:
+                return CachedWorkbook(path, _read_cache(base, meta), True, meta['sha256'])
+            except _READ_ERRORS:
+                pass
+    sha = sha or _sha256(path)
+    writer = _CacheWriter(base, _new_meta(path, st, sha)) if ENABLED else None
+    sheets = _read_xlsx(path, writer)
+    if writer is not None:
+        writer.finish()
+    return CachedWorkbook(path, sheets, False, sha)
+
+
+# ============================================================
+# อ่านทีละแถว (upsert_xlsx.py) — ไม่โหลดทั้ง sheet
+# ============================================================
+class SheetStream:
+    """sheet เดียวแบบอ่านต่อเนื่อง — iter_rows() ได้ครั้งเดียว
+    max_row/max_column จาก cache หรือจาก dimension ที่ไฟล์ xlsx ประกาศไว้ (0 ถ้าไม่มี)"""
+
+    def __init__(self, source, title, sheetnames, max_row, max_column, rows, from_cache, sha256):
+        self.source = source
+        self.title = title
+        self.sheetnames = sheetnames
+        self.max_row = max_row
+        self.max_column = max_column
+        self.from_cache = from_cache
+        self.sha256 = sha256
+        self._rows = rows
+        self._iter = None
+
+    def iter_rows(self, values_only=True):
+        rows, self._rows = self._rows, None
+        if rows is None:
+            raise RuntimeError("SheetStream.iter_rows() เรียกได้ครั้งเดียว")
+        self._iter = rows
+        return rows
+
+    def close(self):
+        """ปิดไฟล์ xlsx ที่เปิดค้าง — ถ้า thread อื่นยังอ่านอยู่ ไฟล์ปิดเมื่อ generator ถูกทิ้ง"""
+        rows, self._rows, self._iter = self._rows or self._iter, None, None
+        if rows is not None:
+            try:
+                rows.close()
+            except ValueError:      # generator already executing
+                pass
+
+
+def _iter_cached(base, meta, si):
+    info = meta['sheets'][si]
+    for k, n in enumerate(info['groups']):
+        cols = _read_group(_group_path(base, meta['backend'], si, k), meta['backend'], n, info['max_column'])
+        yield from (zip(*cols) if cols else itertools.repeat((), n))
+
+
+def _iter_xlsx(wb, index, writer):
+    """แถวของ sheet ที่ index จาก openpyxl ทันทีที่อ่านได้ — เขียน cache ไปพร้อมกัน
+    (sheet อื่นอ่านเพื่อ cache อย่างเดียว) cache ใช้ได้เมื่ออ่านจนจบเท่านั้น"""
+    try:
+        if writer is None:
+            yield from wb.worksheets[index].iter_rows(values_only=True)
+            return
+        for si, ws in enumerate(wb.worksheets):
+            if si > index and not writer.ok:
+                return
+            writer.begin_sheet(ws.title)
+            for row in ws.iter_rows(values_only=True):
+                writer.add(row)
+                if si == index:
+                    yield row
+            writer.end_sheet()
+        writer.finish()
+    finally:
+        wb.close()
+
+
+def open_sheet(path=None, index=0, refresh=False):
+    """SheetStream ของ sheet ที่ index — cache ตรงกับไฟล์: อ่านทีละ group
+    ไม่มี cache/ปิด cache: อ่านจาก openpyxl (read_only) ทีละแถว แถวแรกได้ก่อนแปลงทั้งไฟล์เสร็จ
+    หน่วยความจำคงที่ราว GROUP_ROWS แถวทั้งสองแบบ"""
+    path = str(path or config.XLSX_PATH)
+    st = os.stat(path)
+    base = _cache_base(path)
+    sha = None
+    if ENABLED:
+        meta, sha = _fresh_meta(path, base, st, refresh)
+        if meta is not None:
+            info = meta['sheets'][index]
+            return SheetStream(path, info['title'], [s['title'] for s in meta['sheets']],
+                               info['max_row'], info['max_column'], _iter_cached(base, meta, index),
+                               True, meta['sha256'])
+    sha = sha or _sha256(path)
+    import openpyxl
+    wb = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    ws = wb.worksheets[index]
+    writer = _CacheWriter(base, _new_meta(path, st, sha)) if ENABLED else None
+    return SheetStream(path, ws.title, wb.sheetnames, ws.max_row or 0, ws.max_column or 0,
+                       _iter_xlsx(wb, index, writer), False, sha)
@@ -2,7 +2,9 @@
 import openpyxl
 import os, sys
 
-REF_DIR = r"c:\Users\Administrator\OneDrive\000_Ai Project\PHP_SQL\references\แบบฟอร์ม"
+from landmgmt import config
+
+REF_DIR = os.path.join(config.ROOT_DIR, 'references', 'แบบฟอร์ม')
 
 out = []
 def p(s=""): out.append(str(s))
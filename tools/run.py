@@ -0,0 +1,232 @@
+"""
+รัน tool ใน tools/ ผ่านตัวรันกลาง — เลือกวัด CPU หรือหน่วยความจำได้โดยไม่ต้องแก้ script
+
+  python -m tools.run <tool> [--profile cpu|mem] [option ของ tool ...]     (จาก root ของ repo)
+  python tools/run.py <tool> ...                                            (จากที่ไหนก็ได้)
+
+<tool> = ชื่อ script ใน tools/ (มีหรือไม่มี .py ก็ได้) เช่น inspect_xlsx, gen_audit_v2
+script ถูกรันด้วย runpy เป็น __main__ เหมือนสั่ง python <tool>.py (sys.argv ตรงกัน, tools/ อยู่ใน sys.path)
+
+--profile cpu   cProfile → <out>.pstats (เปิดด้วย snakeviz/pstats) + <out>.collapsed
+                (บรรทัดละ "a;b;c ไมโครวินาที" สำหรับ flamegraph.pl / speedscope — ประมาณจาก call graph
+                ของ cProfile: เวลาของฟังก์ชันถูกแบ่งให้ผู้เรียกตามสัดส่วนเวลาที่แต่ละผู้เรียกใช้)
+--profile mem   tracemalloc → <out>.txt (ตำแหน่งที่จองหน่วยความจำมากสุด + peak) + <out>.tracemalloc
+                (snapshot.dump — เทียบสองรอบด้วย tracemalloc.Snapshot.load(...).compare_to)
+--profile-out   prefix ของไฟล์ผล (default tools/profile_<tool>_<cpu|mem>)
+--profile-top   จำนวนแถวที่แสดง (default 25)
+--profile-frames  ความลึก traceback ของ tracemalloc (default 1 = บรรทัดที่จองอย่างเดียว)
+                มากกว่า 1 ได้เส้นทางเรียกด้วย แต่ช้าลงมาก (openpyxl 10 ชั้น ช้ากว่า 1 ชั้นราว 10 เท่า)
+
+option ที่ขึ้นต้นด้วย --profile เป็นของตัวรัน (วางก่อนหรือหลังชื่อ tool ก็ได้) ที่เหลือส่งให้ tool ทั้งหมด
+วัดเฉพาะ process หลัก — worker ของ process pool (upsert_xlsx.py --workers) ไม่ถูกนับ
+"""
+import argparse
+import os
+import runpy
+import sys
+import time
+
+TOOLS_DIR = os.path.dirname(os.path.abspath(__file__))
+if TOOLS_DIR not in sys.path:
+    sys.path.insert(0, TOOLS_DIR)       # tool ทุกตัว import แบบ "from landmgmt import ..."
+
+from landmgmt import config  # noqa: E402
+
+RUNNER_OPTS = ('--profile', '--profile-out', '--profile-top', '--profile-frames')
+
+# tool บางตัวเปลี่ยน sys.stdout เป็นไฟล์รายงาน — ข้อความของตัวรันออก stderr เดิมเสมอ
+_stderr = sys.stderr
+
+
+def say(msg):
+    _stderr.write(msg + "\n")
+    _stderr.flush()
+
+
+def available_tools():
+    return sorted(f[:-3] for f in os.listdir(TOOLS_DIR)
+                  if f.endswith('.py') and f != 'run.py' and not f.startswith('_'))
+
+
+def split_argv(argv):
+    """(option ของตัวรัน, ชื่อ tool, argv ของ tool)"""
+    own, rest = [], []
+    i = 0
+    while i < len(argv):
+        a = argv[i]
+        name = a.split('=', 1)[0]
+        if name in RUNNER_OPTS:
+            own.append(a)
+            if '=' not in a and i + 1 < len(argv):
+                own.append(argv[i + 1])
+                i += 1
+        elif a in ('-h', '--help') and not rest:
+            own.append(a)
+        else:
+            rest.append(a)
+        i += 1
+    return own, (rest[0] if rest else None), rest[1:]
+
+
+def resolve(tool):
+    path = tool if tool.endswith('.py') else tool + '.py'
+    if not os.path.isabs(path) and not os.path.exists(path):
+        path = os.path.join(TOOLS_DIR, path)
+    return path if os.path.isfile(path) else None
+
+
+# ============================================================
+# CPU: cProfile + collapsed stack
+# ============================================================
+def collapsed_stacks(stats, max_depth=64):
+    """{"a;b;c": ไมโครวินาที} จาก pstats.Stats — เวลา self ของแต่ละฟังก์ชันแบ่งตามเส้นทางเรียก"""
+    def label(func):
+        filename, line, name = func
+        if filename == '~':
+            return name.strip('<>').replace(';', ',')
+        return f"{name} ({os.path.basename(filename)}:{line})".replace(';', ',')
+
+    raw = stats.stats
+    children = {}
+    for func, (cc, nc, tt, ct, callers) in raw.items():
+        for caller, edge in callers.items():
+            children.setdefault(caller, []).append((func, edge[3]))
+    roots = [f for f, v in raw.items() if not v[4] or all(c not in raw for c in v[4])]
+
+    out = {}
+    leaf = {}           # key -> ฟังก์ชันปลาย stack
+    given = {}          # ฟังก์ชัน -> เวลา self ที่แจกไปแล้วทุกเส้นทาง
+
+    def visit(func, stack, share, depth):
+        cc, nc, tt, ct, _ = raw[func]
+        path = stack + (label(func),)
+        self_us = tt * share * 1e6
+        if self_us >= 1:
+            key = ';'.join(path)
+            out[key] = out.get(key, 0) + self_us
+            leaf[key] = func
+            given[func] = given.get(func, 0) + self_us
+        if depth >= max_depth:
+            return
+        for child, edge_ct in children.get(func, ()):
+            child_ct = raw[child][3]
+            if child == func or not child_ct or share * edge_ct < 1e-6 or label(child) in path:
+                continue                # recursion นับไว้ที่ระดับแรกแล้ว / เส้นทางที่ใช้เวลาไม่ถึง 1 µs
+            visit(child, path, share * min(edge_ct / child_ct, 1.0), depth + 1)
+
+    for root in roots:
+        visit(root, (), 1.0, 0)
+    # ct ของฟังก์ชันที่เรียกซ้ำนับเวลาซ้อน → ผลรวมบางฟังก์ชันเกินเวลา self จริง: ย่อกลับให้เท่า tt
+    for key, func in leaf.items():
+        real = raw[func][2] * 1e6
+        if given[func] > real:
+            out[key] *= real / given[func]
+    return out
+
+
+def profile_cpu(path, out, top):
+    import cProfile
+    import pstats
+    prof = cProfile.Profile()
+    prof.enable()
+    try:
+        return run_script(path)
+    finally:
+        prof.disable()
+        prof.dump_stats(out + '.pstats')
+        stats = pstats.Stats(prof, stream=_stderr)
+        stacks = collapsed_stacks(stats)
+        with open(out + '.collapsed', 'w', encoding='utf-8') as f:
+            for key, us in sorted(stacks.items()):
+                f.write(f"{key} {int(round(us))}\n")
+        say(f"\n=== CPU profile (เรียงตามเวลารวม, {top} อันดับแรก) ===")
+        stats.sort_stats('cumulative').print_stats(top)
+        say(f"pstats:    {out}.pstats")
+        say(f"collapsed: {out}.collapsed  ({len(stacks):,} stack — flamegraph.pl / speedscope)")
+
+
+# ============================================================
+# Memory: tracemalloc
+# ============================================================
+def profile_mem(path, out, top, frames=1):
+    import tracemalloc
+    tracemalloc.start(frames)
+    try:
+        return run_script(path)
+    finally:
+        current, peak = tracemalloc.get_traced_memory()
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap*>'),
+            tracemalloc.Filter(False, runpy.__file__),
+        ))
+        tracemalloc.stop()
+        snapshot.dump(out + '.tracemalloc')
+        lines = [f"tool: {os.path.basename(path)}",
+                 f"peak: {peak / 1048576:,.1f} MB, ยังจองอยู่ตอนจบ: {current / 1048576:,.1f} MB", '',
+                 f"=== ตำแหน่งที่จองมากสุด (บรรทัด, {top} อันดับแรก) ==="]
+        by_line = snapshot.statistics('lineno')
+        for s in by_line[:top]:
+            frame = s.traceback[0]
+            lines.append(f"{s.size / 1024:>12,.1f} KB {s.count:>9,} ครั้ง  {frame.filename}:{frame.lineno}")
+        if frames > 1:
+            lines += ['', "=== เส้นทางเรียกของ 5 อันดับแรก ==="]
+            for s in snapshot.statistics('traceback')[:5]:
+                lines.append(f"\n{s.size / 1024:,.1f} KB ({s.count:,} ครั้ง)")
+                lines += ['  ' + l for l in s.traceback.format(most_recent_first=True)]
+        with open(out + '.txt', 'w', encoding='utf-8') as f:
+            f.write('\n'.join(lines) + '\n')
+        say('\n' + '\n'.join(lines[:4 + min(top, len(by_line))]))
+        say(f"\nรายงาน:   {out}.txt")
+        say(f"snapshot: {out}.tracemalloc")
+
+
+# ============================================================
+# Run
+# ============================================================
+def run_script(path):
+    """รัน script เป็น __main__ — คืน exit code (SystemExit ของ tool ไม่หลุดออกไปก่อนเขียนผล profile)"""
+    try:
+        runpy.run_path(path, run_name='__main__')
+    except SystemExit as ex:
+        if ex.code is None or isinstance(ex.code, int):
+            return ex.code or 0
+        say(str(ex.code))
+        return 1
+    return 0
+
+
+def main(argv=None):
+    own, tool, tool_args = split_argv(sys.argv[1:] if argv is None else argv)
+    parser = argparse.ArgumentParser(prog='python -m tools.run',
+                                     usage='%(prog)s <tool> [--profile cpu|mem] [option ของ tool ...]',
+                                     description="รัน tool ใน tools/ พร้อม profiler (ไม่ต้องแก้ script)",
+                                     epilog="tool: " + ', '.join(available_tools()))
+    parser.add_argument('--profile', choices=('cpu', 'mem'), help="cpu = cProfile, mem = tracemalloc")
+    parser.add_argument('--profile-out', help="prefix ของไฟล์ผล (default tools/profile_<tool>_<cpu|mem>)")
+    parser.add_argument('--profile-top', type=int, default=25, help="จำนวนแถวที่แสดง (default 25)")
+    parser.add_argument('--profile-frames', type=int, default=1,
+                        help="ความลึก traceback ของ --profile mem (default 1, มากขึ้นช้าลงมาก)")
+    opts = parser.parse_args(own)
+    if tool is None:
+        parser.error("ต้องระบุ tool")
+    path = resolve(tool)
+    if path is None:
+        parser.error(f"ไม่พบ tool: {tool}")
+
+    name = os.path.splitext(os.path.basename(path))[0]
+    sys.argv = [path] + tool_args
+    t0 = time.perf_counter()
+    out = opts.profile_out or config.tool_path(f"profile_{name}_{opts.profile}")
+    if opts.profile == 'cpu':
+        code = profile_cpu(path, out, opts.profile_top)
+    elif opts.profile == 'mem':
+        code = profile_mem(path, out, opts.profile_top, opts.profile_frames)
+    else:
+        code = run_script(path)
+    say(f"\n[{name}] {time.perf_counter() - t0:.2f}s, exit {code}")
+    return code
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,125 @@
+"""
+อัพเดท land_plots.polygon_coords จาก shapefile (แทน update_polygons.php)
+- ใช้ plot_code (SPAR_CODE) เป็น key จับคู่
+- ring นอกของทุกแปลงแปลง UTM 47N → WGS84 ในครั้งเดียว (landmgmt/polygons.py)
+  เก็บเป็น JSON แบบ Leaflet [[lat, lng], ...] ไม่มีช่องว่าง
+- เขียนทีละชุดผ่าน staging table ชั่วคราว: INSERT หลายแถว + UPDATE ... JOIN ครั้งเดียวต่อชุด
+  (แบบเดิม UPDATE ทีละแปลง) ทั้งหมดใน transaction เดียว
+
+วิธีใช้:
+  python update_polygons.py               # อัพเดท DB
+  python update_polygons.py --dry-run     # อ่าน + แปลง + serialize อย่างเดียว (ไม่ต่อ DB)
+"""
+import argparse
+import time
+
+from landmgmt import config, db, polygons, staging
+from landmgmt.importstate import norm_key
+
+parser = argparse.ArgumentParser(description="อัพเดท polygon_coords จาก shapefile")
+parser.add_argument('--shp', default=config.SHP_PATH, help="shapefile (ไม่ต้องใส่นามสกุล)")
+parser.add_argument('--batch-size', type=int, default=500,
+                    help="จำนวนแปลงต่อชุด (default 500)")
+parser.add_argument('--dry-run', action='store_true', help="ไม่เขียน DB")
+args = parser.parse_args()
+
+# ชนิด/collation ของคอลัมน์ใช้ตาม land_plots (ดู landmgmt/staging.py) — ถ้า plot_code แคบกว่าของจริง
+# รหัสยาวจะถูกตัดแล้ว JOIN ผิดแปลงหรือถูกนับเป็น not_found
+STAGE_DDL = """
+    CREATE TEMPORARY TABLE IF NOT EXISTS _stage_polygons (
+        plot_code      VARCHAR(50) PRIMARY KEY,
+        polygon_coords LONGTEXT NOT NULL
+    ) ENGINE=InnoDB
+"""
+
+
+def rate(n, sec):
+    return f"{n / sec:,.0f} แปลง/วินาที" if sec > 0 else "-"
+
+
+print("=== Update polygon_coords จาก shapefile ===")
+
+# ============================================================
+# อ่าน + แปลงพิกัด
+# ============================================================
+t0 = time.perf_counter()
+rings, skipped = polygons.read_outer_rings(args.shp)
+rings.latlng()
+t_read = time.perf_counter() - t0
+print(f"อ่าน shapefile: {len(rings)} polygons, {rings.num_points:,} จุด "
+      f"(ข้าม {skipped} record ที่ไม่มี SPAR_CODE/geometry) — {t_read:.2f}s")
+
+# ============================================================
+# Serialize — plot_code ซ้ำใช้ตัวหลังสุด (เหมือน UPDATE ทีละแถวตามลำดับ)
+# ============================================================
+t0 = time.perf_counter()
+rows = {}
+for k, code in enumerate(rings.codes):
+    rows[norm_key(code)] = (code, rings.leaflet_json(k))
+t_json = time.perf_counter() - t0
+dup_codes = len(rings) - len(rows)
+json_bytes = sum(len(js.encode('utf-8')) for _, js in rows.values())
+print(f"Serialize: {len(rows)} plot_code ({dup_codes} ซ้ำในไฟล์ ใช้ตัวหลังสุด), "
+      f"{json_bytes / 1024:,.0f} KB — {t_json:.2f}s ({rate(len(rows), t_json)})")
+
+if args.dry_run:
+    print("\n(dry-run — ไม่ได้แก้ไข DB)")
+    raise SystemExit(0)
+
+# ============================================================
+# เขียน DB ทีละชุด
+# ============================================================
+print(f"\nConnecting to {db.describe()} ...")
+conn = db.get_connection()
+cur = conn.cursor()
+
+items = list(rows.values())
+updated = 0
+not_found = 0
+t0 = time.perf_counter()
+try:
+    cur.execute(*staging.target_columns_sql(['land_plots']))
+    cur.execute(staging.match_target(STAGE_DDL, cur.fetchall(), 'land_plots'))
+    for i in range(0, len(items), args.batch_size):
+        chunk = items[i:i + args.batch_size]
+        cur.execute("DELETE FROM _stage_polygons")
+        cur.executemany("INSERT INTO _stage_polygons (plot_code, polygon_coords) VALUES (%s, %s)", chunk)
+        cur.execute("""
+            UPDATE land_plots lp
+            JOIN _stage_polygons s ON s.plot_code = lp.plot_code
+            SET lp.polygon_coords = s.polygon_coords
+        """)
+        updated += cur.rowcount
+        cur.execute("""
+            SELECT COUNT(*) FROM _stage_polygons s
+            LEFT JOIN land_plots lp ON lp.plot_code = s.plot_code
+            WHERE lp.plot_id IS NULL
+        """)
+        not_found += cur.fetchone()[0]
+        done = i + len(chunk)
+        print(f"  {done}/{len(items)} ({rate(done, time.perf_counter() - t0)})")
+    conn.commit()
+    t_write = time.perf_counter() - t0
+
+    # Verify
+    cur.execute("SELECT COUNT(*) FROM land_plots WHERE polygon_coords IS NOT NULL")
+    with_coords = cur.fetchone()[0]
+    cur.execute("SELECT COUNT(*) FROM land_plots")
+    total = cur.fetchone()[0]
+
+    print(f"\n✅ อัพเดทเสร็จ!")
+    print(f"   อัพเดท polygon:     {updated}")
+    print(f"   เหมือนเดิม:         {len(items) - updated - not_found}")
+    print(f"   ไม่พบ plot_code:    {not_found}")
+    print(f"   มี polygon:         {with_coords} / {total}")
+    print(f"\n   เวลา: อ่าน+แปลงพิกัด {t_read:.2f}s, serialize {t_json:.2f}s, เขียน DB {t_write:.2f}s")
+    print(f"   เขียน DB: {rate(len(items), t_write)}, "
+          f"ทั้งหมด: {rate(len(items), t_read + t_json + t_write)}")
+except Exception as ex:
+    conn.rollback()
+    print(f"\n❌ Error: {ex}")
+    import traceback
+    traceback.print_exc()
+finally:
+    cur.close()
+    db.close()
@@ -2,24 +2,93 @@
 UPSERT ข้อมูลจาก ตารางแปลงสอบทาน2.xlsx เข้า DB
 - villagers: UPSERT by id_card_number
 - land_plots: UPSERT by plot_code (SPAR_CODE)
+
+โหมดการเขียน DB:
+  --mode row    : SELECT + UPDATE/INSERT ทีละแถว (แบบเดิม)
+  --mode batch  : รวมแถวเป็นชุด (--batch-size) ลง staging table ชั่วคราว
+                  แล้ว UPDATE ... JOIN / INSERT ... SELECT ครั้งเดียวต่อชุด
+                  (ลด round trip ไป Railway จาก 4+ ต่อแถว เหลือ ~8 ต่อชุด)
+
+การหา villager_id / plot_id ในโหมด row:
+  --lookup prefetch : โหลด id_card_number→villager_id และ plot_code→plot_id
+                      ครั้งเดียวก่อนเริ่ม แล้วค้นใน dict (default)
+  --lookup per-row  : SELECT ทีละแถว (แบบเดิม)
+
+--incremental : เขียนเฉพาะแถวที่ใหม่/เปลี่ยนจาก import ครั้งก่อน (เทียบ hash ต่อแถว
+                ใน tools/upsert_state.json) และรายงานแถวที่หายไปจากไฟล์ (ไม่ลบจาก DB)
+                state บันทึกหลัง commit สำเร็จทุกครั้ง ไม่ว่าจะใช้ --incremental หรือไม่
+
+อ่าน xlsx ทีละแถวผ่าน cache แบบคอลัมน์ (landmgmt/xlsxcache.open_sheet) — ครั้งแรกหรือเมื่อไฟล์เปลี่ยน
+อ่านจาก openpyxl (read_only) ทีละแถวและเขียน cache ไปพร้อมกัน ครั้งต่อไปอ่านจาก cache ทีละ group
+ไม่ต้องโหลดทั้ง sheet ก่อนเริ่มเขียน DB
+
+แปลงแถว (landmgmt/transform.py) ใน process pool ทีละชุด (--workers, --chunk-size)
+แล้วส่ง record ตามลำดับแถวผ่าน queue ให้ connection เดียวเขียน DB — แปลงชุดถัดไปขณะรอ DB
+(--incremental ต้องแปลงครบก่อนจึง diff ได้)
+
+--connections N (N > 1, โหมด batch) : เขียนด้วย asyncio/aiomysql N connection พร้อมกัน
+                แบ่งแถวเป็นสายตามเลขบัตร/plot_code — แปลงของราษฎรคนเดียวกันอยู่ connection เดียวกัน
+                ตามลำดับแถวเสมอ แต่ commit ทีละชุด (ไม่ใช่ transaction เดียวทั้งไฟล์) ดู landmgmt/aiodb.py
+
+--commit-every N : commit ทุก N แถว (โหมด batch: เมื่อครบชุดที่รวมได้ ≥ N แถว) แทน transaction เดียวทั้งไฟล์
+                แล้วบันทึก checkpoint (แถวสุดท้ายที่ commit + sha256 ของไฟล์ xlsx) ลง tools/upsert_checkpoint.json
+                ถ้าพลาดกลางทาง rollback เฉพาะชุดที่ยังไม่ commit
+--resume      : ทำต่อจาก checkpoint — ข้ามแถวที่ commit แล้ว (ใช้ได้เฉพาะ DB และไฟล์ xlsx เดิม
+                ถ้าไม่ตรงหรือไม่มี checkpoint จะ import ทั้งไฟล์) เปิด --commit-every เท่า --batch-size ถ้าไม่ได้ระบุ
+                checkpoint ถูกลบเมื่อ import จบครบ
+
+--instrument [JSON] : จับเวลาแยกขั้น (เปิด workbook, หา header, แปลง, villager, plot, commit ...)
+                แถวของ sheet อ่านทีละแถวขณะแปลง — เวลา parse xlsx/cache รวมอยู่ใน header_detect/transform
+                (workbook_open คือแค่เปิดไฟล์ + ตรวจ cache)
+                และแยกตามรูปแบบ SQL (จำนวนครั้ง, ms รวม, ms สูงสุด) → ตารางท้าย upsert_report.txt
+                + JSON (default tools/upsert_instrument.json) ดู landmgmt/instrument.py
+                (โหมด --connections > 1 วัดได้เฉพาะเวลารวมของการเขียน ไม่แยกตาม SQL)
 """
-import openpyxl
-import pymysql
-import math
+import argparse
+import itertools
 import os
-import re
 import sys
 import io
+import time
+
+from landmgmt import aiodb, config, db, importstate, instrument, staging, xlsxcache
+from landmgmt.transform import VILLAGER_COLS, Pipeline, find_header
 
 # ============================================================
 # Config
 # ============================================================
-XLSX_PATH = r"c:\Users\Administrator\OneDrive\000_Ai Project\PHP_SQL\ตรวจสอบคุณสมบัติ\ตารางแปลงสอบทาน2.xlsx"
-ENV_PATH  = r"c:\Users\Administrator\OneDrive\000_Ai Project\PHP_SQL\.env"
-LOG_PATH  = r"c:\Users\Administrator\OneDrive\000_Ai Project\PHP_SQL\tools\upsert_report.txt"
-
-# Open log file + keep stderr for terminal progress
-log_file = io.open(LOG_PATH, "w", encoding="utf-8")
+XLSX_PATH = config.XLSX_PATH
+LOG_PATH  = config.tool_path('upsert_report.txt')
+
+parser = argparse.ArgumentParser(description="UPSERT ตารางแปลงสอบทาน2.xlsx → DB")
+parser.add_argument('--mode', choices=('row', 'batch'), default='batch',
+                    help="row = ทีละแถว, batch = staging table ทีละชุด (default)")
+parser.add_argument('--batch-size', type=int, default=1000,
+                    help="จำนวนแถวต่อชุดในโหมด batch (default 1000)")
+parser.add_argument('--lookup', choices=('prefetch', 'per-row'), default='prefetch',
+                    help="วิธีหา id ที่มีอยู่แล้วในโหมด row (default prefetch)")
+parser.add_argument('--incremental', action='store_true',
+                    help="เขียนเฉพาะแถวที่ใหม่/เปลี่ยนจาก import ครั้งก่อน")
+parser.add_argument('--state', default=config.tool_path('upsert_state.json'),
+                    help="ไฟล์ hash ต่อแถวของ import ครั้งก่อน (default: tools/upsert_state.json)")
+parser.add_argument('--workers', type=int, default=min(4, os.cpu_count() or 1),
+                    help="จำนวน process ที่แปลงแถว (0/1 = ไม่ใช้ process pool, default min(4, CPU))")
+parser.add_argument('--chunk-size', type=int, default=500,
+                    help="จำนวนแถวต่อชุดที่ส่งให้ process แปลง (default 500)")
+parser.add_argument('--connections', type=int, default=1,
+                    help="จำนวน connection ที่เขียนพร้อมกัน (>1 = asyncio/aiomysql, โหมด batch เท่านั้น)")
+parser.add_argument('--instrument', nargs='?', const=config.tool_path('upsert_instrument.json'), metavar='JSON',
+                    help="จับเวลาแยกขั้น/รูปแบบ SQL ลง upsert_report.txt และ JSON (default: tools/upsert_instrument.json)")
+parser.add_argument('--commit-every', type=int, default=0, metavar='N',
+                    help="commit ทุก N แถวพร้อมบันทึก checkpoint (default 0 = transaction เดียวทั้งไฟล์)")
+parser.add_argument('--resume', action='store_true',
+                    help="ทำต่อจาก checkpoint ของรอบที่พลาด (ข้ามแถวที่ commit แล้ว)")
+parser.add_argument('--checkpoint', default=config.tool_path('upsert_checkpoint.json'),
+                    help="ไฟล์ checkpoint ของ --commit-every/--resume (default: tools/upsert_checkpoint.json)")
+args = None  # parse ใน main() — process ลูกที่ import script นี้ซ้ำ (spawn บน Windows) ไม่ต้องใช้
+
+# Log file + keep stderr for terminal progress (เปิดใน main())
+log_file = None
 original_stderr = sys.stderr
 
 def log(msg):
@@ -35,523 +104,458 @@ def progress(msg):
     except:
         pass
 
-# ============================================================
-# Read .env
-# ============================================================
-def read_env(path):
-    env = {}
-    if not os.path.exists(path):
-        return env
-    with open(path, encoding='utf-8') as f:
-        for line in f:
-            line = line.strip()
-            if not line or line.startswith('#'):
-                continue
-            if '=' in line:
-                k, v = line.split('=', 1)
-                env[k.strip()] = v.strip()
-    return env
-
-env = read_env(ENV_PATH)
-
-# Parse MYSQL_URL if present (same as PHP database.php)
-mysql_url = env.get('MYSQL_URL', '') or env.get('MYSQLDATABASE_URL', '')
-if mysql_url:
-    from urllib.parse import urlparse
-    p = urlparse(mysql_url)
-    DB_HOST = p.hostname or '127.0.0.1'
-    DB_PORT = p.port or 3306
-    DB_USER = p.username or 'root'
-    DB_PASS = p.password or ''
-    DB_NAME = (p.path or '/land_management').lstrip('/')
-else:
-    DB_HOST = env.get('DB_HOST', '127.0.0.1')
-    DB_PORT = int(env.get('DB_PORT', '3306'))
-    DB_USER = env.get('DB_USER', 'root')
-    DB_PASS = env.get('DB_PASS', '')
-    DB_NAME = env.get('DB_NAME', 'land_management')
-
-# ============================================================
-# UTM Zone 47N -> WGS84 Lat/Lng
-# ============================================================
-def utm_to_latlng(easting, northing, zone=47, northern=True):
-    a = 6378137.0
-    f = 1 / 298.257223563
-    e = math.sqrt(2 * f - f * f)
-    e2 = e * e / (1 - e * e)
-    k0 = 0.9996
-    x = easting - 500000.0
-    y = northing if northern else northing - 10000000.0
-
-    M = y / k0
-    mu = M / (a * (1 - e*e/4 - 3*e**4/64 - 5*e**6/256))
-    e1 = (1 - math.sqrt(1 - e*e)) / (1 + math.sqrt(1 - e*e))
-
-    phi1 = (mu
-        + (3*e1/2 - 27*e1**3/32) * math.sin(2*mu)
-        + (21*e1**2/16 - 55*e1**4/32) * math.sin(4*mu)
-        + (151*e1**3/96) * math.sin(6*mu)
-        + (1097*e1**4/512) * math.sin(8*mu))
-
-    C1 = e2 * math.cos(phi1)**2
-    T1 = math.tan(phi1)**2
-    N1 = a / math.sqrt(1 - e*e * math.sin(phi1)**2)
-    R1 = a * (1 - e*e) / (1 - e*e * math.sin(phi1)**2)**1.5
-    D = x / (N1 * k0)
-
-    lat = phi1 - (N1 * math.tan(phi1) / R1) * (
-        D**2/2
-        - (5 + 3*T1 + 10*C1 - 4*C1**2 - 9*e2) * D**4/24
-        + (61 + 90*T1 + 298*C1 + 45*T1**2 - 252*e2 - 3*C1**2) * D**6/720
-    )
-
-    lng0 = math.radians((zone - 1) * 6 - 180 + 3)
-    lng = lng0 + (D - (1 + 2*T1 + C1) * D**3/6
-        + (5 - 2*C1 + 28*T1 - 3*C1**2 + 8*e2 + 24*T1**2) * D**5/120) / math.cos(phi1)
-
-    return round(math.degrees(lat), 7), round(math.degrees(lng), 7)
-
-# ============================================================
-# Map PTYPE -> land_use_type enum
-# ============================================================
-def map_land_use(ptype):
-    if not ptype:
-        return 'other'
-    if 'อยู่อาศัย' in ptype and 'ทำกิน' in ptype:
-        return 'mixed'
-    if 'อยู่อาศัย' in ptype:
-        return 'residential'
-    if 'เกษตร' in ptype or 'ทำกิน' in ptype:
-        return 'agriculture'
-    if 'สวน' in ptype:
-        return 'garden'
-    if 'ปศุสัตว์' in ptype or 'เลี้ยง' in ptype:
-        return 'livestock'
-    return 'other'
-
-# ============================================================
-# Map REMARK -> remark_risk enum
-# ============================================================
-def map_remark(remark):
-    if not remark:
-        return 'not_risky'
-    r = str(remark).strip()
-    if r == 'ล่อแหลมมีคดี':
-        return 'risky_case'
-    if r == 'ไม่ล่อแหลมมีคดี':
-        return 'not_risky_case'
-    if 'ล่อแหลม' in r:
-        return 'risky'
-    if 'ไม่ล่อแหลม' in r:
-        return 'not_risky'
-    return 'not_risky'
+stats = {
+    'villager_insert': 0, 'villager_update': 0,
+    'plot_insert': 0, 'plot_update': 0,
+    'errors': 0, 'skipped': 0
+}
+errors = []
+timer = instrument.NULL  # instrument.Recorder() เมื่อสั่ง --instrument
 
 # ============================================================
-# Validate Thai ID
+# Row mode: หา id ที่มีอยู่แล้ว (prefetch dict หรือ SELECT ทีละแถว)
 # ============================================================
-def check_idcard(idc):
-    if not idc or len(str(idc)) != 13 or not str(idc).isdigit():
-        return False
-    s = sum(int(str(idc)[i]) * (13 - i) for i in range(12))
-    return (11 - (s % 11)) % 10 == int(str(idc)[12])
+villager_ids = {}  # id_card_number -> villager_id
+plot_ids = {}      # plot_code -> plot_id
+lookup_stats = {'prefetch_sec': 0.0, 'lookups': 0, 'lookup_sec': 0.0}
+
+norm_key = importstate.norm_key
+
+def prefetch_keys(cur):
+    t0 = time.perf_counter()
+    cur.execute("SELECT id_card_number, villager_id FROM villagers")
+    for key, vid in cur.fetchall():
+        villager_ids[norm_key(key)] = vid
+    cur.execute("SELECT plot_code, plot_id FROM land_plots")
+    for key, pid in cur.fetchall():
+        plot_ids[norm_key(key)] = pid
+    lookup_stats['prefetch_sec'] = time.perf_counter() - t0
+
+def find_villager_id(cur, key):
+    t0 = time.perf_counter()
+    if args.lookup == 'prefetch':
+        found = villager_ids.get(norm_key(key))
+    else:
+        cur.execute("SELECT villager_id FROM villagers WHERE id_card_number = %s LIMIT 1", (key,))
+        row = cur.fetchone()
+        found = row[0] if row else None
+    lookup_stats['lookups'] += 1
+    lookup_stats['lookup_sec'] += time.perf_counter() - t0
+    return found
+
+def find_plot_id(cur, code):
+    t0 = time.perf_counter()
+    if args.lookup == 'prefetch':
+        found = plot_ids.get(norm_key(code))
+    else:
+        cur.execute("SELECT plot_id FROM land_plots WHERE plot_code = %s LIMIT 1", (code,))
+        row = cur.fetchone()
+        found = row[0] if row else None
+    lookup_stats['lookups'] += 1
+    lookup_stats['lookup_sec'] += time.perf_counter() - t0
+    return found
 
 # ============================================================
-# Read XLSX headers
+# Row mode: UPDATE/INSERT ทีละแถว
 # ============================================================
-progress("=== UPSERT ตารางแปลงสอบทาน2.xlsx → DB ===")
-progress(f"DB: {DB_HOST}:{DB_PORT}/{DB_NAME}")
-
-progress("Loading xlsx...")
-wb = openpyxl.load_workbook(XLSX_PATH, data_only=True)
-ws = wb[wb.sheetnames[0]]
-progress(f"Sheet: {wb.sheetnames[0]}, rows={ws.max_row}, cols={ws.max_column}")
-
-# Preload all data into list of lists for fast access
-all_rows = []
-for row in ws.iter_rows(min_row=1, max_row=ws.max_row, values_only=True):
-    all_rows.append(list(row))
-progress(f"Loaded {len(all_rows)} rows into memory")
-wb.close()
-
-# Find header row (scan first 3 rows)
-headers = {}
-header_row_idx = 0  # 0-based index
-for ri in range(min(3, len(all_rows))):
-    for ci, val in enumerate(all_rows[ri]):
-        if val and str(val).strip().upper() in ('NAME', 'SURNAME', 'IDCARD', 'SPAR_CODE', 'NUM_APAR'):
-            header_row_idx = ri
-            break
-    if header_row_idx != 0:
-        break
-
-# Map column names to 0-based indices
-for ci, val in enumerate(all_rows[header_row_idx]):
-    if val:
-        headers[str(val).strip().upper()] = ci
-
-progress(f"Header row: {header_row_idx + 1}")
-progress(f"Columns found: {len(headers)}")
-for k, v in headers.items():
-    log(f"  {k} = col {v + 1}")
-
-# Helper to get cell value from preloaded data
-def get_val(row_data, col_name):
-    idx = headers.get(col_name)
-    if idx is None or idx >= len(row_data):
-        return None
-    return row_data[idx]
-
-def get_str(row_data, col_name):
-    v = get_val(row_data, col_name)
-    if v is None:
-        return ''
-    return str(v).strip()
-
-def get_float(row_data, col_name):
-    v = get_val(row_data, col_name)
-    if v is None:
-        return 0.0
-    try:
-        return float(v)
-    except (ValueError, TypeError):
-        return 0.0
-
-# Data rows (skip header)
-data_rows = all_rows[header_row_idx + 1:]
+def insert_villager(cur, rec):
+    v = rec['villager']
+    cur.execute("""
+        INSERT INTO villagers
+            (id_card_number, prefix, first_name, last_name,
+             village_name, village_no, sub_district, district, province, address)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+    """, (
+        rec['villager_key'], v['prefix'],
+        v['first_name'] or rec['name_default'], v['last_name'] or rec['surname_default'],
+        v['village_name'], v['village_no'],
+        v['sub_district'], v['district'], v['province'],
+        v['address']
+    ))
+    stats['villager_insert'] += 1
+    villager_ids[norm_key(rec['villager_key'])] = cur.lastrowid
+    return cur.lastrowid
+
+def upsert_row(cur, rec):
+    with timer.stage('villager_upsert'):
+        villager_id = upsert_villager(cur, rec)
+    with timer.stage('plot_upsert'):
+        upsert_plot(cur, rec, villager_id)
+
+def upsert_villager(cur, rec):
+    v = rec['villager']
+    villager_id = None
+    if rec['has_idcard']:
+        # Check if exists
+        existing = find_villager_id(cur, rec['villager_key'])
+
+        if existing and rec['id_valid']:
+            villager_id = existing
+            cur.execute("""
+                UPDATE villagers SET
+                    prefix = COALESCE(%s, prefix),
+                    first_name = COALESCE(%s, first_name),
+                    last_name = COALESCE(%s, last_name),
+                    village_name = COALESCE(%s, village_name),
+                    village_no = COALESCE(%s, village_no),
+                    sub_district = COALESCE(%s, sub_district),
+                    district = COALESCE(%s, district),
+                    province = COALESCE(%s, province),
+                    address = COALESCE(%s, address)
+                WHERE id_card_number = %s
+            """, tuple(v[c] for c in VILLAGER_COLS) + (rec['villager_key'],))
+            stats['villager_update'] += 1
+        elif existing:
+            # Bad ID card - keep existing record as is
+            villager_id = existing
+            stats['villager_update'] += 1
+        else:
+            villager_id = insert_villager(cur, rec)
+    else:
+        # No IDCARD at all
+        villager_id = insert_villager(cur, rec)
+    return villager_id
+
+def upsert_plot(cur, rec, villager_id):
+    pl = rec['plot']
+    plot_code = rec['plot_code']
+    existing_plot = find_plot_id(cur, plot_code)
+
+    if existing_plot:
+        # UPDATE existing plot
+        cur.execute("""
+            UPDATE land_plots SET
+                villager_id = %s,
+                park_name = COALESCE(%s, park_name),
+                area_rai = %s, area_ngan = %s, area_sqwa = %s,
+                land_use_type = %s,
+                latitude = COALESCE(%s, latitude),
+                longitude = COALESCE(%s, longitude),
+                status = %s,
+                code_dnp = COALESCE(%s, code_dnp),
+                apar_code = COALESCE(%s, apar_code),
+                apar_no = COALESCE(%s, apar_no),
+                num_apar = COALESCE(%s, num_apar),
+                spar_code = COALESCE(%s, spar_code),
+                ban_e = COALESCE(%s, ban_e),
+                perimeter = %s,
+                ban_type = COALESCE(%s, ban_type),
+                num_spar = COALESCE(%s, num_spar),
+                spar_no = COALESCE(%s, spar_no),
+                par_ban = COALESCE(%s, par_ban),
+                par_moo = COALESCE(%s, par_moo),
+                par_tam = COALESCE(%s, par_tam),
+                par_amp = COALESCE(%s, par_amp),
+                par_prov = COALESCE(%s, par_prov),
+                ptype = COALESCE(%s, ptype),
+                target_fid = COALESCE(%s, target_fid),
+                occupation_since = COALESCE(%s, occupation_since),
+                remark_risk = %s,
+                data_issues = %s
+            WHERE plot_code = %s
+        """, (
+            villager_id,
+            pl['park_name'],
+            pl['area_rai'], pl['area_ngan'], pl['area_sqwa'],
+            pl['land_use_type'],
+            pl['latitude'], pl['longitude'],
+            pl['status'],
+            pl['code_dnp'], pl['apar_code'], pl['apar_no'],
+            pl['num_apar'], pl['spar_code'], pl['ban_e'],
+            pl['perimeter'], pl['ban_type'],
+            pl['num_spar'], pl['spar_no'],
+            pl['par_ban'], pl['par_moo'], pl['par_tam'],
+            pl['par_amp'], pl['par_prov'], pl['ptype'],
+            pl['target_fid'], pl['occupation_since'],
+            pl['remark_risk'], pl['data_issues'],
+            plot_code
+        ))
+        stats['plot_update'] += 1
+    else:
+        # INSERT new plot
+        cur.execute("""
+            INSERT INTO land_plots
+                (plot_code, villager_id, park_name, zone,
+                 area_rai, area_ngan, area_sqwa,
+                 land_use_type, latitude, longitude, status, notes,
+                 code_dnp, apar_code, apar_no, num_apar, spar_code,
+                 ban_e, perimeter, ban_type, num_spar, spar_no,
+                 par_ban, par_moo, par_tam, par_amp, par_prov,
+                 ptype, target_fid, occupation_since, remark_risk, data_issues)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s,
+                    %s, %s, %s, %s, %s, %s, %s, %s, %s, %s,
+                    %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+        """, (
+            plot_code, villager_id, pl['park_name'], None,
+            pl['area_rai'], pl['area_ngan'], pl['area_sqwa'],
+            pl['land_use_type'], pl['latitude'], pl['longitude'], pl['status'], None,
+            pl['code_dnp'], pl['apar_code'], pl['apar_no'],
+            pl['num_apar'], pl['spar_code'],
+            pl['ban_e'], pl['perimeter'], pl['ban_type'],
+            pl['num_spar'], pl['spar_no'],
+            pl['par_ban'], pl['par_moo'], pl['par_tam'],
+            pl['par_amp'], pl['par_prov'],
+            pl['ptype'], pl['target_fid'], pl['occupation_since'],
+            pl['remark_risk'], pl['data_issues']
+        ))
+        stats['plot_insert'] += 1
+        plot_ids[norm_key(plot_code)] = cur.lastrowid
 
 # ============================================================
-# Connect DB
+# Batch mode: staging table + set-based UPDATE/INSERT ทีละชุด (SQL อยู่ใน landmgmt/staging.py)
 # ============================================================
-progress(f"Connecting to {DB_HOST}:{DB_PORT}/{DB_NAME} ...")
-conn = pymysql.connect(
-    host=DB_HOST, port=DB_PORT, user=DB_USER, password=DB_PASS,
-    database=DB_NAME, charset='utf8mb4', autocommit=False, connect_timeout=10
-)
-cur = conn.cursor()
-progress("Connected!")
+def apply_batch(cur, recs):
+    staging.run_batch(cur, recs, stats, timer)
 
 # ============================================================
-# Process rows
+# Chunked commit: commit แล้วบันทึกแถวสุดท้ายที่ commit ไว้ให้ --resume
 # ============================================================
-total_rows = len(data_rows)
-progress(f"Data rows: {total_rows}")
-
-stats = {
-    'villager_insert': 0, 'villager_update': 0,
-    'plot_insert': 0, 'plot_update': 0,
-    'errors': 0, 'skipped': 0
-}
-errors = []
-
-try:
-    for row_num, rd in enumerate(data_rows, start=1):
-
-        # --- Read fields ---
-        idcard     = get_str(rd, 'IDCARD')
-        name_title = get_str(rd, 'NAME_TITLE')
-        name       = get_str(rd, 'NAME')
-        surname    = get_str(rd, 'SURNAME')
-        home_no    = get_str(rd, 'HOME_NO')
-        home_ban   = get_str(rd, 'HOME_BAN')
-        home_moo   = get_str(rd, 'HOME_MOO')
-        home_tam   = get_str(rd, 'HOME_TAM')
-        home_amp   = get_str(rd, 'HOME_AMP')
-        home_prov  = get_str(rd, 'HOME_PROV')
-
-        spar_code  = get_str(rd, 'SPAR_CODE')
-        name_dnp   = get_str(rd, 'NAME_DNP')
-        code_dnp   = get_str(rd, 'CODE_DNP')
-        apar_code  = get_str(rd, 'APAR_CODE')
-        apar_no    = get_str(rd, 'APAR_NO')
-        num_apar   = get_str(rd, 'NUM_APAR')
-        spar_no    = get_str(rd, 'SPAR_NO').zfill(5) if get_str(rd, 'SPAR_NO') else ''
-        num_spar   = get_str(rd, 'NUM_SPAR').zfill(5) if get_str(rd, 'NUM_SPAR') else ''
-        par_ban    = get_str(rd, 'PAR_BAN')
-        ban_e      = get_str(rd, 'BAN_E')
-        par_moo    = get_str(rd, 'PAR_MOO')
-        par_tam    = get_str(rd, 'PAR_TAM')
-        par_amp    = get_str(rd, 'PAR_AMP')
-        par_prov   = get_str(rd, 'PAR_PROV')
-        perimeter  = get_float(rd, 'PERIMETER')
-        rai        = get_float(rd, 'RAI')
-        ngan       = get_float(rd, 'NGAN')
-        wa_sq      = get_float(rd, 'WA_SQ')
-        area_rai   = get_float(rd, 'AREA_RAI')
-        ptype      = get_str(rd, 'PTYPE')
-        remark     = get_str(rd, 'REMARK')
-        ban_type   = get_str(rd, 'BAN_TYPE')
-        year_val   = get_str(rd, 'YEAR')
-
-        e_val      = get_float(rd, 'E')
-        n_val      = get_float(rd, 'N')
-        target_fid_str = get_str(rd, 'TARGET_FID')
-
-        # Skip empty rows
-        if not idcard and not spar_code and not name:
-            stats['skipped'] += 1
-            continue
-
-        # --- Data issues ---
-        issues = []
-        if not idcard:
-            issues.append('ไม่มีเลขบัตร')
-        elif not check_idcard(idcard):
-            issues.append(f'เลขบัตรไม่ถูกต้อง: {idcard}')
-        if not name:
-            issues.append('ไม่มีชื่อ')
-        if not surname:
-            issues.append('ไม่มีนามสกุล')
-
-        # --- UTM -> LatLng ---
-        lat, lng = None, None
-        if e_val > 0 and n_val > 0:
-            lat, lng = utm_to_latlng(e_val, n_val, 47, True)
-
-        # --- Year conversion (พ.ศ. -> ค.ศ.) ---
-        occupation_since = None
-        if year_val:
-            try:
-                yr = int(float(year_val))
-                if yr > 2400:
-                    yr -= 543
-                occupation_since = yr
-            except (ValueError, TypeError):
-                pass
-
-        # --- Plot code ---
-        plot_code = spar_code
-        if not plot_code:
-            plot_code = f'IMP-{row_num:05d}'
-            issues.append(f'ไม่มี SPAR_CODE — ใช้รหัส {plot_code}')
-
-        # --- Land use ---
-        land_use_type = map_land_use(ptype)
-        remark_risk = map_remark(remark)
-
-        # --- Address ---
-        home_addr = f"{home_no} หมู่ {home_moo or '-'}" if home_no else ''
-
-        # --- Status ---
-        issue_text = '; '.join(issues) if issues else None
-        status = 'pending_review' if issue_text else 'surveyed'
-
-        # --- Target FID ---
-        target_fid = None
-        if target_fid_str:
-            try:
-                target_fid = int(float(target_fid_str))
-            except (ValueError, TypeError):
-                pass
-
-        # --- BAN_TYPE ---
-        ban_type_val = None
-        if ban_type:
-            try:
-                ban_type_val = str(int(float(ban_type)))
-            except (ValueError, TypeError):
-                ban_type_val = ban_type
-
-        # Use RAI if > 0, otherwise AREA_RAI
-        final_rai = rai if rai > 0 else area_rai
-
-        # ============================================================
-        # UPSERT Villager
-        # ============================================================
-        villager_id = None
-        if idcard and check_idcard(idcard):
-            # Check if exists
-            cur.execute("SELECT villager_id FROM villagers WHERE id_card_number = %s LIMIT 1", (idcard,))
-            existing = cur.fetchone()
-
-            if existing:
-                villager_id = existing[0]
-                cur.execute("""
-                    UPDATE villagers SET
-                        prefix = COALESCE(%s, prefix),
-                        first_name = COALESCE(%s, first_name),
-                        last_name = COALESCE(%s, last_name),
-                        village_name = COALESCE(%s, village_name),
-                        village_no = COALESCE(%s, village_no),
-                        sub_district = COALESCE(%s, sub_district),
-                        district = COALESCE(%s, district),
-                        province = COALESCE(%s, province),
-                        address = COALESCE(%s, address)
-                    WHERE id_card_number = %s
-                """, (
-                    name_title or None, name or None, surname or None,
-                    home_ban or None, home_moo or None,
-                    home_tam or None, home_amp or None, home_prov or None,
-                    home_addr or None, idcard
-                ))
-                stats['villager_update'] += 1
-            else:
-                cur.execute("""
-                    INSERT INTO villagers
-                        (id_card_number, prefix, first_name, last_name,
-                         village_name, village_no, sub_district, district, province, address)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                """, (
-                    idcard, name_title or None, name or 'ไม่ระบุ', surname or 'ไม่ระบุ',
-                    home_ban or None, home_moo or None,
-                    home_tam or None, home_amp or None, home_prov or None,
-                    home_addr or None
-                ))
-                villager_id = cur.lastrowid
-                stats['villager_insert'] += 1
-        elif idcard:
-            # Bad ID card - still try to find or create
-            placeholder = f'BAD_{idcard}'[:13]
-            cur.execute("SELECT villager_id FROM villagers WHERE id_card_number = %s LIMIT 1", (idcard,))
-            existing = cur.fetchone()
-            if existing:
-                villager_id = existing[0]
-                stats['villager_update'] += 1
-            else:
-                cur.execute("""
-                    INSERT INTO villagers
-                        (id_card_number, prefix, first_name, last_name,
-                         village_name, village_no, sub_district, district, province, address)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                """, (
-                    idcard, name_title or None, name or 'ไม่ระบุ', surname or 'ไม่ระบุ',
-                    home_ban or None, home_moo or None,
-                    home_tam or None, home_amp or None, home_prov or None,
-                    home_addr or None
-                ))
-                villager_id = cur.lastrowid
-                stats['villager_insert'] += 1
+def commit_chunk(conn, source_sha, row_num, rows_done):
+    with timer.stage('commit'):
+        conn.commit()
+    importstate.save_checkpoint(args.checkpoint, db.describe(), source_sha, row_num, rows_done, stats)
+
+def main():
+    global args, log_file, timer
+    args = parser.parse_args()
+    if args.connections > 1 and args.mode != 'batch':
+        parser.error("--connections > 1 ใช้ได้กับ --mode batch เท่านั้น")
+    if args.commit_every < 0:
+        parser.error("--commit-every ต้องไม่ติดลบ")
+    if args.connections > 1 and (args.commit_every or args.resume):
+        parser.error("--commit-every/--resume ใช้กับ --connections 1 เท่านั้น (หลาย connection commit ทีละชุดอยู่แล้ว)")
+    if args.resume and not args.commit_every:
+        args.commit_every = args.batch_size
+    if args.connections > 1:
+        aiodb.require_aiomysql()
+    log_file = io.open(LOG_PATH, "w", encoding="utf-8")
+    if args.instrument:
+        timer = instrument.Recorder()
+
+    # ============================================================
+    # Read XLSX headers
+    # ============================================================
+    progress("=== UPSERT ตารางแปลงสอบทาน2.xlsx → DB ===")
+    progress(f"DB: {db.describe()}")
+    progress(f"Mode: {args.mode}" + (f" (batch size {args.batch_size})" if args.mode == 'batch'
+                                     else f" (lookup {args.lookup})")
+             + (", incremental" if args.incremental else "")
+             + (f", {args.connections} connections (async)" if args.connections > 1 else "")
+             + (f", commit ทุก {args.commit_every} แถว" if args.commit_every else ""))
+
+    progress("Opening xlsx...")
+    t_open = time.time()
+    with timer.stage('workbook_open'):   # เปิดเท่านั้น — แถวถูก parse ตอนวนอ่าน
+        ws = xlsxcache.open_sheet(XLSX_PATH)
+    progress(f"Sheet: {ws.title}, rows={ws.max_row}, cols={ws.max_column} "
+             f"({'cache' if ws.from_cache else 'openpyxl'}, {time.time() - t_open:.2f}s)")
+
+    # Find header row (scan first 3 rows)
+    with timer.stage('header_detect'):
+        sheet_rows = ws.iter_rows(values_only=True)
+        head_rows = list(itertools.islice(sheet_rows, 3))
+        header_row_idx, headers = find_header(head_rows)
+
+    progress(f"Header row: {header_row_idx + 1}")
+    progress(f"Columns found: {len(headers)}")
+    for k, v in headers.items():
+        log(f"  {k} = col {v + 1}")
+
+    # Data rows (skip header)
+    data_rows = itertools.chain(head_rows[header_row_idx + 1:], sheet_rows)
+    sheet_total = max(ws.max_row - header_row_idx - 1, 0)   # ไฟล์ที่ไม่ประกาศขนาด sheet = 0 (ใช้แสดงผลเท่านั้น)
+
+    # ============================================================
+    # Checkpoint (--resume)
+    # ============================================================
+    resume_row = 0
+    if args.resume:
+        cp, reason = importstate.load_checkpoint(args.checkpoint, db.describe(), ws.sha256)
+        if cp is None:
+            progress(f"Resume: {reason} — import ทั้งไฟล์")
         else:
-            # No IDCARD at all
-            temp_idc = f'TEMP_{row_num:05d}'
-            cur.execute("""
-                INSERT INTO villagers
-                    (id_card_number, prefix, first_name, last_name,
-                     village_name, village_no, sub_district, district, province, address)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-            """, (
-                temp_idc, name_title or None, name or f'ไม่ระบุ_{row_num}', surname or f'ไม่ระบุ_{row_num}',
-                home_ban or None, home_moo or None,
-                home_tam or None, home_amp or None, home_prov or None,
-                home_addr or None
-            ))
-            villager_id = cur.lastrowid
-            stats['villager_insert'] += 1
-
-        # ============================================================
-        # UPSERT Land Plot
-        # ============================================================
-        cur.execute("SELECT plot_id FROM land_plots WHERE plot_code = %s LIMIT 1", (plot_code,))
-        existing_plot = cur.fetchone()
-
-        if existing_plot:
-            # UPDATE existing plot
-            cur.execute("""
-                UPDATE land_plots SET
-                    villager_id = %s,
-                    park_name = COALESCE(%s, park_name),
-                    area_rai = %s, area_ngan = %s, area_sqwa = %s,
-                    land_use_type = %s,
-                    latitude = COALESCE(%s, latitude),
-                    longitude = COALESCE(%s, longitude),
-                    status = %s,
-                    code_dnp = COALESCE(%s, code_dnp),
-                    apar_code = COALESCE(%s, apar_code),
-                    apar_no = COALESCE(%s, apar_no),
-                    num_apar = COALESCE(%s, num_apar),
-                    spar_code = COALESCE(%s, spar_code),
-                    ban_e = COALESCE(%s, ban_e),
-                    perimeter = %s,
-                    ban_type = COALESCE(%s, ban_type),
-                    num_spar = COALESCE(%s, num_spar),
-                    spar_no = COALESCE(%s, spar_no),
-                    par_ban = COALESCE(%s, par_ban),
-                    par_moo = COALESCE(%s, par_moo),
-                    par_tam = COALESCE(%s, par_tam),
-                    par_amp = COALESCE(%s, par_amp),
-                    par_prov = COALESCE(%s, par_prov),
-                    ptype = COALESCE(%s, ptype),
-                    target_fid = COALESCE(%s, target_fid),
-                    occupation_since = COALESCE(%s, occupation_since),
-                    remark_risk = %s,
-                    data_issues = %s
-                WHERE plot_code = %s
-            """, (
-                villager_id,
-                name_dnp or None,
-                final_rai, ngan, wa_sq,
-                land_use_type,
-                lat, lng,
-                status,
-                code_dnp or None, apar_code or None, apar_no or None,
-                num_apar or None, spar_code or None, ban_e or None,
-                perimeter, ban_type_val,
-                num_spar or None, spar_no or None,
-                par_ban or None, par_moo or None, par_tam or None,
-                par_amp or None, par_prov or None, ptype or None,
-                target_fid, occupation_since,
-                remark_risk, issue_text,
-                plot_code
-            ))
-            stats['plot_update'] += 1
+            resume_row = cp['row_num']
+            for k, v in cp['stats'].items():
+                if k in stats and k != 'skipped':
+                    stats[k] = v
+            progress(f"Resume: commit แล้วถึงแถว {resume_row} ({cp['rows_done']} แถว, {cp['saved']}) — ทำต่อจากแถวถัดไป")
+
+    # ============================================================
+    # Connect DB
+    # ============================================================
+    progress(f"Connecting to {db.describe()} ...")
+    with timer.stage('connect'):
+        conn = db.get_connection()
+    cur = timer.cursor(conn.cursor())
+    progress("Connected!")
+
+    # ============================================================
+    # Transform (process pool) → queue → เขียน DB
+    # ============================================================
+    pipe = Pipeline(data_rows, headers, args.workers, args.chunk_size, total=sheet_total or None)
+    progress(f"Transform: " + (f"{pipe.workers} processes" if pipe.workers else "thread เดียว")
+             + f", ชุดละ {args.chunk_size} แถว")
+
+    t_transform = time.perf_counter()
+    records = []     # ทุกแถวที่ไม่ว่าง (แบบที่ต้องแปลงครบก่อนเขียน)
+    state = importstate.Entries()   # hash ต่อแถวสำหรับบันทึก state — แบบ stream สะสมระหว่างเขียน
+    delta = None
+    if args.incremental:
+        # ต้องเห็นครบทุกแถวก่อนจึง diff ได้ — แปลงให้เสร็จก่อนเริ่มเขียน
+        with timer.stage('transform'):
+            records = list(pipe)
+        progress(f"Transformed {len(records)} rows in {time.perf_counter() - t_transform:.2f}s")
+        prev_rows, reason = importstate.load(args.state, db.describe())
+        if prev_rows is None:
+            progress(f"Incremental: {reason} — import ทั้งไฟล์")
+            to_write = records
         else:
-            # INSERT new plot
-            cur.execute("""
-                INSERT INTO land_plots
-                    (plot_code, villager_id, park_name, zone,
-                     area_rai, area_ngan, area_sqwa,
-                     land_use_type, latitude, longitude, status, notes,
-                     code_dnp, apar_code, apar_no, num_apar, spar_code,
-                     ban_e, perimeter, ban_type, num_spar, spar_no,
-                     par_ban, par_moo, par_tam, par_amp, par_prov,
-                     ptype, target_fid, occupation_since, remark_risk, data_issues)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s,
-                        %s, %s, %s, %s, %s, %s, %s, %s, %s, %s,
-                        %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-            """, (
-                plot_code, villager_id, name_dnp or None, None,
-                final_rai, ngan, wa_sq,
-                land_use_type, lat, lng, status, None,
-                code_dnp or None, apar_code or None, apar_no or None,
-                num_apar or None, spar_code or None,
-                ban_e or None, perimeter, ban_type_val,
-                num_spar or None, spar_no or None,
-                par_ban or None, par_moo or None, par_tam or None,
-                par_amp or None, par_prov or None,
-                ptype or None, target_fid, occupation_since,
-                remark_risk, issue_text
-            ))
-            stats['plot_insert'] += 1
-
-        if row_num % 200 == 0:
-            progress(f"  Processing {row_num}/{total_rows} ...")
-
-    conn.commit()
-    progress(f"\n{'='*50}")
-    progress(f"✅ UPSERT สำเร็จ!")
-    progress(f"   ราษฎรสร้างใหม่:    {stats['villager_insert']}")
-    progress(f"   ราษฎรอัพเดท:       {stats['villager_update']}")
-    progress(f"   แปลงสร้างใหม่:     {stats['plot_insert']}")
-    progress(f"   แปลงอัพเดท:        {stats['plot_update']}")
-    progress(f"   ข้ามแถวว่าง:       {stats['skipped']}")
-    progress(f"   ข้อผิดพลาด:        {stats['errors']}")
-
-    # Summary from DB
-    cur.execute("SELECT COUNT(*) FROM villagers")
-    progress(f"\n   [DB] villagers ทั้งหมด: {cur.fetchone()[0]}")
-    cur.execute("SELECT COUNT(*) FROM land_plots")
-    progress(f"   [DB] land_plots ทั้งหมด: {cur.fetchone()[0]}")
-    cur.execute("SELECT COUNT(*) FROM land_plots WHERE data_issues IS NOT NULL")
-    progress(f"   [DB] แปลงมีปัญหา: {cur.fetchone()[0]}")
-    progress(f"{'='*50}")
-
-except Exception as ex:
-    conn.rollback()
-    progress(f"\n❌ Error at row {row_num}: {ex}")
-    import traceback
-    traceback.print_exc(file=log_file)
-finally:
-    cur.close()
-    conn.close()
-
-progress("\nDone!")
-log_file.close()
+            keyed_recs = importstate.keyed(records)
+            delta = importstate.diff(prev_rows, keyed_recs, importstate.entries(keyed_recs))
+            to_write = delta.apply
+            progress(f"Incremental: ใหม่ {len(delta.inserted)}, เปลี่ยน {len(delta.changed)}, "
+                     f"เหมือนเดิม {delta.unchanged}, หายจากไฟล์ {len(delta.removed)} "
+                     f"→ เขียน {len(to_write)} แถว")
+        total_rows = len(to_write)
+        progress(f"Data rows: {total_rows}")
+    elif args.connections > 1:
+        # แบ่งสายตามเลขบัตร/plot_code ต้องเห็นครบทุกแถวก่อน
+        with timer.stage('transform'):
+            to_write = records = list(pipe)
+        total_rows = len(to_write)
+        progress(f"Data rows: {total_rows}")
+    else:
+        # ไม่ต้อง diff — เขียนชุดแรกได้ทันทีขณะชุดถัดไปกำลังแปลง
+        to_write = pipe
+        total_rows = sheet_total
+        progress(f"Data rows: {total_rows} (รวมแถวว่าง)")
+
+    # ============================================================
+    # Process rows
+    # ============================================================
+    row_num = 0
+    done = 0
+    committed_row = resume_row  # แถวสุดท้ายที่ commit แล้ว (--commit-every)
+    try:
+        if args.connections > 1:
+            # หลาย connection: แต่ละสาย commit ทีละชุดเอง (ดู landmgmt/aiodb.py)
+            t_write = time.perf_counter()
+            with timer.stage('async_write'):
+                lanes = aiodb.upsert(to_write, stats, args.connections, args.batch_size,
+                                     progress=lambda n: progress(f"  Processing {n}/{total_rows} ..."))
+            done = total_rows
+            progress(f"Async write: {lanes} สาย, {time.perf_counter() - t_write:.2f}s")
+        else:
+            if args.mode == 'batch':
+                with timer.stage('setup'):
+                    staging.create_staging(cur)
+            elif args.lookup == 'prefetch':
+                with timer.stage('prefetch'):
+                    prefetch_keys(cur)
+                progress(f"Prefetched {len(villager_ids)} villagers, {len(plot_ids)} plots "
+                         f"in {lookup_stats['prefetch_sec'] * 1000:.0f} ms")
+
+            batch = []
+            pending = 0     # แถวที่เขียนแล้วแต่ยังไม่ commit (--commit-every)
+            streaming = to_write is pipe
+            # แบบ stream: เวลาที่รอ worker แปลงชุดถัดไป = transform
+            source = timer.iterate(to_write, 'transform') if streaming else to_write
+            for done, rec in enumerate(source, start=1):
+                row_num = rec['row_num']
+                if streaming:
+                    state.add(rec)
+                if row_num <= resume_row:
+                    continue    # commit แล้วในรอบก่อน (ยังนับใน state)
+                pending += 1
+                if args.mode == 'row':
+                    upsert_row(cur, rec)
+                    if done % 200 == 0:
+                        progress(f"  Processing {done}/{total_rows} ...")
+                else:
+                    batch.append(rec)
+                    if len(batch) >= args.batch_size:
+                        apply_batch(cur, batch)
+                        batch = []
+                        progress(f"  Processing {done}/{total_rows} ...")
+                if args.commit_every and pending >= args.commit_every and not batch:
+                    commit_chunk(conn, ws.sha256, row_num, done)
+                    committed_row, pending = row_num, 0
+
+            if batch:
+                apply_batch(cur, batch)
+        stats['skipped'] = pipe.skipped
+
+        with timer.stage('commit'):
+            conn.commit()
+        committed_row = row_num
+        if args.commit_every:
+            importstate.clear_checkpoint(args.checkpoint)
+        try:
+            with timer.stage('save_state'):
+                for rec in records:
+                    state.add(rec)
+                importstate.save(args.state, db.describe(), ws.sha256, state.rows)
+        except OSError as ex:
+            progress(f"⚠️ บันทึก state ไม่ได้ ({ex}) — ครั้งหน้า --incremental จะ import ทั้งไฟล์")
+
+        progress(f"\n{'='*50}")
+        progress(f"✅ UPSERT สำเร็จ!")
+        progress(f"   ราษฎรสร้างใหม่:    {stats['villager_insert']}")
+        progress(f"   ราษฎรอัพเดท:       {stats['villager_update']}")
+        progress(f"   แปลงสร้างใหม่:     {stats['plot_insert']}")
+        progress(f"   แปลงอัพเดท:        {stats['plot_update']}")
+        progress(f"   ข้ามแถวว่าง:       {stats['skipped']}")
+        progress(f"   ข้อผิดพลาด:        {stats['errors']}")
+        if args.mode == 'row':
+            n = lookup_stats['lookups']
+            progress(f"\n   Lookup ({args.lookup}): {n} ครั้ง, "
+                     f"{lookup_stats['lookup_sec'] * 1000:.0f} ms "
+                     f"(เฉลี่ย {lookup_stats['lookup_sec'] * 1000 / n if n else 0:.3f} ms/ครั้ง)"
+                     + (f" + prefetch {lookup_stats['prefetch_sec'] * 1000:.0f} ms"
+                        if args.lookup == 'prefetch' else ''))
+
+        if delta is not None:
+            progress(f"\n   Incremental: ข้าม {len(records) - done} แถวที่ไม่เปลี่ยน")
+            if delta.removed:
+                progress(f"   ⚠️ แถวที่หายจากไฟล์ (ไม่ได้ลบจาก DB): {len(delta.removed)}")
+                for e in delta.removed:
+                    log(f"     - plot_code={e['plot_code']}  เลขบัตร={e['villager_key']}  (แถวเดิม {e['row_num']})")
+
+        # Summary from DB
+        with timer.stage('summary'):
+            cur.execute("SELECT COUNT(*) FROM villagers")
+            progress(f"\n   [DB] villagers ทั้งหมด: {cur.fetchone()[0]}")
+            cur.execute("SELECT COUNT(*) FROM land_plots")
+            progress(f"   [DB] land_plots ทั้งหมด: {cur.fetchone()[0]}")
+            cur.execute("SELECT COUNT(*) FROM land_plots WHERE data_issues IS NOT NULL")
+            progress(f"   [DB] แปลงมีปัญหา: {cur.fetchone()[0]}")
+        progress(f"{'='*50}")
+
+    except Exception as ex:
+        conn.rollback()
+        progress(f"\n❌ Error at row {row_num}: {ex}")
+        if args.commit_every and committed_row:
+            progress(f"   commit แล้วถึงแถว {committed_row} — รันซ้ำด้วย --resume เพื่อทำต่อจากแถวถัดไป")
+        import traceback
+        traceback.print_exc(file=log_file)
+    finally:
+        pipe.close()
+        cur.close()
+        db.close()
+        ws.close()
+
+    if args.instrument:
+        progress(f"\n{'='*50}\nInstrumentation")
+        for line in timer.summary_lines():
+            progress(f"   {line}")
+        timer.write_json(args.instrument, mode=args.mode, batch_size=args.batch_size, lookup=args.lookup,
+                         workers=args.workers, connections=args.connections, incremental=args.incremental,
+                         commit_every=args.commit_every, resume_row=resume_row,
+                         rows=done, stats=dict(stats))
+        progress(f"   JSON: {args.instrument}")
+
+    progress("\nDone!")
+    log_file.close()
+
+if __name__ == "__main__":
+    main()
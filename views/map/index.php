@@ -148,7 +148,8 @@ $plotsJson = json_encode($allPlots, JSON_UNESCAPED_UNICODE);
 
     // ===== Overlay: ขอบเขตแปลงที่ดิน (GeoJSON) =====
     const plotBoundaryLayer = L.layerGroup();
-    const geojsonUrl = '<?= rtrim(dirname($_SERVER["SCRIPT_NAME"]), "/") ?>/data/plots_boundaries.geojson';
+    // ใช้ไฟล์ย่อจาก tools/build_boundaries.py ถ้ามี (เล็กกว่า ~4 เท่า) ไม่งั้นใช้ไฟล์เต็ม
+    const geojsonUrl = '<?= rtrim(dirname($_SERVER["SCRIPT_NAME"]), "/") ?>/data/<?= file_exists(__DIR__ . '/../../data/plots_boundaries.min.geojson') ? 'plots_boundaries.min.geojson' : 'plots_boundaries.geojson' ?>';
     fetch(geojsonUrl)
         .then(r => { if (!r.ok) throw new Error('HTTP ' + r.status); return r.json(); })
         .then(geojson => {